@@ -12,12 +12,17 @@ Investigates:
 5. Blocking event frequency
 """
 
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 import glob
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent))
+
+from controls.ml_based.drl.observation_codec import load_states  # noqa: E402
+
 ACTION_NAMES = ["Continue", "Skip2P1", "Next"]
 
 GOOD_SCENARIOS = ["Bi_0", "Bi_1", "Bi_2", "Bi_3", "Bi_4", "Bi_5"]
@@ -54,7 +59,7 @@ class BicycleSpikeAnalyzer:
         if not self.states_file:
             raise ValueError("states_file is required")
 
-        data = np.load(self.states_file)
+        data = load_states(self.states_file)
         self.states = data["states"]
         self.actions = data["actions"]
         self.scenarios = data["scenarios"]
@@ -16,7 +16,6 @@ import sys
 from pathlib import Path
 import time
 import os
-import numpy as np
 
 project_root = Path(__file__).resolve().parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
@@ -46,6 +45,7 @@ from analysis.drl.single_agent.safety_analysis import SafetyAnalyzer  # noqa: E4
 from analysis.drl.single_agent.bicycle_spike_analysis import (  # noqa: E402
     BicycleSpikeAnalyzer,
 )
+from controls.ml_based.drl.observation_codec import load_states  # noqa: E402
 
 
 def print_section(title):
@@ -138,7 +138,7 @@ def run_all_analyses(model_path, states_file=None):
 
         if states_file:
             print("\n   [Enhanced] Generating counterfactuals for rare transitions...")
-            data = np.load(states_file)
+            data = load_states(states_file)
             states_all = data["states"]
             actions_all = data["actions"]
             scenarios_all = data["scenarios"]
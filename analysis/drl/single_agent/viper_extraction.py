@@ -31,6 +31,7 @@ import pickle
 
 from controls.ml_based.drl.agent import DQNAgent
 from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.observation_codec import load_states
 
 
 class VIPERExtractor:
@@ -177,7 +178,7 @@ class VIPERExtractor:
         print(f"   File: {states_file}")
 
         try:
-            data = np.load(states_file)
+            data = load_states(states_file)
             states = data["states"]
             actions = data["actions"]
             scenarios = data["scenarios"]
@@ -1,9 +1,12 @@
 """
-SUMO utility functions for path setup and environment configuration.
+SUMO utility functions for path setup, environment configuration and
+starting TraCI-controlled simulations.
 """
 
 import os
+import subprocess
 import sys
+import time
 
 
 def setup_project_paths():
@@ -93,3 +96,63 @@ def setup_environment():
     project_root = setup_project_paths()
     sumo_tools = setup_sumo_tools()
     return project_root, sumo_tools
+
+
+def start_sumo(
+    sumo_cmd, label=None, switch=False, timeout=60.0, poll_interval=0.05, port_attempts=5
+):
+    """
+    Launch SUMO on a free TraCI port and connect as soon as it listens.
+
+    Each call picks its own port (the OS hands out a free one), so any number
+    of simulations can run side by side, in one process or across processes.
+    Instead of sleeping a fixed time, the connection is polled every
+    poll_interval seconds, so startup takes SUMO's actual load time. If SUMO
+    exits before accepting the connection (e.g. another process took the
+    port in between), it is relaunched on a new port.
+
+    Args:
+        sumo_cmd (list): SUMO command without --remote-port,
+            e.g. ["sumo", "-c", "signal_sync.sumocfg"]
+        label (str): Register the connection under this traci label, None to
+            keep it out of traci's connection pool
+        switch (bool): Make it the connection used by module-level traci calls
+        timeout (float): Seconds to wait for SUMO to accept the connection
+        poll_interval (float): Seconds between connection attempts
+        port_attempts (int): SUMO launches before giving up
+
+    Returns:
+        tuple: (traci Connection, SUMO subprocess.Popen)
+
+    Example:
+        >>> connection, process = start_sumo(["sumo", "-c", cfg], label="env_0")
+        >>> connection.simulationStep()
+        >>> connection.close()
+    """
+    import traci
+
+    for _ in range(port_attempts):
+        port = traci.getFreeSocketPort()
+        process = subprocess.Popen(
+            sumo_cmd + ["--remote-port", str(port)], stdout=sys.stdout, stderr=sys.stderr
+        )
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                connection = traci.connect(port, numRetries=0, proc=process, label=label)
+            except traci.TraCIException:
+                break  # SUMO exited, try another port
+            except traci.FatalTraCIError:
+                if time.perf_counter() > deadline:
+                    process.terminate()
+                    raise
+                time.sleep(poll_interval)
+                continue
+            if switch:
+                traci.switch(label)
+            return connection, process
+
+    raise traci.FatalTraCIError(
+        f"SUMO exited before accepting a TraCI connection ({port_attempts} attempts, "
+        f"exit code {process.returncode}): {' '.join(sumo_cmd)}"
+    )
@@ -153,13 +153,21 @@ import numpy as np
 import random
 import sys
 import os
+import threading
 
 # Add parent directory to path for common imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from controls.ml_based.drl.neural_network import DQN
-from controls.ml_based.drl.replay_buffer import PrioritizedReplayBuffer
+from controls.ml_based.drl.neural_network import DQN, flatten_parameters
+from controls.ml_based.drl.replay_buffer import (
+    MemmapPrioritizedReplayBuffer,
+    PrioritizedReplayBuffer,
+)
 from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.prefetcher import BatchPrefetcher, batch_to_tensors
+from controls.ml_based.drl.replay_ratio import ReplayRatioScheduler
+from controls.ml_based.drl.reprioritizer import BackgroundReprioritizer
+from controls.ml_based.drl.target_cache import TargetQCache
 from common.utils import get_device
 from constants.constants import TARGET_UPDATE_FREQUENCY
 
@@ -208,7 +216,7 @@ class DQNAgent:
         action = agent.select_action(state, explore=False)
     """
 
-    def __init__(self, state_dim, action_dim, device=None):
+    def __init__(self, state_dim, action_dim, device=None, replay_dir=None):
         """
         Initialize DQN Agent with dual networks and replay buffer.
 
@@ -219,6 +227,9 @@ class DQNAgent:
             state_dim (int): Dimension of state space (45 for traffic system)
             action_dim (int): Number of actions (4 for traffic control)
             device (str, optional): 'cuda', 'cpu', or None for auto-detect
+            replay_dir (str, optional): Directory for the replay buffer files
+                when DRLConfig.REPLAY_BACKEND == "memmap". Without it the
+                in-memory buffer is used (testing/analysis never fill it)
 
         Networks:
             - Policy network: Actively trained, makes decisions
@@ -241,6 +252,10 @@ class DQNAgent:
         self.target_net.load_state_dict(self.policy_net.state_dict())
         self.target_net.eval()  # Target network never trains directly
 
+        # Parameters as views into one flat buffer each (fused soft updates)
+        self.policy_flat = flatten_parameters(self.policy_net)
+        self.target_flat = flatten_parameters(self.target_net)
+
         # Optimizer and loss
         self.optimizer = optim.Adam(
             self.policy_net.parameters(), lr=DRLConfig.LEARNING_RATE
@@ -248,7 +263,53 @@ class DQNAgent:
         self.loss_fn = nn.MSELoss()
 
         # Replay buffer with prioritization
-        self.memory = PrioritizedReplayBuffer(DRLConfig.BUFFER_SIZE)
+        if DRLConfig.REPLAY_BACKEND == "memmap" and replay_dir is not None:
+            self.memory = MemmapPrioritizedReplayBuffer(
+                DRLConfig.MEMMAP_BUFFER_SIZE, state_dim, directory=replay_dir
+            )
+        else:
+            self.memory = PrioritizedReplayBuffer(DRLConfig.BUFFER_SIZE, state_dim)
+
+        # γ^m for every n-step horizon m the buffer can return
+        self.discounts = torch.tensor(
+            [DRLConfig.GAMMA**m for m in range(DRLConfig.N_STEP + 1)],
+            dtype=torch.float32,
+            device=self.device,
+        )
+
+        # Guards self.memory when batches are prefetched on a worker thread
+        self.memory_lock = threading.Lock()
+        self.prefetcher = None  # Started by train() if DRLConfig.PREFETCH_BATCHES
+        self.reprioritizer = None  # Started by train() if REPRIORITIZE_INTERVAL
+
+        # Gradient steps per train() call and learner throughput
+        self.replay_ratio = ReplayRatioScheduler(
+            gradient_steps=DRLConfig.GRADIENT_STEPS,
+            adaptive=DRLConfig.ADAPTIVE_GRADIENT_STEPS,
+            train_time_ratio=DRLConfig.TRAIN_TIME_RATIO,
+            max_steps=DRLConfig.MAX_GRADIENT_STEPS,
+        )
+
+        # Target Q-vectors per replay slot, valid until the next soft update
+        # (memmap backend: in files next to the buffer's, not in RAM)
+        self.target_cache = None
+        if DRLConfig.TARGET_Q_CACHE:
+            cache_dir = (
+                self.memory.directory
+                if isinstance(self.memory, MemmapPrioritizedReplayBuffer)
+                else None
+            )
+            self.target_cache = TargetQCache(
+                self.memory.n_rows, action_dim, directory=cache_dir
+            )
+        self.target_forward_rows = 0  # Rows evaluated by target_net (profiling)
+
+        # Transitions awaiting batched TD-error initialisation
+        self.staged_experiences = []
+
+        # Policy Q-vectors by observation bytes, valid until the next train()
+        self.q_memo = {}
+        self.policy_forward_rows = 0  # Rows evaluated outside train() (profiling)
 
         # Exploration parameters (ε-greedy)
         self.epsilon = DRLConfig.EPSILON_START  # Start: 1.0 (fully random)
@@ -299,13 +360,13 @@ class DQNAgent:
 
         # Exploitation: greedy action (highest Q-value)
         with torch.no_grad():  # No gradient computation for inference
-            # Convert state to tensor if it's a numpy array
-            if not isinstance(state, torch.Tensor):
-                state = (
-                    torch.FloatTensor(state).unsqueeze(0).to(self.device)
-                )  # [1, state_dim]
+            # Convert state to a [1, state_dim] float32 array
+            if isinstance(state, torch.Tensor):
+                state = state.cpu().numpy()
+            state = np.asarray(state, dtype=np.float32).reshape(1, -1)
 
-            q_values = self.policy_net(state)  # [1, action_dim]
+            # Memoized until the next train(); reused by store_experience()
+            q_values = torch.from_numpy(self._policy_q_values(state))
 
             # Apply action masking: set invalid actions to -inf
             q_values_masked = q_values.clone()
@@ -328,9 +389,16 @@ class DQNAgent:
         """
         Store experience in prioritized replay buffer.
 
-        Calculates TD error for prioritization and extracts event type
-        for additional priority weighting (safety violations, pedestrian
-        phases, sync failures get higher priority).
+        Extracts the event type for additional priority weighting (safety
+        violations, pedestrian phases, sync failures get higher priority)
+        and sets the initial priority according to DRLConfig.PRIORITY_INIT:
+
+            "batched": stage the transition; TD errors of all staged
+                transitions are computed in one batched forward pass every
+                PRIORITY_INIT_INTERVAL steps or when train() runs
+                (see flush_staged_experiences())
+            "max": insert immediately at the buffer's maximum priority,
+                as in the original PER paper (no forward pass)
 
         Args:
             state (np.ndarray): Current traffic state [state_dim]
@@ -340,7 +408,7 @@ class DQNAgent:
             done (bool): Whether episode terminated
             info (dict): Additional info with 'event_type' key
 
-        Event Types (priority multipliers):
+        Event Types (priority multipliers, applied in both modes):
             'normal': 1x
             'sync_success': 3x
             'bus_conflict': 4x
@@ -348,18 +416,103 @@ class DQNAgent:
             'sync_failure': 6x
             'safety_violation': 10x
         """
-        # Calculate TD error for prioritization
-        td_error = self._calculate_td_error(state, action, reward, next_state, done)
-
         # Extract event type (defaults to 'normal' if not provided)
         event_type = info.get("event_type", "normal")
 
+        if DRLConfig.PRIORITY_INIT == "max":
+            with self.memory_lock:
+                self.memory.add(
+                    state, action, reward, next_state, done, None, event_type
+                )
+            return
+
+        self.staged_experiences.append(
+            (state, action, reward, next_state, done, event_type)
+        )
+        if len(self.staged_experiences) >= DRLConfig.PRIORITY_INIT_INTERVAL:
+            self.flush_staged_experiences()
+
+    def flush_staged_experiences(self):
+        """
+        Compute TD errors of all staged transitions and add them to the buffer.
+
+        One policy and one target forward pass for the whole stage instead
+        of two 1-row passes per simulator step. Called automatically by
+        store_experience(), train() and save().
+
+        Weights only change inside train(), which flushes before its
+        gradient step, so every staged transition is scored with the same
+        networks the per-step computation would have used.
+        """
+        if not self.staged_experiences:
+            return
+        states, actions, rewards, next_states, dones, event_types = zip(
+            *self.staged_experiences
+        )
+        self.staged_experiences = []
+        self.store_experiences(
+            np.stack(states).astype(np.float32),
+            np.asarray(actions, dtype=np.int64),
+            np.asarray(rewards, dtype=np.float32),
+            np.stack(next_states).astype(np.float32),
+            np.asarray(dones, dtype=np.bool_),
+            np.array([self.memory.event_code(event) for event in event_types]),
+        )
+
+    def store_experiences(
+        self, states, actions, rewards, next_states, dones, event_codes, td_errors=None
+    ):
+        """
+        Add a batch of transitions (columns) to the replay buffer.
+
+        Rows without a TD error (NaN, or every row when td_errors is None)
+        are scored in one batched forward pass under PRIORITY_INIT
+        "batched" and inserted at max priority under "max". The whole batch
+        is then written with one PrioritizedReplayBuffer.add_batch() under
+        a single memory_lock acquisition, in order.
+
+        Args:
+            states (np.ndarray): float32 [n, state_dim]
+            actions (np.ndarray): Actions taken [n]
+            rewards (np.ndarray): Rewards received [n]
+            next_states (np.ndarray): float32 [n, state_dim]
+            dones (np.ndarray): Episode termination flags [n]
+            event_codes (np.ndarray): Indices into
+                PrioritizedReplayBuffer.EVENT_TYPES [n] (see event_code())
+            td_errors (np.ndarray, optional): Precomputed TD errors [n]
+        """
+        if td_errors is None:
+            td_errors = np.full(len(actions), np.nan)
+        td_errors = np.array(td_errors, dtype=np.float64)
+        pending = np.flatnonzero(np.isnan(td_errors))
+
+        next_q = None
+        if DRLConfig.PRIORITY_INIT != "max" and len(pending):
+            td_errors[pending], next_q = self._calculate_td_errors(
+                states[pending],
+                np.asarray(actions[pending], dtype=np.int64),
+                np.asarray(rewards[pending], dtype=np.float32),
+                next_states[pending],
+                np.asarray(dones[pending], dtype=np.bool_),
+            )
+
         # Store in buffer with priority based on TD error and event type
-        self.memory.add(state, action, reward, next_state, done, td_error, event_type)
+        with self.memory_lock:
+            slots = self.memory.add_batch(
+                states, actions, rewards, next_states, dones, td_errors, event_codes
+            )
+            generations = self.memory.generations[slots[pending]]
 
-    def _calculate_td_error(self, state, action, reward, next_state, done):
+        # The target evaluation of s' stays valid until the next soft update
+        if self.target_cache is not None and next_q is not None:
+            live = ~np.asarray(dones[pending], dtype=np.bool_)
+            self.target_cache.store(
+                slots[pending][live], generations[live], next_q[live]
+            )
+
+    def _calculate_td_errors(self, states, actions, rewards, next_states, dones):
         """
-        Calculate Temporal Difference error for prioritization.
+        Calculate Temporal Difference errors for prioritization.
 
         TD error measures how surprising/unexpected the outcome was:
         - Large TD error → bad prediction → high priority (learn from this!)
@@ -370,40 +523,81 @@ class DQNAgent:
             Else:    TD_error = |reward + γ·max(Q_next) - Q_current|
 
         Args:
-            state (np.ndarray): Current state
-            action (int): Action taken
-            reward (float): Reward received
-            next_state (np.ndarray): Next state
-            done (bool): Episode termination flag
+            states (np.ndarray): Current states [n, state_dim]
+            actions (np.ndarray): Actions taken [n]
+            rewards (np.ndarray): Rewards received [n]
+            next_states (np.ndarray): Next states [n, state_dim]
+            dones (np.ndarray): Episode termination flags [n]
 
         Returns:
-            float: Absolute TD error (always positive)
+            tuple: (td_errors, next_q)
+                td_errors (np.ndarray): Absolute TD errors [n]
+                next_q (np.ndarray): Target Q-vectors of next_states
+                    [n, action_dim] (unused for terminal rows)
 
         Example:
             # Good prediction: Q_current=10, Q_target=9.5 → TD_error=0.5 (low priority)
             # Bad prediction:  Q_current=10, Q_target=50  → TD_error=40  (high priority)
         """
         with torch.no_grad():  # No gradients needed for prioritization
-            # Convert states to tensors
-            state_t = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-            next_state_t = torch.FloatTensor(next_state).unsqueeze(0).to(self.device)
+            next_states_t = torch.from_numpy(next_states).to(self.device)
+
+            # Current Q-value prediction (reuses select_action()'s forward pass)
+            q_current = self._policy_q_values(states)[np.arange(len(states)), actions]
+            q_current = q_current.astype(np.float64)
+
+            # Target Q-value calculation (terminal rows: no future rewards)
+            next_q = self.target_net(next_states_t).cpu().numpy()
+            self.target_forward_rows += len(next_states)
+            q_next = next_q.max(axis=1).astype(np.float64)
+            q_target = np.where(
+                dones, rewards, rewards + DRLConfig.GAMMA * q_next
+            )
+
+            # TD error = |target - prediction|
+            td_errors = np.abs(q_target - q_current)
+
+        return td_errors, next_q
 
-            # Current Q-value prediction
-            q_current = self.policy_net(state_t)[0, action]
+    def _policy_q_values(self, states):
+        """
+        Policy Q-vectors for observations, memoized per observation.
 
-            # Target Q-value calculation
-            if done:
-                # Terminal state: no future rewards
-                q_target = reward
+        Policy weights only change in train(), so a Q-vector computed by
+        select_action() for state s can be reused for the TD error of the
+        transition starting at s. Rows missing from the memo are evaluated
+        in one forward pass. train() and load() clear the memo.
+
+        Args:
+            states (np.ndarray): float32 observations [n, state_dim]
+
+        Returns:
+            np.ndarray: Q-values [n, action_dim]
+        """
+        keys = [row.tobytes() for row in states]
+        q_values = np.empty((len(states), self.action_dim), dtype=np.float32)
+        missing = []
+        for i, key in enumerate(keys):
+            memo = self.q_memo.get(key)
+            if memo is None:
+                missing.append(i)
             else:
-                # Non-terminal: include discounted future value
-                q_next = self.target_net(next_state_t).max().item()
-                q_target = reward + DRLConfig.GAMMA * q_next
+                q_values[i] = memo
 
-            # TD error = |target - prediction|
-            td_error = abs(q_target - q_current.item())
+        if missing:
+            with torch.no_grad():
+                rows = torch.from_numpy(states[missing]).to(self.device)
+                computed = self.policy_net(rows).cpu().numpy()
+            self.policy_forward_rows += len(missing)
+            q_values[missing] = computed
+
+            # Bounded for long evaluation runs where train() never clears it
+            if len(self.q_memo) + len(missing) > DRLConfig.Q_MEMO_SIZE:
+                self.q_memo.clear()
+            for i, q in zip(missing, computed):
+                self.q_memo[keys[i]] = q
 
-        return td_error
+        return q_values
 
     def train(self):
         """
@@ -426,8 +620,14 @@ class DQNAgent:
         - Smooth L1 loss (robust to outliers)
         - Importance sampling weights from PER
 
+        With DRLConfig.GRADIENT_STEPS = k (or ADAPTIVE_GRADIENT_STEPS), one
+        batch of k · BATCH_SIZE is sampled and steps 2-7 run once per
+        BATCH_SIZE mini-batch (interleaved slices, every k-th sampled row);
+        priorities of each mini-batch are updated before the next one trains.
+
         Returns:
-            float or None: Training loss value, or None if buffer too small
+            float or None: Training loss value (mean over the call's
+                gradient steps), or None if buffer too small
 
         Algorithm:
             For each sample in batch:
@@ -436,28 +636,71 @@ class DQNAgent:
                 Q_next = target_net(next_state)[next_action]   # Target evaluates
                 Q_target = reward + γ · Q_next · (1 - done)
                 loss = smooth_l1_loss(Q_current, Q_target)
+
+            With DRLConfig.N_STEP = n, reward is the discounted n-step return
+            and Q_next is evaluated m ≤ n steps ahead, bootstrapped with γ^m.
         """
+        # Score staged transitions with the pre-update weights
+        self.flush_staged_experiences()
+
         # Wait until buffer has enough experiences
         if len(self.memory) < DRLConfig.MIN_BUFFER_SIZE:
             return None
 
-        # Sample prioritized batch (high TD error samples more likely)
-        batch, indices, weights = self.memory.sample(DRLConfig.BATCH_SIZE)
+        # One sample of k mini-batches per call (k = 1 unless the replay
+        # ratio is raised, see replay_ratio.py)
+        gradient_steps = self.replay_ratio.begin()
+        sample_size = gradient_steps * DRLConfig.BATCH_SIZE
+
+        # Sample prioritized batch (high TD error samples more likely) and
+        # wrap it as tensors; with prefetching this already happened on the
+        # worker thread while the previous step ran
+        if DRLConfig.PREFETCH_BATCHES:
+            if self.prefetcher is None:
+                self.prefetcher = BatchPrefetcher(
+                    self.memory, self.memory_lock, sample_size, self.device
+                )
+            # A changed k applies from the next prefetched sample on
+            self.prefetcher.batch_size = sample_size
+            tensors, indices, generations = self.prefetcher.get()
+        else:
+            with self.memory_lock:
+                batch, indices, weights = self.memory.sample(sample_size)
+                generations = self.memory.slot_generations(indices)
+            tensors = batch_to_tensors(batch, weights, self.device)
+
+        # The sample comes in cumulative-priority order (stratum draws first),
+        # i.e. roughly in buffer order, so consecutive slices would each cover
+        # one band of the ring. Mini-batch j takes every k-th row instead and
+        # spans the whole buffer like a single BATCH_SIZE sample.
+        n_batches = max(len(indices) // DRLConfig.BATCH_SIZE, 1)
+        losses = []
+        for j in range(n_batches):
+            part = slice(j, None, n_batches)
+            losses.append(
+                self._gradient_step(
+                    [tensor[part] for tensor in tensors],
+                    indices[part],
+                    generations[part],
+                )
+            )
+        self.replay_ratio.end(len(losses), len(indices))
+
+        return float(np.mean(losses))
 
-        # Unpack batch into separate lists
-        states, actions, rewards, next_states, dones = zip(*batch)
+    def _gradient_step(self, tensors, indices, generations):
+        """
+        One Double DQN update on a mini-batch (see train()).
 
-        # Convert to PyTorch tensors
-        states = torch.FloatTensor(np.array(states)).to(
-            self.device
-        )  # [batch, state_dim]
-        actions = torch.LongTensor(actions).to(self.device)  # [batch]
-        rewards = torch.FloatTensor(rewards).to(self.device)  # [batch]
-        next_states = torch.FloatTensor(np.array(next_states)).to(
-            self.device
-        )  # [batch, state_dim]
-        dones = torch.FloatTensor(dones).to(self.device)  # [batch]
-        weights = torch.FloatTensor(weights).to(self.device)  # [batch]
+        Args:
+            tensors (list): batch_to_tensors() output for the mini-batch
+            indices (np.ndarray): Tree indices of the mini-batch
+            generations (np.ndarray): Slot generations at sampling time
+
+        Returns:
+            float: Training loss
+        """
+        states, actions, rewards, next_states, dones, horizons, weights = tensors
 
         # Layer 1: Clip rewards to prevent extreme values
         rewards = torch.clamp(rewards, -10.0, 10.0)
@@ -475,7 +718,7 @@ class DQNAgent:
 
             # Step 2: Target network evaluates those actions
             next_q_values = (
-                self.target_net(next_states)
+                self._target_q_values(indices, generations, next_states, horizons)
                 .gather(1, next_actions.unsqueeze(1))
                 .squeeze()
             )
@@ -485,7 +728,9 @@ class DQNAgent:
 
             # Bellman equation with terminal state handling
             # (1 - dones): if done=1, multiply by 0 (no future); if done=0, multiply by 1 (include future)
-            target_q_values = rewards + DRLConfig.GAMMA * next_q_values * (1 - dones)
+            # rewards are n-step returns, bootstrapped with γ^horizon
+            discounts = self.discounts[horizons]
+            target_q_values = rewards + discounts * next_q_values * (1 - dones)
 
             # Layer 3: Clip final targets
             target_q_values = torch.clamp(target_q_values, -10.0, 10.0)
@@ -515,18 +760,79 @@ class DQNAgent:
         torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), 0.5)
 
         self.optimizer.step()  # Update weights
+        self.q_memo.clear()  # Memoized policy Q-values are now stale
 
         # Update priorities in replay buffer based on new TD errors
+        # (prefetched batches skip slots rewritten since they were sampled)
         td_errors_np = torch.clamp(td_errors, -10, 10).detach().cpu().numpy()
-        self.memory.update_priorities(indices, np.abs(td_errors_np))
+        with self.memory_lock:
+            self.memory.update_priorities(
+                indices, np.abs(td_errors_np), generations
+            )
 
         # Soft update target network periodically
         self.steps += 1
         if self.steps % TARGET_UPDATE_FREQUENCY == 0:
             self.soft_update_target_network()
 
+        # Periodically re-score the whole buffer on a worker thread
+        if (
+            DRLConfig.REPRIORITIZE_INTERVAL
+            and self.steps % DRLConfig.REPRIORITIZE_INTERVAL == 0
+        ):
+            if self.reprioritizer is None:
+                self.reprioritizer = BackgroundReprioritizer(
+                    self.memory,
+                    self.memory_lock,
+                    self.policy_net,
+                    self.target_net,
+                    self.discounts,
+                    self.device,
+                    shard_size=DRLConfig.REPRIORITIZE_SHARD,
+                    batch_size=DRLConfig.REPRIORITIZE_BATCH,
+                    cpu_fraction=DRLConfig.REPRIORITIZE_CPU_FRACTION,
+                )
+            self.reprioritizer.request(self.policy_net, self.target_net)
+
         return loss.item()
 
+    def _target_q_values(self, indices, generations, next_states, horizons=None):
+        """
+        Target Q-vectors for a sampled batch, served from the cache where possible.
+
+        Only rows whose slot has no entry for the current target version
+        are evaluated, in a single forward pass, and then cached.
+
+        Args:
+            indices (np.ndarray): Tree indices of the batch
+            generations (np.ndarray): Slot generations at sampling time
+            next_states (torch.Tensor): [batch, state_dim] next states
+            horizons (torch.Tensor, optional): [batch] n-step horizons
+                (cache key part); None means one-step
+
+        Returns:
+            torch.Tensor: [batch, action_dim] target_net(next_states)
+        """
+        if self.target_cache is None:
+            self.target_forward_rows += len(next_states)
+            return self.target_net(next_states)
+
+        rows = self.memory.row_index(np.asarray(indices))
+        horizons = 1 if horizons is None else horizons.cpu().numpy()
+        q_values, miss = self.target_cache.lookup(rows, generations, horizons)
+        if miss.any():
+            miss_t = torch.from_numpy(np.flatnonzero(miss)).to(self.device)
+            computed = self.target_net(next_states[miss_t])
+            self.target_forward_rows += len(miss_t)
+            q_values[miss] = computed.cpu().numpy()
+            self.target_cache.store(
+                rows[miss],
+                generations[miss],
+                q_values[miss],
+                horizons if np.isscalar(horizons) else horizons[miss],
+            )
+        return torch.from_numpy(q_values).to(self.device)
+
     def soft_update_target_network(self):
         """
         Gradually update target network toward policy network.
@@ -542,14 +848,17 @@ class DQNAgent:
         preventing the "chasing a moving target" problem.
 
         Called every TARGET_UPDATE_FREQUENCY steps (500 in config).
+        Expires the target Q-value cache.
+
+        Both networks' parameters live in flat buffers (flatten_parameters()),
+        so the update is one fused in-place lerp over all ~110K weights with
+        no temporaries; cheap enough for TARGET_UPDATE_FREQUENCY = 1 (scale
+        TAU down accordingly, e.g. 0.005 / 500 per step).
         """
-        for target_param, policy_param in zip(
-            self.target_net.parameters(), self.policy_net.parameters()
-        ):
-            target_param.data.copy_(
-                DRLConfig.TAU * policy_param.data
-                + (1 - DRLConfig.TAU) * target_param.data
-            )
+        if self.target_cache is not None:
+            self.target_cache.invalidate()
+        with torch.no_grad():
+            self.target_flat.lerp_(self.policy_flat, DRLConfig.TAU)
 
     def decay_epsilon(self):
         """
@@ -580,6 +889,10 @@ class DQNAgent:
         - Current epsilon value
         - Training step counter
         - Episode counter
+        - Replay buffer snapshot (directory "replay" next to the .pth),
+          saved incrementally and tagged with episode and step (see
+          PrioritizedReplayBuffer.save()); the directory keeps the two
+          newest snapshots, so an interrupted save leaves the previous one
 
         Args:
             filepath (str): Path to save checkpoint (.pth file)
@@ -595,10 +908,18 @@ class DQNAgent:
             "steps": self.steps,
             "episode_count": self.episode_count,
         }
+
+        checkpoint_dir = os.path.dirname(filepath) or "."
+        replay_dir = os.path.join(checkpoint_dir, "replay")
+        self.flush_staged_experiences()
+        with self.memory_lock:
+            self.memory.save(replay_dir, checkpoint=self._replay_tag(checkpoint))
+        checkpoint["replay_dir"] = os.path.relpath(replay_dir, checkpoint_dir)
+
         torch.save(checkpoint, filepath)
         print(f"Model saved to {filepath}")
 
-    def load(self, filepath):
+    def load(self, filepath, load_memory=False):
         """
         Load agent state from checkpoint file.
 
@@ -607,9 +928,20 @@ class DQNAgent:
         - Optimizer state
         - Exploration parameter (epsilon)
         - Training counters
+        - Replay buffer (only with load_memory=True)
 
         Args:
             filepath (str): Path to checkpoint file (.pth)
+            load_memory (bool, optional): Also restore the replay buffer
+                snapshot, so resumed training starts on a warm buffer.
+                The snapshot is copied into this agent's buffer; the
+                checkpoint's files are left untouched.
+
+        Raises:
+            ValueError: With load_memory, if the replay directory no longer
+                holds the snapshot saved with this checkpoint (only the two
+                newest saves of a run are kept); load with
+                load_memory=False to resume on an empty buffer
 
         Example:
             agent.load('models/checkpoint_ep500.pth')
@@ -626,8 +958,46 @@ class DQNAgent:
         self.epsilon = checkpoint["epsilon"]
         self.steps = checkpoint["steps"]
         self.episode_count = checkpoint["episode_count"]
+        self.q_memo.clear()
+        if self.target_cache is not None:
+            self.target_cache.invalidate()
+
+        if load_memory and "replay_dir" in checkpoint:
+            replay_dir = os.path.join(
+                os.path.dirname(filepath) or ".", checkpoint["replay_dir"]
+            )
+            with self.memory_lock:
+                self.memory.load(replay_dir, checkpoint=self._replay_tag(checkpoint))
+            print(f"Replay buffer loaded from {replay_dir} ({len(self.memory)} experiences)")
+
         print(f"Model loaded from {filepath}")
 
+    @staticmethod
+    def _replay_tag(checkpoint):
+        """Tag identifying a checkpoint's replay snapshot (see save())."""
+        return {"episode": checkpoint["episode_count"], "steps": checkpoint["steps"]}
+
+    def stop_prefetching(self):
+        """
+        Stop the background batch prefetcher, if one is running.
+
+        Call when training ends; the next train() call starts a new one.
+        """
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    def stop_reprioritizing(self):
+        """
+        Stop the background re-prioritisation worker, if one is running.
+
+        An unfinished sweep is discarded. Call when training ends; the next
+        scheduled train() call starts a new worker.
+        """
+        if self.reprioritizer is not None:
+            self.reprioritizer.close()
+            self.reprioritizer = None
+
     def set_eval_mode(self):
         """
         Set networks to evaluation mode for testing.
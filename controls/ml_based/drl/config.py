@@ -11,16 +11,48 @@ class DRLConfig:
     ACTION_DIM = 3
     HIDDEN_LAYERS = [256, 256, 128]
 
+    SUMO_BACKEND = "traci"  # "traci" (subprocess + socket) or "libsumo" (in-process)
+    PERSISTENT_SUMO = False  # Keep SUMO between episodes, start each with load()
+
     LEARNING_RATE = 0.00001
     GAMMA = 0.95
+    N_STEP = 1  # n-step returns with GAMMA**n bootstrapping, e.g. 3
     EPSILON_START = 1.0
     EPSILON_END = 0.05
     EPSILON_DECAY = 0.98
     TAU = 0.005
+    TARGET_Q_CACHE = True  # Reuse target_net(s') per replay slot between soft updates
 
     BUFFER_SIZE = 50000
+    REPLAY_BACKEND = "memory"  # "memory" or "memmap"
+    MEMMAP_BUFFER_SIZE = 10_000_000
+    PACK_OBSERVATIONS = False  # Bit-pack binary state features in replay (4.6x smaller)
+    SUM_TREE_DTYPE = "float64"  # "float32" halves tree memory for large buffers
+    SUM_TREE_REBUILD_INTERVAL = 10_000  # float32 only: tree writes between rebuilds
     BATCH_SIZE = 64
+    GRADIENT_STEPS = 1  # Gradient steps (mini-batches) per train() call
+    ADAPTIVE_GRADIENT_STEPS = False  # Adapt steps per call to the env step time
+    TRAIN_TIME_RATIO = 1.0  # Adaptive: max train() time / env time between calls
+    MAX_GRADIENT_STEPS = 16  # Adaptive: upper bound on steps per call
     MIN_BUFFER_SIZE = 1000
+    PREFETCH_BATCHES = False  # Sample next batch on a worker thread
+    PRIORITY_INIT = "batched"  # "batched" TD errors or "max" priority on insert
+    PRIORITY_INIT_INTERVAL = 32  # Max staged transitions (train() also flushes)
+    Q_MEMO_SIZE = 4096  # Max memoized policy Q-vectors between train() calls
+
+    # Background re-prioritisation: recompute TD errors of stored transitions
+    REPRIORITIZE_INTERVAL = 0  # train() calls between sweeps (0 = off), e.g. 1000
+    REPRIORITIZE_SHARD = None  # Rows per sweep (rotating); None = whole buffer
+    REPRIORITIZE_BATCH = 4096  # Rows per forward pass
+    REPRIORITIZE_CPU_FRACTION = 0.25  # Max busy share of wall time while sweeping
+
+    # Protected reservoir: evicted rare/high-priority transitions kept beyond FIFO
+    RESERVOIR_SIZE = 2500  # Budget (transitions), on top of BUFFER_SIZE
+    RESERVOIR_EVENTS = ("safety_violation", "bus_conflict")
+    RESERVOIR_PRIORITY_FRACTION = None  # Also protect priority >= f * max, e.g. 0.5
+
+    # Event-stratified sampling: min batch share per stratum (None = plain PER)
+    EVENT_QUOTAS = None  # e.g. {"safety_violation": 0.1, "bus_conflict": 0.1}
 
     ALPHA = 0.6
     BETA_START = 0.4
@@ -165,6 +165,7 @@ Action selection:
 ===================================================================================
 """
 
+import torch
 import torch.nn as nn
 from controls.ml_based.drl.config import DRLConfig
 
@@ -408,3 +409,34 @@ class DQN(nn.Module):
             - Clipping Q-values in agent prevents extreme outputs
         """
         return self.network(state)
+
+
+def flatten_parameters(module):
+    """
+    Store a module's parameters as views into one contiguous buffer.
+
+    Every parameter keeps its identity (optimizers and state_dict() still
+    see the same tensors), but its data now lives in a slice of a single
+    flat tensor, so whole-network arithmetic such as Polyak averaging is
+    one fused in-place kernel instead of a Python loop over ~8 tensors:
+
+        target_flat.lerp_(policy_flat, tau)   # θ_t ← θ_t + τ·(θ_p − θ_t)
+
+    load_state_dict() and optimizer steps write in place and keep the
+    views. Moving the module afterwards (.to(), .cuda()) would not, so call
+    this after the module is on its final device.
+
+    Args:
+        module (nn.Module): Network whose parameters share dtype and device
+
+    Returns:
+        torch.Tensor: The flat parameter buffer [n_parameters]
+    """
+    parameters = list(module.parameters())
+    flat = torch.cat([parameter.detach().reshape(-1) for parameter in parameters])
+    offset = 0
+    for parameter in parameters:
+        n = parameter.numel()
+        parameter.data = flat[offset : offset + n].view_as(parameter)
+        offset += n
+    return flat
@@ -0,0 +1,177 @@
+"""
+Compact Observation Codec for Replay Storage and Saved Test States
+
+TrafficManagement._get_state() builds 16 features per traffic light:
+
+    offset  feature                          kind
+    0-3     phase one-hot (P1..P4)           binary
+    4       phase duration / 60              continuous
+    5-8     vehicle detector occupancy       binary
+    9-12    bicycle detector occupancy       binary
+    13      bus present                      binary
+    14      bus normalized wait              continuous
+    15      simulation time / limit          continuous
+
+With two traffic lights (STATE_DIM = 32) that is 26 binary flags and 6
+continuous values, but every feature was stored as a 4-byte float32.
+
+===================================================================================
+FRAME FORMAT
+===================================================================================
+
+An encoded frame is one uint8 row:
+
+    [ packbits(binary flags) | float32 bytes of continuous features ]
+      ceil(26 / 8) = 4 bytes   6 × 4 = 24 bytes                → 28 bytes
+
+vs. 128 bytes as float32 (4.6x smaller). Continuous features keep their
+float32 bytes, so decode(encode(s)) == s bit for bit; encode() raises
+ValueError for flags other than 0.0 / 1.0 instead of rounding them.
+
+Frames are plain byte rows, so replay code can copy, compare and gather them
+exactly like float32 rows; decode() turns a gathered batch back into a
+contiguous float32 [n, state_dim] array that torch.from_numpy() wraps
+directly.
+
+===================================================================================
+"""
+
+import numpy as np
+
+# Offsets of the binary features within one traffic light's 16 features
+TLS_FEATURES = 16
+TLS_BINARY_OFFSETS = (0, 1, 2, 3, 5, 6, 7, 8, 9, 10, 11, 12, 13)
+
+
+class ObservationCodec:
+    """
+    Bit-packs the binary features of observations, keeps the rest as float32.
+
+    Usage:
+        codec = ObservationCodec.for_traffic_state(32)
+        frames = codec.encode(states)      # uint8 [n, 28]
+        states = codec.decode(frames)      # float32 [n, 32], identical values
+
+    Attributes:
+        state_dim (int): Features per observation
+        binary_index (np.ndarray): Positions of binary features
+        continuous_index (np.ndarray): Positions of continuous features
+        frame_bytes (int): Bytes per encoded observation
+    """
+
+    def __init__(self, state_dim, binary_index):
+        self.state_dim = state_dim
+        self.binary_index = np.asarray(sorted(binary_index), dtype=np.int64)
+        self.continuous_index = np.setdiff1d(
+            np.arange(state_dim), self.binary_index
+        )
+        self.bit_bytes = -(-len(self.binary_index) // 8)
+        self.frame_bytes = self.bit_bytes + 4 * len(self.continuous_index)
+
+    @classmethod
+    def for_traffic_state(cls, state_dim):
+        """
+        Codec for the TrafficManagement._get_state() layout.
+
+        Raises:
+            ValueError: If state_dim is not a multiple of 16 features
+        """
+        if state_dim % TLS_FEATURES:
+            raise ValueError(
+                f"state_dim {state_dim} is not a multiple of {TLS_FEATURES} "
+                "features per traffic light"
+            )
+        return cls(
+            state_dim,
+            [
+                tls * TLS_FEATURES + offset
+                for tls in range(state_dim // TLS_FEATURES)
+                for offset in TLS_BINARY_OFFSETS
+            ],
+        )
+
+    def encode(self, states):
+        """
+        Encode observations into frames.
+
+        Args:
+            states (np.ndarray): [state_dim] or [n, state_dim]
+
+        Returns:
+            np.ndarray: uint8 [frame_bytes] or [n, frame_bytes]
+
+        Raises:
+            ValueError: If a binary feature is not exactly 0.0 or 1.0
+        """
+        states = np.asarray(states, dtype=np.float32)
+        single = states.ndim == 1
+        states = states.reshape(-1, self.state_dim)
+
+        flags = states[:, self.binary_index]
+        if not np.all((flags == 0.0) | (flags == 1.0)):
+            raise ValueError(
+                "Binary observation features must be 0.0 or 1.0 to be packed "
+                "losslessly (disable DRLConfig.PACK_OBSERVATIONS for other layouts)"
+            )
+
+        frames = np.empty((len(states), self.frame_bytes), dtype=np.uint8)
+        frames[:, : self.bit_bytes] = np.packbits(flags.astype(np.uint8), axis=1)
+        frames[:, self.bit_bytes :] = np.ascontiguousarray(
+            states[:, self.continuous_index]
+        ).view(np.uint8)
+        return frames[0] if single else frames
+
+    def decode(self, frames, out=None):
+        """
+        Decode frames into float32 observations.
+
+        Args:
+            frames (np.ndarray): uint8 [n, frame_bytes]
+            out (np.ndarray, optional): float32 [n, state_dim] to fill
+
+        Returns:
+            np.ndarray: float32 [n, state_dim] (out if given)
+        """
+        if out is None:
+            out = np.empty((len(frames), self.state_dim), dtype=np.float32)
+        out[:, self.binary_index] = np.unpackbits(
+            frames[:, : self.bit_bytes], axis=1, count=len(self.binary_index)
+        )
+        out[:, self.continuous_index] = np.ascontiguousarray(
+            frames[:, self.bit_bytes :]
+        ).view(np.float32)
+        return out
+
+
+def save_states(path, states, **arrays):
+    """
+    Save observations (plus extra arrays) to a compressed .npz.
+
+    Observations are stored as packed frames under "frames" (with their
+    "state_dim") when they fit the traffic state layout, otherwise as float32
+    under "states". load_states() reads either form.
+    """
+    states = np.asarray(states, dtype=np.float32)
+    try:
+        codec = ObservationCodec.for_traffic_state(states.shape[1])
+        arrays["frames"] = codec.encode(states)
+        arrays["state_dim"] = codec.state_dim
+    except ValueError:
+        arrays["states"] = states
+    np.savez_compressed(path, **arrays)
+
+
+def load_states(path):
+    """
+    Load an .npz written by save_states() (or an older float32 "states" file).
+
+    Returns:
+        dict: Every array in the file, with "states" decoded to float32
+            [n, state_dim]
+    """
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    if "frames" in arrays:
+        codec = ObservationCodec.for_traffic_state(int(arrays.pop("state_dim")))
+        arrays["states"] = codec.decode(arrays.pop("frames"))
+    return arrays
@@ -0,0 +1,168 @@
+"""
+Background Batch Prefetching for DQN Training
+
+DQNAgent.train() normally runs three stages strictly in sequence:
+
+    sample PER batch → convert to tensors → forward / backward / optimizer step
+
+Sampling and conversion only depend on the replay buffer, so they can run on
+a worker thread while the previous gradient step is computed. PyTorch
+releases the GIL inside its kernels, so the two overlap in practice.
+
+===================================================================================
+PIPELINE
+===================================================================================
+
+    main thread:   [ train k: get() → compute ]  env steps  [ train k+1: get() ...
+    worker thread:              [ sample + tensors for k+1 ] (wait for get())
+
+Queue depth is one batch: the worker prepares exactly one batch ahead and then
+blocks until the learner takes it.
+
+===================================================================================
+STALE PRIORITIES
+===================================================================================
+
+A prefetched batch is sampled before the env steps that precede its gradient
+step. Those steps may overwrite or invalidate sampled slots (ring wraparound,
+frame deduplication). Each batch therefore carries the slots' write
+generations (PrioritizedReplayBuffer.slot_generations()), and
+update_priorities(..., generations) drops entries whose slot changed since
+sampling. Priority updates are still applied in batch order on the main
+thread, so a newer TD error is never overwritten by an older one.
+
+Sampling priorities/IS weights lag by at most one update, as in distributed
+PER (Horgan et al., 2018).
+
+===================================================================================
+THREAD SAFETY
+===================================================================================
+
+The buffer itself is not thread-safe. The worker samples under the lock passed
+in by the agent, and the agent takes the same lock for add(),
+update_priorities() and save(). The lock is held only for sampling; tensor
+conversion happens outside it.
+
+===================================================================================
+"""
+
+import queue
+import threading
+
+import torch
+
+
+def batch_to_tensors(batch, weights, device):
+    """
+    Wrap a sampled batch as training tensors on device.
+
+    On CUDA the host arrays are copied into pinned memory first, so the
+    host-to-device copy can run asynchronously (non_blocking=True).
+
+    Args:
+        batch (tuple): (states, actions, rewards, next_states, dones, horizons)
+            arrays from PrioritizedReplayBuffer.sample()
+        weights (np.ndarray): Importance sampling weights
+        device (torch.device or str): Target device
+
+    Returns:
+        tuple: (states, actions, rewards, next_states, dones, horizons,
+            weights) tensors; actions and horizons as int64, dones and
+            weights as float32
+    """
+    pin = torch.device(device).type == "cuda"
+    states, actions, rewards, next_states, dones, horizons = batch
+
+    def convert(array):
+        tensor = torch.from_numpy(array)
+        if pin:
+            tensor = tensor.pin_memory()
+        return tensor.to(device, non_blocking=pin)
+
+    return (
+        convert(states),  # [batch, state_dim]
+        convert(actions).long(),  # [batch]
+        convert(rewards),  # [batch]
+        convert(next_states),  # [batch, state_dim]
+        convert(dones).float(),  # [batch]
+        convert(horizons).long(),  # [batch]
+        convert(weights).float(),  # [batch]
+    )
+
+
+class BatchPrefetcher:
+    """
+    Samples the next PER batch on a worker thread while the learner computes.
+
+    Usage:
+        prefetcher = BatchPrefetcher(memory, lock, batch_size=64, device=device)
+        tensors, indices, generations = prefetcher.get()
+        ...
+        with lock:
+            memory.update_priorities(indices, td_errors, generations)
+        prefetcher.close()
+
+    Attributes:
+        memory (PrioritizedReplayBuffer): Buffer to sample from
+        lock (threading.Lock): Lock shared with every other buffer user
+        batch_size (int): Transitions per batch
+        device (torch.device): Where tensors are placed
+    """
+
+    def __init__(self, memory, lock, batch_size, device):
+        self.memory = memory
+        self.lock = lock
+        self.batch_size = batch_size
+        self.device = device
+
+        self._ready = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="BatchPrefetcher", daemon=True
+        )
+        self._thread.start()
+
+    def _prepare(self):
+        with self.lock:
+            batch, indices, weights = self.memory.sample(self.batch_size)
+            generations = self.memory.slot_generations(indices)
+        return batch_to_tensors(batch, weights, self.device), indices, generations
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                item = self._prepare()
+            except Exception as error:  # Surface in get() on the main thread
+                item = error
+            while not self._stop.is_set():
+                try:
+                    self._ready.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if isinstance(item, Exception):
+                return
+
+    def get(self):
+        """
+        Take the prepared batch and let the worker start on the next one.
+
+        Returns:
+            tuple: (tensors, indices, generations)
+                tensors: output of batch_to_tensors()
+                indices: tree indices for update_priorities()
+                generations: slot generations for update_priorities()
+        """
+        item = self._ready.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        """Stop the worker thread and drop any prepared batch."""
+        self._stop.set()
+        try:
+            self._ready.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join()
@@ -1,4 +1,4 @@
-"""
+r"""
 Prioritized Experience Replay (PER) Buffer for Deep Reinforcement Learning
 
 This module implements a Prioritized Experience Replay buffer that stores and samples
@@ -75,7 +75,11 @@ Solution: Importance Sampling Weights
 
 Weight Normalization:
     w_i = w_i / max_j(w_j)
-    
+
+    max_j over the whole buffer is reached by the smallest priority, so
+        w_i = (p_i / p_min)^(-β)
+    with p_min read from a companion min tree in O(1).
+
     Ensures weights ≤ 1.0 (only down-weight, never up-weight)
 
 Loss with IS Weights:
@@ -128,6 +132,12 @@ Operations:
         - Update leaf priority
         - Propagate change up tree
 
+    Batched variants (used by PrioritizedReplayBuffer):
+        - get_batch(): all batch values descend the tree together,
+          one NumPy step per tree level
+        - update_batch(): write all leaves, then rebuild only the affected
+          ancestors, one NumPy step per tree level
+
 Sampling Algorithm:
     1. Generate random value s ∈ [0, total_priority]
     2. Start at root node
@@ -212,6 +222,8 @@ Buffer Size: 50,000 experiences
     - Large enough for diverse traffic scenarios
     - Small enough for frequent sampling of important events
     - Typical DQN uses 100K-1M, we use 50K for traffic specificity
+    - MemmapPrioritizedReplayBuffer keeps 10M+ on disk
+      (DRLConfig.REPLAY_BACKEND = "memmap", MEMMAP_BUFFER_SIZE)
 
 Alpha (α = 0.6): Prioritization exponent
     - Balances prioritization vs diversity
@@ -232,13 +244,16 @@ Epsilon (ε = 0.01): Small constant
 ===================================================================================
 """
 
+import json
+import os
 import numpy as np
 import random
 from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.observation_codec import ObservationCodec
 
 
 class SumTree:
-    """
+    r"""
     Binary Sum Tree for O(log n) Prioritized Sampling
     
     Efficient data structure for storing priorities and sampling experiences
@@ -260,7 +275,7 @@ class SumTree:
                   /      \       /      \
               [P=30]  [P=30] [P=20]  [P=20]  ← Leaf nodes (experiences)
                  ↓       ↓      ↓       ↓
-               exp0    exp1   exp2    exp3   ← Stored experiences
+                 0       1      2       3    ← Data indices (storage rows)
                
     Array Layout (2*capacity - 1 = 7 elements):
         Index:  [0,   1,    2,    3,   4,   5,   6]
@@ -279,24 +294,38 @@ class SumTree:
         2. Traverse tree from root:
             - If s ≤ left_sum: go left
             - Else: go right, s -= left_sum
-        3. Reach leaf node → return corresponding experience
+        3. Reach leaf node → return corresponding data index
         
+    Storage:
+        The tree only holds priorities. Transitions live in the replay
+        buffer's preallocated column arrays, addressed by the data index
+        that add() returns and get()/get_batch() report.
+        
+    Min Tree:
+        A companion array with the same layout keeps min(children) in every
+        internal node, so min_tree[0] is the smallest positive priority.
+        Zero-priority (empty / invalidated) leaves are stored as +inf and
+        never count. It is maintained in the same update() / update_batch()
+        passes as the sums.
+
     Complexity:
         - Insert: O(log n) - one path from leaf to root
         - Update: O(log n) - one path from leaf to root
         - Sample: O(log n) - one path from root to leaf
         - Total: O(1) - stored at root
+        - Min priority: O(1) - stored at min_tree root
         
     Usage:
         tree = SumTree(capacity=1000)
         
-        # Add experience with priority
-        tree.add(priority=5.0, data=(state, action, reward, next_state, done))
+        # Reserve a slot with priority, then write the transition there
+        data_idx = tree.add(priority=5.0)
+        states[data_idx] = state
         
         # Sample proportional to priority
         total = tree.total()
         random_value = np.random.uniform(0, total)
-        idx, priority, experience = tree.get(random_value)
+        idx, priority, data_idx = tree.get(random_value)
         
         # Update priority after training
         new_priority = 10.0
@@ -305,16 +334,16 @@ class SumTree:
     Attributes:
         capacity (int): Maximum number of experiences
         tree (np.ndarray): Binary tree storing priority sums [2*capacity - 1]
-        data (np.ndarray): Array storing experiences [capacity]
+        min_tree (np.ndarray): Same layout, minimum positive priority per subtree
         write_index (int): Next position to write (circular buffer)
         n_entries (int): Current number of stored experiences
     """
 
-    def __init__(self, capacity):
+    def __init__(self, capacity, tree=None, min_tree=None, rebuild_interval=None):
         """
         Initialize Sum Tree with given capacity.
 
-        Creates binary tree structure and data storage for experiences.
+        Creates binary tree structure for experience priorities.
         Tree size is 2*capacity - 1 to accommodate all internal and leaf nodes.
 
         Args:
@@ -322,32 +351,53 @@ class SumTree:
                 Typical values: 10,000 - 1,000,000
                 For traffic: 50,000 (DRLConfig.BUFFER_SIZE)
 
+            tree (np.ndarray, optional): Preallocated zeroed float64 or
+                float32 storage of length 2*capacity - 1, e.g. an np.memmap;
+                its dtype becomes the tree's dtype
+                Default: None (allocate float64 in memory)
+
+            min_tree (np.ndarray, optional): Preallocated storage for the
+                min tree, same shape; filled with +inf here
+                Default: None (allocate in memory)
+
+            rebuild_interval (int, optional): Call rebuild() after this many
+                update() or update_batch() calls to cancel accumulated
+                rounding drift
+                (see drift())
+                Default: None (never; float64 drift is negligible)
+
         Tree Initialization:
             - tree array: All zeros initially (no priorities)
-            - data array: Object dtype to store arbitrary experience tuples
             - write_index: 0 (start writing at beginning)
             - n_entries: 0 (no experiences yet)
 
         Memory Usage:
-            - tree: (2*capacity - 1) * 8 bytes (float64)
-            - data: capacity * ~200 bytes (experience tuples)
-            - Total: For capacity=50,000 → ~12 MB
+            - tree: (2*capacity - 1) * 8 bytes (float64), 4 bytes (float32)
+            - For capacity=50,000 → ~0.8 MB (float64), ~0.4 MB (float32)
 
         Example:
             # Create tree for 1000 experiences
             tree = SumTree(capacity=1000)
             print(len(tree.tree))  # 1999 (2*1000 - 1)
-            print(len(tree.data))  # 1000
             print(tree.total())    # 0.0 (no priorities yet)
         """
         self.capacity = capacity
-        self.tree = np.zeros(2 * capacity - 1)
-        self.data = np.zeros(capacity, dtype=object)
+        self.tree = np.zeros(2 * capacity - 1) if tree is None else tree
+        if min_tree is None:
+            min_tree = np.empty(2 * capacity - 1, dtype=self.tree.dtype)
+        self.min_tree = min_tree
+        self.min_tree[:] = np.inf
         self.write_index = 0
         self.n_entries = 0
 
+        # Drift bookkeeping (see drift())
+        self.rebuild_interval = rebuild_interval
+        self.updates_since_rebuild = 0
+        self.peak_total = 0.0
+        self.rebuilds = 0
+
     def _propagate(self, idx, change):
-        """
+        r"""
         Propagate priority change up the tree to maintain sum property.
         
         When a leaf node's priority changes, all ancestor nodes must be
@@ -415,7 +465,7 @@ class SumTree:
             self._propagate(parent, change)
 
     def _retrieve(self, idx, s):
-        """
+        r"""
         Retrieve experience by traversing tree based on cumulative priority.
         
         Implements proportional sampling: given a random value s in [0, total],
@@ -441,7 +491,7 @@ class SumTree:
         Returns:
             int: Tree index of selected leaf node
                 Range: [capacity-1, 2*capacity-2]
-                Corresponds to an experience in data array
+                Corresponds to a row in the buffer's storage arrays
                 
         Complexity: O(log n)
             - One comparison per tree level
@@ -543,20 +593,20 @@ class SumTree:
         """
         return self.tree[0]
 
-    def add(self, priority, data):
+    def add(self, priority):
         """
-        Add new experience to buffer with given priority.
+        Reserve the next slot (circular buffer) with given priority.
 
-        Inserts experience at next available position (circular buffer)
-        and sets its priority in the tree. Automatically overwrites
-        oldest experience when buffer is full.
+        Sets the priority of the slot at write_index and returns its data
+        index, where the caller stores the transition. Automatically
+        overwrites the oldest slot when the buffer is full.
 
         Process:
             1. Calculate tree index for current write position
-            2. Store experience data
-            3. Update priority in tree (triggers propagation)
-            4. Increment write index (circular)
-            5. Update entry count (up to capacity)
+            2. Update priority in tree (triggers propagation)
+            3. Increment write index (circular)
+            4. Update entry count (up to capacity)
+            5. Return data index of the written slot
 
         Args:
             priority (float): Priority value for this experience
@@ -564,10 +614,8 @@ class SumTree:
                 Range: [0, ∞) but usually [0.01, 100]
                 Higher priority → sampled more frequently
 
-            data: Experience tuple to store
-                Typically: (state, action, reward, next_state, done)
-                Can be any Python object
-                Stored in data array at write_index
+        Returns:
+            int: Data index of the slot (row in the buffer's storage arrays)
 
         Circular Buffer Behavior:
             - write_index wraps around at capacity
@@ -578,13 +626,13 @@ class SumTree:
             tree = SumTree(capacity=3)
 
             # Add experiences
-            tree.add(5.0, ("state1", 0, -1.0, "state2", False))
-            tree.add(10.0, ("state2", 1, 0.5, "state3", False))
-            tree.add(2.0, ("state3", 2, 1.0, "state4", True))
+            tree.add(5.0)   # → 0
+            tree.add(10.0)  # → 1
+            tree.add(2.0)   # → 2
             # Buffer full: [exp1, exp2, exp3]
 
             # Add fourth experience (overwrites first)
-            tree.add(8.0, ("state4", 0, -0.5, "state5", False))
+            tree.add(8.0)   # → 0
             # Buffer now: [exp4, exp2, exp3]
 
         Priority Setting:
@@ -603,14 +651,15 @@ class SumTree:
             - Thread-unsafe (external synchronization needed for parallel updates)
             - Does not check for duplicate experiences
         """
-        idx = self.write_index + self.capacity - 1
-        self.data[self.write_index] = data
-        self.update(idx, priority)
+        data_idx = self.write_index
+        self.update(data_idx + self.capacity - 1, priority)
 
         self.write_index = (self.write_index + 1) % self.capacity
         if self.n_entries < self.capacity:
             self.n_entries += 1
 
+        return data_idx
+
     def update(self, idx, priority):
         """
         Update priority of existing experience in tree.
@@ -643,10 +692,10 @@ class SumTree:
 
         Example:
             # Initial state
-            tree.add(10.0, experience)  # High priority (bad prediction)
+            data_idx = tree.add(10.0)  # High priority (bad prediction)
 
             # Sample and train
-            idx, priority, exp = tree.get(random_value)
+            idx, priority, data_idx = tree.get(random_value)
             # ... train on experience ...
             new_TD_error = 0.5  # Much better prediction now!
 
@@ -668,10 +717,41 @@ class SumTree:
             - Prevents over-sampling of "learned" experiences
             - Enables continual re-prioritization
             - Must use tree index (not data index)
+            - The change is taken from the leaf as stored, so a float32 tree
+              propagates exactly the rounded leaf value
+            - Every rebuild_interval update() / update_batch() calls the
+              tree is rebuilt from its leaves
         """
-        change = priority - self.tree[idx]
+        old_priority = float(self.tree[idx])
         self.tree[idx] = priority
-        self._propagate(idx, change)
+        self._propagate(idx, float(self.tree[idx]) - old_priority)
+
+        # Min tree: recompute along the path until a node stops changing
+        self.min_tree[idx] = priority if priority > 0 else np.inf
+        while idx > 0:
+            idx = (idx - 1) // 2
+            node_min = min(self.min_tree[2 * idx + 1], self.min_tree[2 * idx + 2])
+            if node_min == self.min_tree[idx]:
+                break
+            self.min_tree[idx] = node_min
+
+        self._count_write()
+
+    def _count_write(self):
+        """Drift bookkeeping after update() / update_batch() (see drift())."""
+        self.updates_since_rebuild += 1
+        self.peak_total = max(self.peak_total, float(self.tree[0]))
+        if self.updates_since_rebuild == self.rebuild_interval:
+            self.rebuild()
+
+    def min_priority(self):
+        """
+        Smallest positive leaf priority (O(1)).
+
+        Returns:
+            float: min over non-empty leaves, +inf if the tree is empty
+        """
+        return self.min_tree[0]
 
     def get(self, s):
         """
@@ -687,7 +767,7 @@ class SumTree:
                 Typically: np.random.uniform(0, tree.total())
 
         Returns:
-            tuple: (tree_idx, priority, experience_data)
+            tuple: (tree_idx, priority, data_idx)
 
             tree_idx (int): Tree index of selected leaf
                 Range: [capacity-1, 2*capacity-2]
@@ -696,32 +776,31 @@ class SumTree:
             priority (float): Priority of selected experience
                 Useful for importance sampling weight calculation
 
-            experience_data: Stored experience tuple
-                Typically: (state, action, reward, next_state, done)
-                Ready for training
+            data_idx (int): Row of the experience in the storage arrays
+                Range: [0, capacity-1]
 
         Sampling Process:
             1. Call _retrieve() to traverse tree
             2. Get tree index of selected leaf
             3. Convert tree index to data index
-            4. Return (tree_idx, priority, data)
+            4. Return (tree_idx, priority, data_idx)
 
         Example:
             tree = SumTree(4)
-            tree.add(30, exp1)
-            tree.add(30, exp2)
-            tree.add(20, exp3)
-            tree.add(20, exp4)
+            tree.add(30)
+            tree.add(30)
+            tree.add(20)
+            tree.add(20)
             # Total priority = 100
 
             # Sample experience
             s = np.random.uniform(0, 100)  # e.g., s = 65
-            tree_idx, priority, experience = tree.get(s)
+            tree_idx, priority, data_idx = tree.get(s)
 
             # Result (for s=65):
             # tree_idx = 5 (leaf for exp3)
             # priority = 20
-            # experience = exp3
+            # data_idx = 2
 
         Sampling Distribution:
             P(exp_i) = priority_i / total_priority
@@ -736,8 +815,8 @@ class SumTree:
             # Sample batch
             for i in range(batch_size):
                 s = np.random.uniform(0, tree.total())
-                tree_idx, priority, experience = tree.get(s)
-                batch.append(experience)
+                tree_idx, priority, data_idx = tree.get(s)
+                rows.append(data_idx)
                 indices.append(tree_idx)
                 priorities.append(priority)
 
@@ -745,11 +824,242 @@ class SumTree:
             - Implements proportional sampling
             - No explicit probability calculation
             - O(log n) complexity
-            - Returns None if tree empty (no data at index)
         """
         idx = self._retrieve(0, s)
         data_idx = idx - self.capacity + 1
-        return (idx, self.tree[idx], self.data[data_idx])
+        return (idx, self.tree[idx], data_idx)
+
+    def get_batch(self, values):
+        """
+        Vectorized counterpart of get() for a whole batch of cumulative values.
+
+        Instead of one recursive _retrieve() walk per sample, all values
+        descend the tree together, one level per iteration. Each iteration
+        is a handful of NumPy operations over the whole batch, so the Python
+        overhead is O(log n) per batch instead of O(batch_size × log n).
+
+        Level-by-Level Descent:
+            idx = [0, 0, ..., 0]                  ← Every value starts at root
+            repeat until every idx is a leaf:
+                left = 2*idx + 1
+                go_left = s <= tree[left]
+                idx = left        where go_left
+                idx = left + 1    elsewhere, and s -= tree[left]
+
+        Leaves can sit on two different depths when capacity is not a power
+        of two, so values that already reached a leaf are masked out while
+        the others keep descending.
+
+        Zero-Priority Guard:
+            An empty subtree (sum 0) is never entered. Floating point rounding
+            can push s slightly past the sum of the populated leaves; the
+            recursive version then lands on an empty slot. Here the descent
+            stays on the populated side. Whenever both children hold priority
+            the comparison is exactly the one used by _retrieve(), so results
+            are identical for the same input values.
+
+        Args:
+            values (np.ndarray): Cumulative priority values
+                Shape: (batch_size,)
+                Range: [0, total_priority]
+
+        Returns:
+            tuple: (tree_indices, priorities, data_indices)
+
+            tree_indices (np.ndarray): Tree indices of selected leaves [batch_size]
+            priorities (np.ndarray): Priorities of selected leaves [batch_size]
+            data_indices (np.ndarray): Storage rows of selected leaves [batch_size]
+
+        Example:
+            values = np.array([10.0, 65.0, 95.0])
+            tree_indices, priorities, data_indices = tree.get_batch(values)
+            # Same result as [tree.get(s) for s in values], in one pass
+
+        Complexity: O(batch_size × log n) NumPy work, O(log n) Python work
+        """
+        values = np.array(values, dtype=np.float64)
+        idx = np.zeros(len(values), dtype=np.int64)
+
+        # Levels above the shallowest leaf contain internal nodes only,
+        # so the whole batch can descend without masking
+        for _ in range(int(self.capacity).bit_length() - 1):
+            idx, values = self._descend(idx, values)
+
+        # Non power-of-two capacity: some values still sit on internal nodes
+        active = np.flatnonzero(idx < self.capacity - 1)
+        if len(active) > 0:
+            idx[active], values[active] = self._descend(idx[active], values[active])
+
+        data_idx = idx - self.capacity + 1
+        return idx, self.tree[idx], data_idx
+
+    def _descend(self, idx, values):
+        """
+        Move every (node, value) pair one level down the tree.
+
+        Goes left when s <= left_sum (as in _retrieve), never entering a
+        subtree whose sum is zero.
+        """
+        left = 2 * idx + 1
+        left_sum = self.tree[left]
+        right_sum = self.tree[left + 1]
+
+        go_left = (left_sum > 0) & ((values <= left_sum) | (right_sum <= 0))
+
+        return left + ~go_left, np.where(go_left, values, values - left_sum)
+
+    def update_batch(self, tree_indices, priorities):
+        """
+        Vectorized counterpart of update() for a batch of leaves.
+
+        Writes all leaf priorities at once, then rebuilds only the ancestors
+        of the touched leaves, one tree level per pass. Each ancestor is
+        recomputed from its two children (parent = left + right) rather than
+        incremented, so shared ancestors are written once per pass no matter
+        how many updated leaves sit below them.
+
+        Rebuild Process:
+            1. tree[leaves] = priorities   (last write wins for duplicates)
+            2. nodes = unique(parents(leaves))
+            3. tree[nodes] = tree[2*nodes + 1] + tree[2*nodes + 2]
+            4. nodes = unique(parents(nodes)), repeat until root rebuilt
+
+        Why Recompute Instead of Propagate?
+            - Duplicate indices in one batch cannot double-count a change
+            - No accumulated floating point drift from repeated += change
+            - One fancy-indexed assignment per level instead of one Python
+              call per (leaf, level) pair
+
+        Args:
+            tree_indices (array-like): Tree indices of leaves to update
+                Range: [capacity-1, 2*capacity-2]
+            priorities (array-like): New priority values, same length
+
+        Example:
+            tree.update_batch(indices, new_priorities)
+            # Equivalent to:
+            #   for idx, p in zip(indices, new_priorities):
+            #       tree.update(idx, p)
+
+        Complexity: O(batch_size × log n) NumPy work, O(log n) Python work
+
+        Notes:
+            - When capacity is not a power of two, leaves sit on two depths.
+              A node may then be rebuilt in an early pass before all of its
+              children are final; it is rebuilt again in a later pass once
+              the deeper path reaches it, so the final sums are exact.
+        """
+        tree_indices = np.asarray(tree_indices, dtype=np.int64)
+        priorities = np.asarray(priorities, dtype=self.tree.dtype)
+        if len(tree_indices) == 0:
+            return
+
+        # Keep the last occurrence of duplicated indices (sequential semantics)
+        reversed_indices = tree_indices[::-1]
+        nodes, first_in_reversed = np.unique(reversed_indices, return_index=True)
+        leaf_priorities = priorities[::-1][first_in_reversed]
+        self.tree[nodes] = leaf_priorities
+        self.min_tree[nodes] = np.where(leaf_priorities > 0, leaf_priorities, np.inf)
+
+        # nodes is sorted, and parent() is monotonic, so every level stays
+        # sorted and duplicates are always adjacent (no re-sorting needed)
+        while nodes[-1] > 0:
+            nodes = (nodes[nodes > 0] - 1) // 2
+            nodes = nodes[np.concatenate(([True], nodes[1:] != nodes[:-1]))]
+            left = 2 * nodes + 1
+            self.tree[nodes] = self.tree[left] + self.tree[left + 1]
+            self.min_tree[nodes] = np.minimum(self.min_tree[left], self.min_tree[left + 1])
+
+        self._count_write()
+
+    def rebuild(self):
+        """
+        Recompute every internal node (sums and minima) from the leaf priorities.
+
+        Walks the internal levels bottom-up with one vectorized sum per
+        level; children of level d are either leaves or level d+1 nodes,
+        which are already final. O(n) total.
+
+        Used after restoring leaves from a snapshot, where internal nodes
+        on disk may be stale, and every rebuild_interval update() /
+        update_batch() calls to discard the drift of incremental += change propagation.
+        """
+        n_internal = self.capacity - 1
+        leaves = self.tree[n_internal:]
+        self.min_tree[n_internal:] = np.where(leaves > 0, leaves, np.inf)
+        _fill_internal(self.tree, self.capacity, np.add)
+        _fill_internal(self.min_tree, self.capacity, np.minimum)
+
+        self.updates_since_rebuild = 0
+        self.peak_total = float(self.tree[0])
+        self.rebuilds += 1
+
+    def drift(self):
+        """
+        Compare the stored sums with exact float64 sums of the stored leaves.
+
+        Error Bound:
+            With unit roundoff u (2^-24 for float32, 2^-53 for float64),
+            tree depth d = ceil(log2(capacity)) and K update() /
+            update_batch() calls since the last rebuild():
+
+                |tree[0] - exact_total| <= (d + 2K) * u * peak_total
+
+            where peak_total is the largest stored total since the rebuild.
+            Rebuilding and update_batch() round once per level (d terms);
+            each update() rounds the += change once per ancestor, and
+            its change is exact because it is taken from the stored leaf
+            (at most 2 terms per call, counting the rounding of the
+            sum being updated). The same bound holds for every internal
+            node with its own subtree total; rebuild_interval caps K.
+
+        Complexity: O(n); for diagnostics, not the training hot path
+
+        Returns:
+            dict: root, exact_root, root_abs_error, root_rel_error,
+                max_node_rel_error, error_bound, updates_since_rebuild,
+                rebuilds
+        """
+        exact = self.tree.astype(np.float64)
+        _fill_internal(exact, self.capacity, np.add)
+        internal = slice(0, self.capacity - 1)
+        node_error = np.abs(self.tree[internal] - exact[internal])
+        scale = np.where(exact[internal] > 0, exact[internal], 1.0)
+
+        root = float(self.tree[0])
+        root_abs_error = abs(root - exact[0])
+        depth = int(self.capacity - 1).bit_length()
+        unit_roundoff = np.finfo(self.tree.dtype).eps / 2
+        return {
+            "root": root,
+            "exact_root": float(exact[0]),
+            "root_abs_error": float(root_abs_error),
+            "root_rel_error": float(root_abs_error / exact[0]) if exact[0] > 0 else 0.0,
+            "max_node_rel_error": float((node_error / scale).max(initial=0.0)),
+            "error_bound": float(
+                (depth + 2 * self.updates_since_rebuild)
+                * unit_roundoff
+                * max(self.peak_total, root)
+            ),
+            "updates_since_rebuild": self.updates_since_rebuild,
+            "rebuilds": self.rebuilds,
+        }
+
+
+def _fill_internal(tree, capacity, combine):
+    """
+    Recompute internal nodes of a heap-ordered tree from its leaves in place.
+
+    combine is np.add for sums or np.minimum for minima. Levels are walked
+    bottom-up with one vectorized combine per level.
+    """
+    n_internal = capacity - 1
+    for depth in reversed(range(int(capacity).bit_length())):
+        lo = 2**depth - 1
+        hi = min(2 ** (depth + 1) - 1, n_internal)
+        if lo >= hi:
+            continue
+        tree[lo:hi] = combine(tree[2 * lo + 1 : 2 * hi : 2], tree[2 * lo + 2 : 2 * hi + 1 : 2])
 
 
 class PrioritizedReplayBuffer:
@@ -838,27 +1148,163 @@ class PrioritizedReplayBuffer:
             - Requires importance sampling correction
             - ~2x faster convergence empirically
 
+    Storage Layout (struct of arrays):
+        Transitions are not kept as Python tuples. Each field is a
+        preallocated, contiguous column indexed by the SumTree data index:
+
+            observations float32 [capacity, state_dim]   128 bytes (dim=32)
+            actions      int8    [capacity]                1 byte
+            rewards      float32 [capacity]                4 bytes
+            dones        bool    [capacity]                1 byte
+            event_codes  int8    [capacity]                1 byte
+            valid        bool    [capacity]                1 byte
+            generations  uint32  [capacity]                4 bytes
+                                                         ─────────
+                                                         140 bytes/transition
+
+        Per-row columns also cover the reservoir rows (see below).
+
+        With DRLConfig.PACK_OBSERVATIONS each observation is stored as a
+        28-byte uint8 frame (26 bit-packed binary flags + 6 float32 values,
+        see observation_codec.py) instead of 128 bytes: 40 bytes/transition
+        and ~2 MB for the default capacity. _gather() decodes batches back
+        to identical float32 values.
+
+        A batch is gathered with one fancy-indexing operation per column,
+        producing contiguous arrays that torch.from_numpy() wraps without
+        any per-sample Python objects.
+
+    Frame-Indexed Observations (next-state deduplication):
+        In the training loop next_state of step t is exactly state of step
+        t+1, so each observation is stored once. Slot i describes
+
+            s  = observations[i]
+            s' = observations[(i + 1) % capacity]
+
+        Within an episode consecutive transitions occupy consecutive slots:
+
+            slot:          i      i+1     i+2     i+3 (write_index)
+            observation:   s_t    s_t+1   s_t+2   s_t+3   ← pending s'
+            transition:    t      t+1     t+2     (not yet valid)
+
+        The slot at write_index always holds the newest next_state and has
+        priority 0 until the following transition is written there.
+
+        Episode Boundaries:
+            add() checks whether the incoming state equals the pending
+            frame. If not (new episode, truncated episode, reordering), the
+            pending frame is kept as the terminal s' of the previous slot,
+            its own slot stays invalid (priority 0), and the new state is
+            written to the next slot. One slot per episode (~1 in 3600) is
+            spent on this.
+
+        Wraparound:
+            Writing s' into observations[i+1] overwrites the oldest
+            transition's state, so that slot is invalidated (priority 0,
+            valid=False) in the same step. Slots are never sampled with a
+            missing or foreign frame, and at most capacity - 1 transitions
+            are live at any time.
+
+    Protected Reservoir (priority-aware eviction):
+        FIFO wraparound would evict a 10x safety_violation transition on the
+        same schedule as a routine Continue step. Rows [capacity, n_rows)
+        form a reservoir of reservoir_size entries that sit in the same
+        SumTree and are sampled like any other row:
+
+            rows:  0 ........... capacity-1 | capacity ... n_rows-1
+                   frame-indexed ring       | reservoir (own s and s')
+
+        When a ring slot is about to be overwritten and holds a protected
+        transition (event type in DRLConfig.RESERVOIR_EVENTS, or priority
+        before the event multiplier >= RESERVOIR_PRIORITY_FRACTION ×
+        max_priority if set), it is copied
+        into the reservoir with its current priority (_retain()). Once the
+        reservoir is full, reservoir sampling decides which entry it
+        replaces. Each eviction costs O(log n): one or two tree updates.
+
+        Budget: DRLConfig.RESERVOIR_SIZE = 2,500 (~5% of BUFFER_SIZE,
+        ~0.7 MB) instead of growing BUFFER_SIZE to keep rare events.
+
+    Event-Stratified Sampling (optional):
+        Event multipliers only raise a rare transition's share of the
+        global total, so a batch may still contain none. With
+        DRLConfig.EVENT_QUOTAS each stratum in EVENT_STRATA
+        (safety_violation, bus_conflict, sync, normal) gets its own SumTree
+        over the same rows (zero outside the stratum), kept in sync by every
+        priority write, and sample() draws a fixed share of the batch from
+        each. Costs one extra sum + min tree per stratum (~1.7 MB each at
+        the default capacity); the sub-trees are rebuilt on load(), not
+        saved.
+
     Memory Usage:
-        Capacity 50,000:
-            - SumTree: ~12 MB
-            - Experiences: ~10 MB (depends on state size)
-            - Total: ~22 MB
+        Capacity 50,000 (+ 2,500 reservoir):
+            - SumTree (sum + min): ~1.7 MB (32 bytes/transition),
+              ~0.8 MB with DRLConfig.SUM_TREE_DTYPE = "float32"
+            - Transitions: ~7.0 MB (140 bytes/transition)
+            - Reservoir: ~0.7 MB (~270 bytes/entry)
+            - Total: ~9.4 MB
+
+        Half the observation memory of storing (s, s') per slot, so the RAM
+        that held 50,000 transitions now holds about twice as many.
 
     Attributes:
         tree (SumTree): Binary tree for efficient sampling
         capacity (int): Maximum buffer size (50,000)
+        state_dim (int): Observation size (32)
+        observations, actions, rewards, dones, valid (np.ndarray): Storage columns
+        generations (np.ndarray): Per-slot write counter (stale-update check)
+        priority_versions (np.ndarray): Per-row count of update_priorities()
+            writes (lets reprioritize() skip rows refreshed meanwhile)
+        columns (dict): Allocated array name → row offset, including "tree"
+        event_codes (np.ndarray): Index into EVENT_TYPES per row
+        reservoir_observations (np.ndarray): (s, s') of reservoir entries
+        n_rows (int): capacity + reservoir_size (SumTree leaves)
+        write_index (int): Slot receiving the next transition (holds pending s')
+        n_entries (int): Number of valid (sampleable) transitions
         epsilon (float): Small constant for priority (0.01)
         alpha (float): Prioritization exponent (0.6)
         beta (float): Importance sampling exponent (0.4 → 1.0)
         beta_increment (float): Annealing step size
+        max_priority (float): Largest base priority seen (max-priority inserts)
     """
 
-    def __init__(self, capacity=DRLConfig.BUFFER_SIZE):
+    SNAPSHOT_SEGMENT = 4096  # Rows per incremental-save unit
+    SNAPSHOT_SLOTS = 2  # Alternating snapshot copies per save() directory
+
+    # reprioritize() rebuilds the trees in O(n) instead of batched leaf
+    # updates once it replaces at least this fraction of all rows
+    REPRIORITIZE_REBUILD_FRACTION = 0.5
+
+    # Traffic-specific priority multipliers (see _get_priority())
+    EVENT_MULTIPLIERS = {
+        "pedestrian_phase": 5.0,
+        "bus_conflict": 4.0,
+        "sync_success": 3.0,
+        "sync_failure": 6.0,
+        "safety_violation": 10.0,
+        "normal": 1.0,
+    }
+    EVENT_TYPES = tuple(EVENT_MULTIPLIERS)  # event_codes column values
+
+    # Sampling strata for DRLConfig.EVENT_QUOTAS (see sample())
+    EVENT_STRATA = {
+        "safety_violation": ("safety_violation",),
+        "bus_conflict": ("bus_conflict",),
+        "sync": ("sync_success", "sync_failure"),
+        "normal": ("normal", "pedestrian_phase"),
+    }
+
+    def __init__(
+        self,
+        capacity=DRLConfig.BUFFER_SIZE,
+        state_dim=DRLConfig.STATE_DIM,
+        reservoir_size=DRLConfig.RESERVOIR_SIZE,
+    ):
         """
         Initialize Prioritized Replay Buffer.
 
-        Creates SumTree backend and sets hyperparameters for prioritization
-        and importance sampling correction.
+        Creates SumTree backend, preallocates the transition columns and sets
+        hyperparameters for prioritization and importance sampling correction.
 
         Args:
             capacity (int, optional): Maximum buffer size
@@ -866,6 +1312,12 @@ class PrioritizedReplayBuffer:
                 Range: 1,000 - 1,000,000 typical
                 Larger = more diverse experiences but slower sampling
 
+            state_dim (int, optional): Observation size
+                Default: DRLConfig.STATE_DIM (32)
+
+            reservoir_size (int, optional): Protected reservoir budget
+                Default: DRLConfig.RESERVOIR_SIZE (2,500); 0 disables it
+
         Hyperparameters Set:
             epsilon (ε = 0.01):
                 Small constant added to priorities
@@ -900,13 +1352,149 @@ class PrioritizedReplayBuffer:
             print(f"Alpha: {buffer.alpha}")
             print(f"Beta: {buffer.beta}")
         """
-        self.tree = SumTree(capacity)
         self.capacity = capacity
+        self.state_dim = state_dim
+        self.reservoir_size = reservoir_size
+        self.n_rows = capacity + reservoir_size
+        self.columns = {}
+
+        # Rows [0, capacity) are the ring, [capacity, n_rows) the reservoir
+        n_rows = self.n_rows
+        tree_dtype = np.dtype(DRLConfig.SUM_TREE_DTYPE)
+        self.tree = SumTree(
+            n_rows,
+            self._allocate("tree", (2 * n_rows - 1,), tree_dtype, 1 - n_rows),
+            self._allocate("min_tree", (2 * n_rows - 1,), tree_dtype, 1 - n_rows),
+            rebuild_interval=(
+                DRLConfig.SUM_TREE_REBUILD_INTERVAL if tree_dtype == np.float32 else None
+            ),
+        )
+        # Observations are stored as frames: float32 rows, or packed uint8
+        # rows with DRLConfig.PACK_OBSERVATIONS (see _encode() / _gather())
+        self.codec = (
+            ObservationCodec.for_traffic_state(state_dim)
+            if DRLConfig.PACK_OBSERVATIONS
+            else None
+        )
+        if self.codec is None:
+            frame_width, frame_dtype = state_dim, np.float32
+        else:
+            frame_width, frame_dtype = self.codec.frame_bytes, np.uint8
+        self.observations = self._allocate(
+            "observations", (capacity, frame_width), frame_dtype
+        )
+        self.reservoir_observations = self._allocate(
+            "reservoir_observations",
+            (reservoir_size, 2, frame_width),
+            frame_dtype,
+            capacity,
+        )
+        self.actions = self._allocate("actions", (n_rows,), np.int8)
+        self.rewards = self._allocate("rewards", (n_rows,), np.float32)
+        self.dones = self._allocate("dones", (n_rows,), np.bool_)
+        self.event_codes = self._allocate("event_codes", (n_rows,), np.int8)
+        self.valid = self._allocate("valid", (n_rows,), np.bool_)
+        self.generations = self._allocate("generations", (n_rows,), np.uint32)
+        # Transient (not saved): only compared within one re-prioritisation sweep
+        self.priority_versions = self._allocate_transient(
+            "priority_versions", (n_rows,), np.uint32
+        )
+
+        self.write_index = 0
+        self.n_entries = 0
+        self.has_pending_frame = False
+
+        # Protected reservoir (see _retain())
+        self.protected_codes = np.array(
+            [event in DRLConfig.RESERVOIR_EVENTS for event in self.EVENT_TYPES]
+        )
+        self.event_multipliers = np.array(
+            [self.EVENT_MULTIPLIERS[event] for event in self.EVENT_TYPES]
+        )
+        self.reservoir_priority_fraction = DRLConfig.RESERVOIR_PRIORITY_FRACTION
+        self.reservoir_count = 0
+        self.reservoir_seen = 0
+        self._reservoir_rng = np.random.default_rng(0)  # Reproducible runs
+
+        # Per-stratum sub-trees for quota sampling (see sample())
+        self.event_quotas = self._stratum_quotas(DRLConfig.EVENT_QUOTAS)
+        stratum_of = {
+            event: stratum
+            for stratum, events in enumerate(self.EVENT_STRATA.values())
+            for event in events
+        }
+        self.stratum_codes = np.array([stratum_of[event] for event in self.EVENT_TYPES])
+        self.stratum_trees = []
+        if self.event_quotas is not None:
+            # Rebuilt from the tree's leaves by load(), so never saved
+            self.stratum_trees = [
+                SumTree(
+                    n_rows,
+                    self._allocate_transient(
+                        f"stratum_{stratum}_tree", (2 * n_rows - 1,), tree_dtype
+                    ),
+                    self._allocate_transient(
+                        f"stratum_{stratum}_min_tree", (2 * n_rows - 1,), tree_dtype
+                    ),
+                    rebuild_interval=self.tree.rebuild_interval,
+                )
+                for stratum in self.EVENT_STRATA
+            ]
+
+        # Segments written since each snapshot slot was last saved (see save())
+        n_segments = -(-n_rows // self.SNAPSHOT_SEGMENT)
+        self._dirty = np.ones((n_segments, self.SNAPSHOT_SLOTS), dtype=np.bool_)
+        self._slot_dirs = [None] * self.SNAPSHOT_SLOTS
+
+        # n-step targets are assembled at sampling time (see _n_step())
+        self.n_step = DRLConfig.N_STEP
+        self.gamma = DRLConfig.GAMMA
+
         self.epsilon = DRLConfig.EPSILON_PER
         self.alpha = DRLConfig.ALPHA
         self.beta = DRLConfig.BETA_START
         self.beta_increment = (1.0 - DRLConfig.BETA_START) / DRLConfig.BETA_FRAMES
 
+        # Largest (|error| + ε)^α seen, used for td_error=None inserts
+        self.max_priority = 1.0
+
+    def _allocate(self, name, shape, dtype, row_offset=0):
+        """
+        Allocate one zeroed storage column and register it under name.
+
+        Subclasses override this to place columns elsewhere (see
+        MemmapPrioritizedReplayBuffer); everything else addresses columns
+        through the attributes it returns.
+
+        row_offset maps buffer rows to column positions (position = row -
+        row_offset), which save() uses to copy only dirty segments.
+        """
+        self.columns[name] = row_offset
+        return np.zeros(shape, dtype=dtype)
+
+    def _allocate_transient(self, name, shape, dtype):
+        """
+        Allocate zeroed per-row scratch storage that is not saved.
+
+        MemmapPrioritizedReplayBuffer places it in files as well, so no
+        array sized by the capacity stays resident.
+        """
+        return np.zeros(shape, dtype=dtype)
+
+    def leaf_index(self, row):
+        """Tree index of a buffer row."""
+        return row + self.tree.capacity - 1
+
+    def row_index(self, tree_index):
+        """Buffer row of a tree (leaf) index."""
+        return tree_index - self.tree.capacity + 1
+
+    def _column(self, name):
+        """Return the array registered under name by _allocate()."""
+        if name in ("tree", "min_tree"):
+            return getattr(self.tree, name)
+        return getattr(self, name)
+
     def _get_priority(self, error, event_type="normal"):
         """
         Calculate priority with traffic-specific multipliers.
@@ -925,10 +1513,12 @@ class PrioritizedReplayBuffer:
             multiplier: Traffic-specific importance factor
 
         Args:
-            error (float): TD error magnitude
+            error (float or None): TD error magnitude
                 Typically: |Q_target - Q_current|
                 Range: [0, ∞) but usually [0, 50]
                 Large error = bad prediction = high priority
+                None: use max_priority instead of (|error| + ε)^α
+                      ("max priority on insert", Schaul et al.)
 
             event_type (str, optional): Event classification
                 Default: 'normal'
@@ -1003,19 +1593,14 @@ class PrioritizedReplayBuffer:
             - Multipliers hand-tuned for traffic control domain
             - Could be learned adaptively (future work)
         """
-        priority = (abs(error) + self.epsilon) ** self.alpha
+        if error is None:
+            priority = self.max_priority
+        else:
+            priority = (abs(error) + self.epsilon) ** self.alpha
+            self.max_priority = max(self.max_priority, priority)
 
         # Traffic-specific priority multipliers
-        multipliers = {
-            "pedestrian_phase": 5.0,
-            "bus_conflict": 4.0,
-            "sync_success": 3.0,
-            "sync_failure": 6.0,
-            "safety_violation": 10.0,
-            "normal": 1.0,
-        }
-
-        return priority * multipliers.get(event_type, 1.0)
+        return priority * self.EVENT_MULTIPLIERS.get(event_type, 1.0)
 
     def add(
         self, state, action, reward, next_state, done, td_error, event_type="normal"
@@ -1029,13 +1614,13 @@ class PrioritizedReplayBuffer:
 
         Storage Process:
             1. Calculate priority from TD error and event type
-            2. Package experience as tuple
-            3. Add to SumTree with priority
-            4. Automatically overwrites oldest if buffer full
+            2. Write the transition at write_index (see _write())
+            3. Set the slot's priority in the SumTree
+            4. Automatically evicts oldest if buffer full
 
         Args:
             state (np.ndarray): Current traffic state
-                Shape: (45,) for two-intersection system
+                Shape: (state_dim,) = (32,) for two-intersection system
                 Normalized features in [0, 1]
 
             action (int): Action taken
@@ -1047,23 +1632,27 @@ class PrioritizedReplayBuffer:
                 Clipped for stability
 
             next_state (np.ndarray): Resulting state
-                Shape: (45,)
+                Shape: (state_dim,)
                 State after action execution
 
             done (bool): Episode termination flag
                 True if episode ended
                 False if episode continues
 
-            td_error (float): Temporal Difference error
+            td_error (float or None): Temporal Difference error
                 |Q_target - Q_current|
                 Measures prediction error magnitude
                 Used for priority calculation
+                None inserts at max_priority (before the event multiplier)
 
             event_type (str, optional): Event classification
                 Default: 'normal'
                 Used for priority multiplier
                 Options: see _get_priority() for full list
 
+        Returns:
+            int: Slot (data index) the transition was written to
+
         Example:
             # Store routine decision
             buffer.add(
@@ -1119,8 +1708,225 @@ class PrioritizedReplayBuffer:
             - Experiences never deleted, only overwritten
         """
         priority = self._get_priority(td_error, event_type)
-        experience = (state, action, reward, next_state, done)
-        self.tree.add(priority, experience)
+        data_idx = self._write(state, action, reward, next_state, done)
+        self.event_codes[data_idx] = self.event_code(event_type)
+        self._set_priority(data_idx, priority)
+        return data_idx
+
+    def add_batch(
+        self, states, actions, rewards, next_states, dones, td_errors, event_codes
+    ):
+        """
+        Vectorized counterpart of add() for a batch of transitions (columns).
+
+        Frames are still written one transition at a time (_write() decides
+        per transition whether it continues the pending episode), but the
+        priorities are computed in one vectorized pass and written with one
+        update_batch() per tree instead of one update() per row.
+
+        Args:
+            states, next_states (np.ndarray): Observations [n, state_dim]
+            actions, rewards, dones (np.ndarray): Transition fields [n]
+            td_errors (np.ndarray): TD errors [n]; NaN inserts that row at
+                max_priority as of its position (td_error=None in add())
+            event_codes (np.ndarray): Indices into EVENT_TYPES [n]
+                (see event_code())
+
+        Returns:
+            np.ndarray: Slot (data index) of every transition, in order
+        """
+        n = len(actions)
+        # Longer batches would evict their own first rows before those have
+        # a priority (which _retain() copies into the reservoir)
+        chunk = max(self.capacity // 2 - 1, 1)
+        if n > chunk:
+            columns = (states, actions, rewards, next_states, dones)
+            columns += (td_errors, event_codes)
+            return np.concatenate(
+                [
+                    self.add_batch(*(c[start : start + chunk] for c in columns))
+                    for start in range(0, n, chunk)
+                ]
+            )
+
+        slots = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            slots[i] = self._write(
+                states[i], actions[i], rewards[i], next_states[i], dones[i]
+            )
+        event_codes = np.asarray(event_codes, dtype=self.event_codes.dtype)
+        self.event_codes[slots] = event_codes
+
+        errors = np.abs(np.asarray(td_errors, dtype=np.float64))
+        scored = ~np.isnan(errors)
+        priorities = np.full(n, self.max_priority)
+        priorities[scored] = (errors[scored] + self.epsilon) ** self.alpha
+        # Unscored rows get the max priority as of their position in the batch
+        priorities = np.where(scored, priorities, np.maximum.accumulate(priorities))
+        if n > 0:
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+        priorities = priorities * self.event_multipliers[event_codes]
+        self._set_priorities(slots, priorities)
+        return slots
+
+    def _set_priority(self, row, priority):
+        """Write one row's priority to the tree and its stratum sub-tree."""
+        leaf = self.leaf_index(row)
+        self.tree.update(leaf, priority)
+        if self.stratum_trees:
+            self.stratum_trees[self.stratum_codes[self.event_codes[row]]].update(
+                leaf, priority
+            )
+
+    def _stratum_quotas(self, quotas):
+        """
+        Validate DRLConfig.EVENT_QUOTAS as a per-stratum array (or None).
+
+        Raises:
+            ValueError: For unknown strata or quotas outside [0, 1] in total
+        """
+        if not quotas:
+            return None
+        unknown = set(quotas) - set(self.EVENT_STRATA)
+        if unknown:
+            raise ValueError(
+                f"Unknown event strata {sorted(unknown)}; "
+                f"expected {list(self.EVENT_STRATA)}"
+            )
+        fractions = np.array([quotas.get(name, 0.0) for name in self.EVENT_STRATA])
+        if (fractions < 0).any() or fractions.sum() > 1:
+            raise ValueError(f"Event quotas must be >= 0 and sum to <= 1, got {quotas}")
+        return fractions
+
+    def event_code(self, event_type):
+        """
+        Index into EVENT_TYPES, as stored in event_codes and taken by add_batch().
+
+        Unknown types are stored as 'normal'.
+        """
+        if event_type in self.EVENT_MULTIPLIERS:
+            return self.EVENT_TYPES.index(event_type)
+        return self.EVENT_TYPES.index("normal")
+
+    def _encode(self, state):
+        """Observation as stored in the frame columns (packed if codec is set)."""
+        if self.codec is None:
+            return state
+        return self.codec.encode(state)
+
+    def _write(self, state, action, reward, next_state, done):
+        """
+        Write one transition into the frame-indexed ring.
+
+        Continuing an episode (state equals the pending frame), only
+        next_state is copied. Otherwise the pending frame is left in place
+        as the previous episode's terminal s', and state starts a new
+        segment one slot further on.
+
+        Args:
+            state, action, reward, next_state, done: Transition fields
+
+        Returns:
+            int: Slot (data index) of the new transition, priority not yet set
+        """
+        state, next_state = self._encode(state), self._encode(next_state)
+        cursor = self.write_index
+        continues = self.has_pending_frame and np.array_equal(
+            self.observations[cursor], state
+        )
+
+        if not continues:
+            if self.has_pending_frame:
+                # Keep the terminal frame; its slot stays invalid
+                cursor = (cursor + 1) % self.capacity
+            self._invalidate(cursor)
+            self.observations[cursor] = state
+
+        next_slot = (cursor + 1) % self.capacity
+        self._dirty[cursor // self.SNAPSHOT_SEGMENT] = True
+        self._dirty[next_slot // self.SNAPSHOT_SEGMENT] = True
+        # next_state overwrites the state of whatever transition lives there
+        self._invalidate(next_slot)
+        self.observations[next_slot] = next_state
+
+        self.actions[cursor] = action
+        self.rewards[cursor] = reward
+        self.dones[cursor] = done
+        self.valid[cursor] = True
+        self.generations[cursor] += 1
+        self.n_entries += 1
+
+        self.write_index = next_slot
+        self.has_pending_frame = True
+        return cursor
+
+    def _invalidate(self, slot):
+        """
+        Remove a slot from sampling (priority 0) if it holds a transition.
+
+        Ring slots holding protected transitions are first copied into the
+        reservoir (see _retain()).
+        """
+        if self.valid[slot]:
+            if slot < self.capacity and self._is_protected(slot):
+                self._retain(slot)
+            self._dirty[slot // self.SNAPSHOT_SEGMENT] = True
+            self.valid[slot] = False
+            self.n_entries -= 1
+            self._set_priority(slot, 0.0)
+
+    def _is_protected(self, slot):
+        """
+        Rare event type, or priority within RESERVOIR_PRIORITY_FRACTION of max.
+
+        max_priority is (|e| + ε)^α before the event multiplier, so the leaf
+        is divided by the slot's multiplier to compare on the same scale.
+        """
+        if self.reservoir_size == 0:
+            return False
+        code = self.event_codes[slot]
+        if self.protected_codes[code]:
+            return True
+        fraction = self.reservoir_priority_fraction
+        if fraction is None:
+            return False
+        priority = self.tree.tree[self.leaf_index(slot)] / self.event_multipliers[code]
+        return priority >= fraction * self.max_priority
+
+    def _retain(self, slot):
+        """
+        Copy a protected ring transition into the reservoir before eviction.
+
+        Reservoir sampling (Vitter's Algorithm R) over every protected
+        transition evicted so far: the k-th candidate replaces a random
+        reservoir entry with probability reservoir_size / k, so the
+        reservoir stays a uniform sample of protected history. The
+        transition keeps its current priority. O(log n) (one tree update).
+        """
+        self.reservoir_seen += 1
+        if self.reservoir_count < self.reservoir_size:
+            entry = self.reservoir_count
+            self.reservoir_count += 1
+        else:
+            entry = int(self._reservoir_rng.integers(self.reservoir_seen))
+            if entry >= self.reservoir_size:
+                return
+            self._invalidate(self.capacity + entry)
+
+        row = self.capacity + entry
+        self.reservoir_observations[entry, 0] = self.observations[slot]
+        self.reservoir_observations[entry, 1] = self.observations[
+            (slot + 1) % self.capacity
+        ]
+        self.actions[row] = self.actions[slot]
+        self.rewards[row] = self.rewards[slot]
+        self.dones[row] = self.dones[slot]
+        self.event_codes[row] = self.event_codes[slot]
+        self.valid[row] = True
+        self.generations[row] += 1
+        self.n_entries += 1
+        self._dirty[row // self.SNAPSHOT_SEGMENT] = True
+        self._set_priority(row, self.tree.tree[self.leaf_index(slot)])
 
     def sample(self, batch_size):
         """
@@ -1137,7 +1943,7 @@ class PrioritizedReplayBuffer:
                 b. Retrieve experience from SumTree
                 c. Record index and priority
             3. Compute importance sampling weights
-            4. Normalize weights by maximum
+            4. Normalize by the buffer-wide maximum weight (min priority)
             5. Anneal beta toward 1.0
 
         Args:
@@ -1149,12 +1955,15 @@ class PrioritizedReplayBuffer:
         Returns:
             tuple: (batch, indices, weights)
 
-            batch (list): Sampled experiences
-                Length: batch_size
-                Format: [(s, a, r, s', done), ...]
-                Ready for training
+            batch (tuple): Sampled experiences as column arrays
+                Format: (states, actions, rewards, next_states, dones, horizons)
+                Shapes: [B, state_dim], [B], [B], [B, state_dim], [B], [B]
+                Dtypes: float32, int8, float32, float32, bool, uint8
+                rewards are n-step returns bootstrapped from next_states
+                after horizons steps (all 1 with DRLConfig.N_STEP = 1)
+                Ready for torch.from_numpy()
 
-            indices (list): Tree indices of sampled experiences
+            indices (np.ndarray): Tree indices of sampled experiences
                 Length: batch_size
                 Format: [tree_idx, ...]
                 Used for update_priorities() after training
@@ -1168,11 +1977,16 @@ class PrioritizedReplayBuffer:
             For each sampled experience i:
                 P(i) = priority_i / total_priority
                 w_i = (N · P(i))^(-β)
-                w_i = w_i / max_j(w_j)  # Normalize
+                w_i = w_i / max_j(w_j)  # Normalize over the whole buffer
+                    = (priority_i / priority_min)^(-β)
 
             Where:
                 N = current buffer size
                 β = current beta value (annealed)
+                priority_min = SumTree.min_priority(), O(1)
+
+            Normalizing by the buffer-wide maximum (not the batch maximum)
+            keeps the weight scale identical across batches.
 
         Segment Sampling:
             Ensures coverage across priority range:
@@ -1188,12 +2002,12 @@ class PrioritizedReplayBuffer:
             if len(buffer) >= 32:
                 batch, indices, weights = buffer.sample(32)
 
-                # Unpack batch
-                states, actions, rewards, next_states, dones = zip(*batch)
+                # Unpack batch (already contiguous column arrays)
+                states, actions, rewards, next_states, dones, horizons = batch
 
-                # Convert to tensors
-                states = torch.FloatTensor(states)
-                actions = torch.LongTensor(actions)
+                # Wrap as tensors (no per-sample conversion)
+                states = torch.from_numpy(states)
+                actions = torch.from_numpy(actions).long()
                 # ...
 
                 # Compute loss with IS weights
@@ -1226,39 +2040,178 @@ class PrioritizedReplayBuffer:
             Low priority (p=1): Sampled rarely, large weight (w≈1.0)
 
         Notes:
-            - Proportional sampling via SumTree (O(log n) per sample)
+            - Proportional sampling via SumTree.get_batch() (one vectorized
+              descent for the whole batch)
             - Importance sampling removes bias from prioritization
             - Beta annealing balances speed vs accuracy
             - Normalized weights ensure stable training
-            - None experiences skipped (data integrity check)
+            - Empty slots are never returned (zero-priority guard in get_batch)
+            - With DRLConfig.EVENT_QUOTAS, rare event strata get a guaranteed
+              share of every batch (see _sample_stratified())
         """
-        batch = []
-        indices = []
-        priorities = []
-        segment = self.tree.total() / batch_size
-
         # Anneal beta
         self.beta = min(1.0, self.beta + self.beta_increment)
 
-        for i in range(batch_size):
-            a = segment * i
-            b = segment * (i + 1)
-            s = random.uniform(a, b)
+        if self.event_quotas is not None:
+            indices, weights, rows = self._sample_stratified(batch_size)
+            return self._gather(rows), indices, weights
 
-            idx, priority, data = self.tree.get(s)
-            if data is not None:
-                batch.append(data)
-                indices.append(idx)
-                priorities.append(priority)
+        # All segments descend the tree together
+        indices, priorities, rows = self._draw(self.tree, batch_size)
+        batch = self._gather(rows)
 
-        # Calculate importance sampling weights
-        sampling_probs = np.array(priorities) / self.tree.total()
-        weights = np.power(self.tree.n_entries * sampling_probs, -self.beta)
-        weights /= weights.max()
+        # Importance sampling weights, normalized by the largest weight in
+        # the buffer: (N·P(i))^-β / (N·P_min)^-β = (p_i / p_min)^-β
+        weights = np.power(priorities / self.tree.min_priority(), -self.beta)
 
         return batch, indices, weights
 
-    def update_priorities(self, indices, errors):
+    def _draw(self, tree, n):
+        """
+        Proportional draw of n leaves from tree, one per equal-mass segment.
+
+        Returns:
+            tuple: (tree_indices, priorities, rows) as from SumTree.get_batch()
+        """
+        segment = tree.total() / n
+
+        # One stratified value per segment: s_i ~ U[segment·i, segment·(i+1)).
+        # Uniforms come from the `random` module and are combined exactly like
+        # random.uniform(a, b) = a + (b - a)·u, so a fixed random.seed() yields
+        # the same samples as the former per-element loop.
+        lower = segment * np.arange(n)
+        upper = segment * np.arange(1, n + 1)
+        uniforms = np.array([random.random() for _ in range(n)])
+        values = lower + (upper - lower) * uniforms
+
+        return tree.get_batch(values)
+
+    def _sample_stratified(self, batch_size):
+        """
+        Draw a batch with guaranteed per-stratum shares (DRLConfig.EVENT_QUOTAS).
+
+        Each stratum with quota q > 0 and at least one live row contributes
+        max(1, floor(q × batch_size)) rows, drawn proportionally from its own
+        sub-tree; the remaining n_0 rows are drawn from the full tree. A row
+        of stratum k with priority p is therefore drawn with probability
+
+            P(i) = p · (n_0 / T + n_k / T_k) / batch_size
+
+        (T: total priority, T_k: stratum total). IS weights use this P(i) and
+        are normalized by the smallest P over the buffer, min_k p_min,k × c_k,
+        from the sub-trees' min trees. Cost: one get_batch() per stratum.
+
+        Returns:
+            tuple: (tree_indices, weights, rows)
+        """
+        totals = np.array([tree.total() for tree in self.stratum_trees], dtype=np.float64)
+        counts = np.zeros(len(totals), dtype=np.int64)
+        remaining = batch_size
+        for stratum, (quota, total) in enumerate(zip(self.event_quotas, totals)):
+            if quota > 0 and total > 0:
+                counts[stratum] = min(remaining, max(1, int(quota * batch_size)))
+                remaining -= counts[stratum]
+
+        parts = [
+            self._draw(tree, n)
+            for tree, n in zip(self.stratum_trees, counts)
+            if n > 0
+        ]
+        if remaining > 0:
+            parts.append(self._draw(self.tree, remaining))
+        indices, priorities, rows = (np.concatenate(column) for column in zip(*parts))
+
+        # Sampling rate per unit priority of each stratum (c_k above)
+        scale = remaining / self.tree.total() + np.divide(
+            counts, totals, out=np.zeros(len(totals)), where=totals > 0
+        )
+        min_priorities = np.array([tree.min_priority() for tree in self.stratum_trees])
+        reachable = (scale > 0) & np.isfinite(min_priorities)
+        min_probability = (min_priorities[reachable] * scale[reachable]).min()
+
+        probability = priorities * scale[self.stratum_codes[self.event_codes[rows]]]
+        weights = np.power(probability / min_probability, -self.beta)
+        return indices, weights, rows
+
+    def _gather(self, rows):
+        """
+        Gather a batch of transitions from the storage columns.
+
+        One fancy-indexing operation per column; each result is a fresh
+        contiguous array that can be handed to torch.from_numpy() directly.
+
+        Args:
+            rows (np.ndarray): Data indices from SumTree.get_batch()
+
+        Returns:
+            tuple: (states, actions, rewards, next_states, dones, horizons)
+                rewards, next_states, dones and horizons describe the
+                n-step target (see _n_step()); with n_step = 1 they are
+                the stored transition and horizons are all 1
+        """
+        in_ring = rows < self.capacity
+        rewards, dones, horizons = self._n_step(rows, in_ring)
+        states = self.observations[np.where(in_ring, rows, 0)]
+        next_states = self.observations[
+            np.where(in_ring, (rows + horizons) % self.capacity, 0)
+        ]
+        if not in_ring.all():
+            entries = rows[~in_ring] - self.capacity
+            states[~in_ring] = self.reservoir_observations[entries, 0]
+            next_states[~in_ring] = self.reservoir_observations[entries, 1]
+        if self.codec is not None:
+            states = self.codec.decode(states)
+            next_states = self.codec.decode(next_states)
+        return (
+            states,
+            self.actions[rows],
+            rewards,
+            next_states,
+            dones,
+            horizons,
+        )
+
+    def _n_step(self, rows, in_ring):
+        """
+        n-step returns read straight from the frame-indexed ring.
+
+        Consecutive valid ring slots are consecutive steps of one episode
+        (slot i+1's state is slot i's next_state), so the n-step target of
+        slot i needs no extra storage:
+
+            R_i = r_i + γ·r_(i+1) + ... + γ^(m-1)·r_(i+m-1)
+            s'  = observations[(i + m) % capacity]
+            target = R_i + γ^m · max_a Q(s', a) · (1 - done)
+
+        The horizon m ≤ n_step stops early at a terminal step, at an
+        invalid slot (episode boundary, or the pending frame at
+        write_index for the newest transitions) and is 1 for reservoir rows,
+        which only keep their own (s, s').
+
+        Returns:
+            tuple: (returns float32, dones bool, horizons uint8)
+        """
+        rewards = self.rewards[rows]
+        dones = self.dones[rows]
+        horizons = np.ones(len(rows), dtype=np.uint8)
+        if self.n_step == 1:
+            return rewards, dones, horizons
+
+        extend = in_ring & ~dones
+        discount = 1.0
+        for step in range(1, self.n_step):
+            following = (rows + step) % self.capacity
+            extend &= self.valid[following]
+            if not extend.any():
+                break
+            discount *= self.gamma
+            rewards[extend] += discount * self.rewards[following[extend]]
+            dones[extend] = self.dones[following[extend]]
+            horizons[extend] += 1
+            extend &= ~dones
+        return rewards, dones, horizons
+
+    def update_priorities(self, indices, errors, generations=None):
         """
         Update priorities for sampled experiences after training.
 
@@ -1274,7 +2227,7 @@ class PrioritizedReplayBuffer:
                 4. Propagate change to root
 
         Args:
-            indices (list): Tree indices from sample()
+            indices (array-like): Tree indices from sample()
                 Length: batch_size
                 Format: [tree_idx, ...]
                 Must match order of errors
@@ -1284,12 +2237,20 @@ class PrioritizedReplayBuffer:
                 Format: [|Q_target - Q_current|, ...]
                 Absolute values (sign doesn't matter)
 
+            generations (np.ndarray, optional): slot_generations() captured
+                when the batch was sampled. Entries whose slot has since been
+                invalidated or rewritten are skipped, so a batch that was
+                sampled ahead of time (BatchPrefetcher) never assigns its TD
+                error to a different transition or revives an evicted slot.
+                Default: None (batch is fresh, update everything)
+
         Priority Recalculation:
             For each error:
                 new_priority = (|error| + ε)^α × event_multiplier
 
-            Note: Event type multiplier not reapplied (only TD error updated)
-            Assumption: Event type doesn't change
+            The multiplier comes from the row's stored event label
+            (event_codes), so a safety_violation keeps its 10x weight on
+            every replay, and stratum sub-trees (EVENT_QUOTAS) stay in sync.
 
         Example:
             # Sample and train
@@ -1340,8 +2301,8 @@ class PrioritizedReplayBuffer:
 
         Performance:
             - O(log n) per update (tree propagation)
-            - Batch update: O(batch_size × log n)
-            - For batch=32, n=50K: ~32 × 16 = 512 ops
+            - Batch update: O(batch_size × log n) via SumTree.update_batch()
+            - One vectorized pass per tree level (~16 for n=50K)
             - Negligible compared to neural network forward/backward
 
         Notes:
@@ -1349,19 +2310,334 @@ class PrioritizedReplayBuffer:
             - Must be called after every training step
             - Indices must match sampled batch order
             - Errors should be post-training TD errors
-            - Event type multipliers not reapplied (could be future feature)
         """
-        for idx, error in zip(indices, errors):
-            priority = self._get_priority(error)
-            self.tree.update(idx, priority)
+        indices = np.asarray(indices)
+        errors = np.abs(np.asarray(errors, dtype=np.float64))
+        rows = self.row_index(indices)
+        if generations is not None:
+            current = self.valid[rows] & (self.generations[rows] == generations)
+            indices, errors, rows = indices[current], errors[current], rows[current]
+        priorities = (errors + self.epsilon) ** self.alpha
+        if len(priorities) > 0:
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+        # Keep the event multiplier the transition was stored with
+        priorities = priorities * self.event_multipliers[self.event_codes[rows]]
+        self._set_priorities(rows, priorities)
+        self.priority_versions[rows] += 1
+        self._dirty[rows // self.SNAPSHOT_SEGMENT] = True
+
+    def _set_priorities(self, rows, priorities):
+        """Batched _set_priority(): tree and stratum sub-trees via update_batch()."""
+        indices = self.leaf_index(rows)
+        self.tree.update_batch(indices, priorities)
+        strata = self.stratum_codes[self.event_codes[rows]]
+        for stratum, tree in enumerate(self.stratum_trees):
+            in_stratum = strata == stratum
+            tree.update_batch(indices[in_stratum], priorities[in_stratum])
+
+    def reprioritize(self, rows, errors, generations, versions=None):
+        """
+        Replace the priorities of many rows at once (re-prioritisation sweep).
+
+        Same priority formula and stale-slot check as update_priorities().
+        A shard is written with batched leaf updates (O(shard · log n)); once
+        the rows cover REPRIORITIZE_REBUILD_FRACTION of the buffer, the
+        leaves are written directly and the tree (and stratum sub-trees) are
+        rebuilt in one O(n) vectorized pass instead, which also resets
+        float32 drift.
+
+        Args:
+            rows (np.ndarray): Buffer rows (not tree indices)
+            errors (np.ndarray): Fresh absolute TD errors
+            generations (np.ndarray): Slot generations captured when the rows
+                were read; rows rewritten since then are skipped
+            versions (np.ndarray, optional): priority_versions captured when
+                the rows were read; rows whose priority update_priorities()
+                refreshed since then keep that newer value
+
+        Returns:
+            int: Number of rows whose priority was replaced
+        """
+        rows = np.asarray(rows)
+        errors = np.abs(np.asarray(errors, dtype=np.float64))
+        current = self.valid[rows] & (self.generations[rows] == generations)
+        if versions is not None:
+            current &= self.priority_versions[rows] == versions
+        rows, errors = rows[current], errors[current]
+        if len(rows) == 0:
+            return 0
+        priorities = (errors + self.epsilon) ** self.alpha
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        priorities = priorities * self.event_multipliers[self.event_codes[rows]]
+        if len(rows) >= self.REPRIORITIZE_REBUILD_FRACTION * self.n_rows:
+            self.tree.tree[self.leaf_index(rows)] = priorities
+            self.tree.rebuild()
+            self._rebuild_strata()
+        else:
+            self._set_priorities(rows, priorities)
+        self._dirty[rows // self.SNAPSHOT_SEGMENT] = True
+        return len(rows)
+
+    def slot_generations(self, indices):
+        """
+        Return the write generation of the slots behind sampled tree indices.
+
+        Every write to a slot bumps its generation, so comparing a captured
+        copy against the current values tells whether the transition a
+        batch refers to is still the one stored there.
+        """
+        return self.generations[self.row_index(np.asarray(indices))].copy()
+
+    def save(self, directory, checkpoint=None):
+        """
+        Save the buffer as one .npy file per column plus state.json.
+
+        directory holds SNAPSHOT_SLOTS alternating copies (slot_0/, slot_1/);
+        each save() overwrites the older one, so the newest snapshot stays
+        intact while the next is written:
+
+            1. Delete the target slot's state.json (slot no longer loadable)
+            2. Copy the column segments into the slot's files and flush
+            3. Atomically write the slot's state.json (write_index,
+               n_entries, beta, ..., sequence number, checkpoint)
+
+        A save interrupted anywhere before step 3 leaves the previous
+        snapshot loadable.
+
+        Incremental: only SNAPSHOT_SEGMENT-row segments written since this
+        buffer last saved (or loaded) that slot are copied. A slot this
+        buffer has not written yet gets a full copy. For the tree only leaf
+        priorities are needed; internal nodes are recomputed by load().
+
+        Args:
+            directory (str): Snapshot directory (e.g. models/training_<ts>/replay)
+            checkpoint (dict, optional): JSON-serialisable tag of what this
+                snapshot belongs to (e.g. episode and step of an agent
+                checkpoint); load(directory, checkpoint) only restores the
+                slot saved with the same tag
+
+        Cost (capacity 50,000, one 3600-step episode between saves):
+            ~1-2 segments of observations per episode since the slot's last
+            save + whichever leaf segments update_priorities() touched,
+            instead of the full ~7 MB
+        """
+        states = self._slot_states(directory)
+        saved = [slot for slot, state in enumerate(states) if state is not None]
+        newest = max(saved, key=lambda slot: states[slot]["sequence"], default=None)
+        slot = 0 if newest is None else (newest + 1) % self.SNAPSHOT_SLOTS
+        sequence = 0 if newest is None else states[newest]["sequence"] + 1
+
+        slot_dir = os.path.join(directory, f"slot_{slot}")
+        os.makedirs(slot_dir, exist_ok=True)
+        state_path = os.path.join(slot_dir, "state.json")
+        if os.path.exists(state_path):
+            os.remove(state_path)
+
+        paths = {name: os.path.join(slot_dir, f"{name}.npy") for name in self.columns}
+        full = self._slot_dirs[slot] != os.path.abspath(slot_dir) or not all(
+            os.path.exists(path) for path in paths.values()
+        )
+        segments = (
+            np.arange(len(self._dirty))
+            if full
+            else np.flatnonzero(self._dirty[:, slot])
+        )
+
+        for name, path in paths.items():
+            column = self._column(name)
+            if full:
+                target = np.lib.format.open_memmap(
+                    path, mode="w+", dtype=column.dtype, shape=column.shape
+                )
+            else:
+                target = np.lib.format.open_memmap(path, mode="r+")
+            offset = self.columns[name]
+            for segment in segments:
+                first = segment * self.SNAPSHOT_SEGMENT
+                last = min(first + self.SNAPSHOT_SEGMENT, self.n_rows)
+                start = max(first - offset, 0)
+                stop = min(last - offset, len(column))
+                if start < stop:
+                    target[start:stop] = column[start:stop]
+            target.flush()
+            del target
+
+        self._write_state(slot_dir, sequence=sequence, checkpoint=checkpoint)
+        self._dirty[:, slot] = False
+        self._slot_dirs[slot] = os.path.abspath(slot_dir)
+
+    def load(self, directory, checkpoint=None):
+        """
+        Restore a snapshot written by save() into this buffer.
+
+        Picks the newest complete slot in directory, or with checkpoint the
+        slot saved with that tag. Column files are opened with
+        mmap_mode="r" and copied straight into the preallocated columns (no
+        parsing or decompression), then the tree's internal nodes are
+        rebuilt from the leaves. The snapshot files are never modified.
+
+        Args:
+            directory (str): Snapshot directory
+            checkpoint (dict, optional): Tag passed to save(); refuse to load
+                a snapshot saved with a different (or no) tag
+
+        Raises:
+            FileNotFoundError: If directory holds no complete snapshot
+            ValueError: If the snapshot capacity or state_dim differs, no
+                slot matches checkpoint, or its columns do not match
+                state.json
+        """
+        snapshot_dir, state, slot = self._find_snapshot(directory, checkpoint)
+        sources = {
+            name: np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode="r")
+            for name in self.columns
+        }
+        self._check_columns(snapshot_dir, state, sources["valid"])
+        for name, source in sources.items():
+            self._column(name)[:] = source
+        self.tree.rebuild()
+        self._rebuild_strata()
+        self._restore_state(state)
+        self._dirty[:] = True
+        self._slot_dirs = [None] * self.SNAPSHOT_SLOTS
+        if slot is not None:
+            self._dirty[:, slot] = False
+            self._slot_dirs[slot] = os.path.abspath(snapshot_dir)
+
+    def _slot_states(self, directory):
+        """state.json of every complete slot in directory (None if missing)."""
+        states = []
+        for slot in range(self.SNAPSHOT_SLOTS):
+            path = os.path.join(directory, f"slot_{slot}", "state.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    states.append(json.load(f))
+            else:
+                states.append(None)
+        return states
+
+    def _find_snapshot(self, directory, checkpoint):
+        """
+        Locate the snapshot load() restores.
+
+        Returns:
+            tuple: (directory holding the column files, validated state,
+                slot number or None for a single-copy snapshot with
+                state.json directly in directory, see
+                MemmapPrioritizedReplayBuffer.save())
+        """
+        if os.path.exists(os.path.join(directory, "state.json")):
+            snapshot_dir, slot = directory, None
+        else:
+            states = self._slot_states(directory)
+            candidates = [
+                slot
+                for slot, state in enumerate(states)
+                if state is not None
+                and (checkpoint is None or state.get("checkpoint") == checkpoint)
+            ]
+            if not candidates:
+                available = [state["checkpoint"] for state in states if state]
+                if not available:
+                    raise FileNotFoundError(f"No replay snapshot in {directory}")
+                raise ValueError(
+                    f"No replay snapshot for checkpoint {checkpoint} in "
+                    f"{directory} (it holds {available})"
+                )
+            slot = max(candidates, key=lambda slot: states[slot]["sequence"])
+            snapshot_dir = os.path.join(directory, f"slot_{slot}")
+
+        state = self._read_state(snapshot_dir)
+        if checkpoint is not None and state.get("checkpoint") != checkpoint:
+            raise ValueError(
+                f"Replay snapshot in {snapshot_dir} belongs to checkpoint "
+                f"{state.get('checkpoint')}, not {checkpoint}"
+            )
+        return snapshot_dir, state, slot
+
+    def _rebuild_strata(self):
+        """Refill the stratum sub-trees from the tree's leaves and event_codes."""
+        leaves = self.tree.tree[self.tree.capacity - 1 :]
+        strata = self.stratum_codes[self.event_codes]
+        for stratum, tree in enumerate(self.stratum_trees):
+            tree.tree[tree.capacity - 1 :] = np.where(strata == stratum, leaves, 0.0)
+            tree.rebuild()
+
+    def _write_state(self, directory, sequence=0, checkpoint=None):
+        state = {
+            "capacity": int(self.capacity),
+            "state_dim": int(self.state_dim),
+            "reservoir_size": int(self.reservoir_size),
+            "packed_observations": self.codec is not None,
+            "columns": list(self.columns),
+            "write_index": int(self.write_index),
+            "n_entries": int(self.n_entries),
+            "has_pending_frame": bool(self.has_pending_frame),
+            "beta": float(self.beta),
+            "max_priority": float(self.max_priority),
+            "reservoir_count": int(self.reservoir_count),
+            "reservoir_seen": int(self.reservoir_seen),
+            "sequence": sequence,
+            "checkpoint": checkpoint,
+        }
+        path = os.path.join(directory, "state.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _read_state(self, directory):
+        with open(os.path.join(directory, "state.json")) as f:
+            state = json.load(f)
+        layout = (
+            self.capacity,
+            self.state_dim,
+            self.reservoir_size,
+            self.codec is not None,
+        )
+        saved = (
+            state["capacity"],
+            state["state_dim"],
+            state.get("reservoir_size", 0),
+            state.get("packed_observations", False),
+        )
+        if saved != layout:
+            raise ValueError(
+                f"Replay snapshot in {directory} has (capacity, state_dim, "
+                f"reservoir_size, packed_observations) {saved}, buffer has {layout}"
+            )
+        return state
+
+    def _check_columns(self, directory, state, valid):
+        """Raise ValueError unless the snapshot's columns match its state.json."""
+        if state["columns"] != list(self.columns):
+            raise ValueError(
+                f"Replay snapshot in {directory} has columns {state['columns']}, "
+                f"buffer has {list(self.columns)}"
+            )
+        # Every valid row was counted by add()/_retain() (see _invalidate())
+        n_valid = int(np.count_nonzero(valid))
+        if n_valid != state["n_entries"]:
+            raise ValueError(
+                f"Replay snapshot in {directory} does not match its state.json: "
+                f"{n_valid} valid rows, {state['n_entries']} recorded"
+            )
+
+    def _restore_state(self, state):
+        self.write_index = state["write_index"]
+        self.n_entries = state["n_entries"]
+        self.has_pending_frame = state["has_pending_frame"]
+        self.beta = state["beta"]
+        self.max_priority = state.get("max_priority", 1.0)
+        self.reservoir_count = state.get("reservoir_count", 0)
+        self.reservoir_seen = state.get("reservoir_seen", 0)
 
     def __len__(self):
         """
         Get current number of stored experiences.
 
         Returns:
-            int: Number of experiences in buffer
-                Range: [0, capacity]
+            int: Number of valid (sampleable) experiences in buffer
+                Range: [0, capacity - 1]
                 Increases as experiences added
                 Saturates at capacity (circular buffer)
 
@@ -1391,4 +2667,166 @@ class PrioritizedReplayBuffer:
             - Used for sampling readiness check
             - O(1) operation
         """
-        return self.tree.n_entries
+        return self.n_entries
+
+
+class MemmapPrioritizedReplayBuffer(PrioritizedReplayBuffer):
+    """
+    Disk-backed Prioritized Replay Buffer for multi-million transition capacity.
+
+    Same add / sample / update_priorities API and sampling behaviour as
+    PrioritizedReplayBuffer, but every column (including the SumTree array)
+    lives in an .npy file opened with np.lib.format.open_memmap:
+
+        <directory>/
+            tree.npy                    float64 [2*n_rows - 1]  (SUM_TREE_DTYPE)
+            min_tree.npy                float64 [2*n_rows - 1]  (SUM_TREE_DTYPE)
+            observations.npy            float32 [capacity, state_dim]  (or packed)
+            reservoir_observations.npy  float32 [reservoir_size, 2, state_dim]
+            actions.npy                 int8    [n_rows]
+            rewards.npy                 float32 [n_rows]
+            dones.npy                   bool    [n_rows]
+            event_codes.npy             int8    [n_rows]
+            valid.npy                   bool    [n_rows]
+            generations.npy             uint32  [n_rows]
+
+    Per-row scratch arrays that are not saved (priority_versions.npy, the
+    EVENT_QUOTAS stratum trees, DQNAgent's target_cache_*.npy) are files in
+    the same directory, recreated empty by every new instance.
+
+    Files are created sparse, so disk usage grows with what has been written.
+    Resident memory is whatever the OS keeps in the page cache: pages touched
+    by recent writes and sampled rows stay hot, the rest can be evicted.
+
+    Capacity 10,000,000 (state_dim=32):
+        - SumTree (sum + min): ~320 MB, ~160 MB as float32
+        - Transitions: ~1.4 GB (140 bytes/transition)
+        - ~1 week of simulated traffic at one step per second, vs. ~14 hours
+          for the in-memory 50,000 default
+
+    Sampling:
+        Rows are gathered in ascending file order so each column is read
+        front-to-back (readahead-friendly), then restored to the sampled
+        order. Batches are returned as ordinary in-memory arrays.
+
+    Usage:
+        buffer = MemmapPrioritizedReplayBuffer(
+            capacity=10_000_000, directory="models/training_<ts>/replay_memmap"
+        )
+        buffer.add(state, action, reward, next_state, done, td_error)
+        batch, indices, weights = buffer.sample(64)
+        buffer.flush()
+
+    Attributes:
+        directory (str): Directory holding the column files
+    """
+
+    def __init__(
+        self,
+        capacity,
+        state_dim=DRLConfig.STATE_DIM,
+        directory="replay_buffer",
+        reservoir_size=DRLConfig.RESERVOIR_SIZE,
+    ):
+        """
+        Create the column files under directory and initialize the buffer.
+
+        If directory already holds a snapshot saved by this class
+        (state.json next to the column files), its columns are reopened
+        read-write and the snapshot is restored (see load()) instead of
+        being overwritten.
+
+        Args:
+            capacity (int): Maximum buffer size (e.g. DRLConfig.MEMMAP_BUFFER_SIZE)
+            state_dim (int, optional): Observation size
+            directory (str, optional): Where to create the column files
+            reservoir_size (int, optional): Protected reservoir budget
+
+        Raises:
+            ValueError: If a snapshot in directory has a different layout
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._reopen = os.path.exists(os.path.join(directory, "state.json"))
+        super().__init__(capacity, state_dim, reservoir_size)
+        if self._reopen:
+            self.load(directory)
+
+    def _allocate(self, name, shape, dtype, row_offset=0):
+        self.columns[name] = row_offset
+        path = os.path.join(self.directory, f"{name}.npy")
+        if not self._reopen:
+            return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        column = np.lib.format.open_memmap(path, mode="r+")
+        if column.shape != shape or column.dtype != dtype:
+            raise ValueError(
+                f"Replay column {path} is {column.dtype} {column.shape}, "
+                f"buffer needs {np.dtype(dtype)} {shape}"
+            )
+        return column
+
+    def _allocate_transient(self, name, shape, dtype):
+        path = os.path.join(self.directory, f"{name}.npy")
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    def _gather(self, rows):
+        order = np.argsort(rows, kind="stable")
+        restore = np.empty_like(order)
+        restore[order] = np.arange(len(order))
+        batch = super()._gather(rows[order])
+        return tuple(np.asarray(column[restore]) for column in batch)
+
+    def flush(self):
+        """Write dirty pages of every column back to its file."""
+        for name in self.columns:
+            self._column(name).flush()
+
+    def save(self, directory=None, checkpoint=None):
+        """
+        Snapshot the buffer.
+
+        The column files already hold the data, so saving to the buffer's
+        own directory (the default) only flushes dirty pages and writes
+        state.json next to them; the OS writes back just the pages touched
+        since the last flush. That snapshot is for reopening this buffer
+        (see __init__()); training keeps writing into the same files, so it
+        only matches state.json until the next add(). Any other directory
+        gets PrioritizedReplayBuffer.save()'s incremental copy into
+        alternating slots, which survives an interrupted save.
+        """
+        if directory is None or os.path.abspath(directory) == os.path.abspath(
+            self.directory
+        ):
+            self.flush()
+            self._write_state(self.directory, checkpoint=checkpoint)
+        else:
+            super().save(directory, checkpoint)
+
+    def load(self, directory, checkpoint=None):
+        """
+        Restore a snapshot into this buffer's column files.
+
+        For the buffer's own directory the open columns are re-read from
+        their files and checked against state.json. Any other snapshot is
+        copied into this buffer's files (PrioritizedReplayBuffer.load()),
+        never adopted, so later writes cannot modify it. The tree's internal
+        nodes are always rebuilt from the leaves, which on disk may be newer
+        than the internal nodes if the process stopped between flushes.
+
+        Raises:
+            FileNotFoundError: If directory holds no snapshot
+            ValueError: If the snapshot layout differs, it was saved with
+                another checkpoint tag, or its columns do not match state.json
+        """
+        if os.path.abspath(directory) != os.path.abspath(self.directory):
+            super().load(directory, checkpoint)
+            # Own state.json describes the copied columns from now on
+            self.save(checkpoint=checkpoint)
+            return
+        _, state, _ = self._find_snapshot(directory, checkpoint)
+        self._check_columns(directory, state, self.valid)
+        self.tree.rebuild()
+        self._rebuild_strata()
+        self._restore_state(state)
+        self._dirty[:] = True
+        self._slot_dirs = [None] * self.SNAPSHOT_SLOTS
@@ -0,0 +1,141 @@
+"""
+Replay-Ratio Scheduling for DQN Training
+
+train_drl_agent() calls DQNAgent.train() once every UPDATE_FREQUENCY env
+steps. One gradient step per call fixes the replay ratio (gradient updates
+per collected transition) at 1 / UPDATE_FREQUENCY, however much CPU the
+learner has to spare while SUMO is the bottleneck.
+
+With k gradient steps per call, train() samples one batch of
+k · BATCH_SIZE transitions and splits it into k mini-batches, so the
+per-call sampling overhead (tree descent, gather, tensor conversion) is
+paid once:
+
+    sample(k · BATCH_SIZE) → tensors → [step 1] [step 2] ... [step k]
+
+Mini-batch j is every k-th row of the sample (rows j, j + k, ...). The
+sample is drawn in cumulative-priority order, so each mini-batch covers all
+priority segments, i.e. the whole buffer, like a single BATCH_SIZE sample.
+
+===================================================================================
+CHOOSING k
+===================================================================================
+
+Fixed:     k = GRADIENT_STEPS
+
+Adaptive:  ADAPTIVE_GRADIENT_STEPS = True measures the wall time between
+           train() calls (env stepping) and the time of one gradient step,
+           both as exponential moving averages, and picks
+
+               k = clamp(floor(TRAIN_TIME_RATIO · env_time / step_time),
+                         1, MAX_GRADIENT_STEPS)
+
+           so learning takes at most TRAIN_TIME_RATIO × the env time it
+           accompanies. Slow simulation steps → more updates per call.
+
+===================================================================================
+"""
+
+import time
+
+
+class ReplayRatioScheduler:
+    """
+    Picks the gradient steps per train() call and tracks learner throughput.
+
+    Usage:
+        scheduler = ReplayRatioScheduler(gradient_steps=4)
+        k = scheduler.begin()
+        ...  # k gradient steps on k · batch_size samples
+        scheduler.end(k, k * batch_size)
+        scheduler.throughput()  # {"updates_per_sec": ..., "samples_per_sec": ...}
+
+    Attributes:
+        gradient_steps (int): k for fixed scheduling (and the adaptive start)
+        adaptive (bool): Adapt k to the measured env time
+        train_time_ratio (float): Adaptive: max train time / env time
+        max_steps (int): Adaptive upper bound on k
+        updates (int): Gradient steps since the last reset_stats()
+        samples (int): Transitions trained on since the last reset_stats()
+        train_seconds (float): Time inside train() since the last reset_stats()
+    """
+
+    SMOOTHING = 0.1  # EMA weight of the newest timing
+
+    def __init__(
+        self, gradient_steps=1, adaptive=False, train_time_ratio=1.0, max_steps=16
+    ):
+        if gradient_steps < 1:
+            raise ValueError(f"gradient_steps must be >= 1, got {gradient_steps}")
+        self.gradient_steps = gradient_steps
+        self.adaptive = adaptive
+        self.train_time_ratio = train_time_ratio
+        self.max_steps = max_steps
+
+        self.env_time = None  # EMA seconds between train() calls
+        self.step_time = None  # EMA seconds per gradient step
+        self._call_start = None
+        self._last_end = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Start a new throughput window (e.g. per episode)."""
+        self.updates = 0
+        self.samples = 0
+        self.train_seconds = 0.0
+        self._window_start = time.perf_counter()
+
+    def _smooth(self, average, value):
+        if average is None:
+            return value
+        return average + self.SMOOTHING * (value - average)
+
+    def begin(self):
+        """
+        Start a train() call.
+
+        Returns:
+            int: Gradient steps to run in this call
+        """
+        now = time.perf_counter()
+        if self._last_end is not None:
+            self.env_time = self._smooth(self.env_time, now - self._last_end)
+        self._call_start = now
+        return self.steps_per_call()
+
+    def steps_per_call(self):
+        """Current k: fixed, or from the measured env and step times."""
+        if not self.adaptive or self.env_time is None or self.step_time is None:
+            return self.gradient_steps
+        k = int(self.train_time_ratio * self.env_time / max(self.step_time, 1e-9))
+        return min(max(k, 1), self.max_steps)
+
+    def end(self, updates, samples):
+        """Finish a train() call that ran updates steps on samples transitions."""
+        now = time.perf_counter()
+        elapsed = now - self._call_start
+        if updates > 0:
+            self.step_time = self._smooth(self.step_time, elapsed / updates)
+        self._last_end = now
+
+        self.updates += updates
+        self.samples += samples
+        self.train_seconds += elapsed
+
+    def throughput(self):
+        """
+        Learner throughput since the last reset_stats().
+
+        Returns:
+            dict: updates_per_sec and samples_per_sec (per second spent in
+                train()), train_time_share (train() share of wall time) and
+                the current gradient_steps per call
+        """
+        wall = time.perf_counter() - self._window_start
+        busy = max(self.train_seconds, 1e-9)
+        return {
+            "updates_per_sec": self.updates / busy,
+            "samples_per_sec": self.samples / busy,
+            "train_time_share": self.train_seconds / wall if wall > 0 else 0.0,
+            "gradient_steps": self.steps_per_call(),
+        }
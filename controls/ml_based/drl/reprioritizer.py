@@ -0,0 +1,230 @@
+"""
+Background Re-Prioritisation of the Whole Replay Buffer
+
+update_priorities() only refreshes the priorities of sampled transitions.
+Everything else keeps the TD error it was stored with, computed by a network
+that may be thousands of updates old, so sampling is skewed towards
+transitions that merely *were* surprising.
+
+A sweep recomputes the TD errors of the whole buffer (or a rotating shard of
+it) with large batched forward passes on a worker thread, then replaces their
+priorities in one call (PrioritizedReplayBuffer.reprioritize(): batched leaf
+updates for a shard, one vectorized tree rebuild for most of the buffer).
+
+===================================================================================
+SCHEDULE
+===================================================================================
+
+    main thread:   train() ... train() [request()] train() ... train() [request()]
+    worker thread:                     [ sweep: chunk, sleep, chunk, ... apply ]
+
+DQNAgent.train() calls request() every REPRIORITIZE_INTERVAL gradient steps.
+If the worker is idle it gets a copy of the current policy and target
+weights and starts a sweep; if a sweep is still running the request is
+dropped (the next interval tries again). The worker only ever reads its own
+network copies, so the learner keeps training while a sweep runs.
+
+===================================================================================
+CPU BUDGET
+===================================================================================
+
+After each chunk of REPRIORITIZE_BATCH rows the worker sleeps long enough
+that its busy time stays at REPRIORITIZE_CPU_FRACTION of wall time:
+
+    sleep = chunk_time · (1 / fraction - 1)
+
+The replay lock is held only to read a chunk and, once per sweep, to apply
+the priorities, so the env loop never waits for a forward pass. Applying a
+shard costs O(shard · log n) under the lock, not a full O(n) rebuild.
+
+===================================================================================
+CONSISTENCY
+===================================================================================
+
+TD errors use the same Double DQN n-step target and clipping as train().
+Rows are read together with their slot generations and priority versions;
+when the priorities are applied, rows rewritten or evicted during the sweep
+are skipped, and so are rows whose priority train() refreshed meanwhile
+(update_priorities() bumps the version), since train()'s TD error comes
+from newer weights than the sweep's.
+
+===================================================================================
+"""
+
+import copy
+import threading
+import time
+
+import numpy as np
+import torch
+
+
+class BackgroundReprioritizer:
+    """
+    Recomputes replay priorities on a worker thread, one sweep per request().
+
+    Usage:
+        reprioritizer = BackgroundReprioritizer(
+            memory, lock, policy_net, target_net, discounts, device
+        )
+        reprioritizer.request(policy_net, target_net)   # from train()
+        ...
+        reprioritizer.close()
+
+    Attributes:
+        memory (PrioritizedReplayBuffer): Buffer to re-prioritise
+        lock (threading.Lock): Lock shared with every other buffer user
+        shard_size (int or None): Rows per sweep; None = whole buffer
+        batch_size (int): Rows per forward pass
+        cpu_fraction (float): Max busy share of wall time while sweeping
+        sweeps (int): Completed sweeps
+        rows_rescored (int): Priorities replaced so far
+        busy_seconds (float): Time spent reading and computing TD errors
+    """
+
+    def __init__(
+        self,
+        memory,
+        lock,
+        policy_net,
+        target_net,
+        discounts,
+        device,
+        shard_size=None,
+        batch_size=4096,
+        cpu_fraction=0.25,
+    ):
+        if not 0 < cpu_fraction <= 1:
+            raise ValueError(f"cpu_fraction must be in (0, 1], got {cpu_fraction}")
+        self.memory = memory
+        self.lock = lock
+        self.discounts = discounts
+        self.device = device
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+        self.cpu_fraction = cpu_fraction
+
+        # Private copies: the learner keeps updating its own networks
+        self.policy_net = copy.deepcopy(policy_net).eval()
+        self.target_net = copy.deepcopy(target_net).eval()
+
+        self.cursor = 0  # Next row of the rotating shard
+        self.sweeps = 0
+        self.rows_rescored = 0
+        self.busy_seconds = 0.0
+
+        self._idle = threading.Event()
+        self._idle.set()
+        self._requested = threading.Event()
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="BackgroundReprioritizer", daemon=True
+        )
+        self._thread.start()
+
+    def request(self, policy_net, target_net):
+        """
+        Start a sweep with the given weights unless one is already running.
+
+        Returns:
+            bool: True if a sweep was started
+
+        Raises:
+            Exception: The error that stopped the previous sweep, if any
+        """
+        if self._error is not None:
+            raise self._error
+        if not self._idle.is_set():
+            return False
+        self.policy_net.load_state_dict(policy_net.state_dict())
+        self.target_net.load_state_dict(target_net.state_dict())
+        self._idle.clear()
+        self._requested.set()
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._requested.wait(timeout=0.1):
+                continue
+            self._requested.clear()
+            try:
+                self._sweep()
+            except Exception as error:  # Surface in request() on the main thread
+                self._error = error
+                return
+            finally:
+                self._idle.set()
+
+    def _shard(self):
+        """Rows of this sweep: the whole buffer or the next rotating shard."""
+        n_rows = self.memory.n_rows
+        if self.shard_size is None or self.shard_size >= n_rows:
+            return np.arange(n_rows)
+        rows = (self.cursor + np.arange(self.shard_size)) % n_rows
+        self.cursor = (self.cursor + self.shard_size) % n_rows
+        return rows
+
+    def _sweep(self):
+        swept_rows, swept_errors, swept_generations, swept_versions = [], [], [], []
+        shard = self._shard()
+        for start in range(0, len(shard), self.batch_size):
+            if self._stop.is_set():
+                return
+            began = time.perf_counter()
+            candidates = shard[start : start + self.batch_size]
+            with self.lock:
+                rows = candidates[self.memory.valid[candidates]]
+                if len(rows) == 0:
+                    continue
+                batch = self.memory._gather(rows)
+                generations = self.memory.generations[rows].copy()
+                versions = self.memory.priority_versions[rows].copy()
+
+            swept_rows.append(rows)
+            swept_errors.append(self._td_errors(batch))
+            swept_generations.append(generations)
+            swept_versions.append(versions)
+
+            busy = time.perf_counter() - began
+            self.busy_seconds += busy
+            self._stop.wait(busy * (1 / self.cpu_fraction - 1))
+
+        if swept_rows:
+            with self.lock:
+                self.rows_rescored += self.memory.reprioritize(
+                    np.concatenate(swept_rows),
+                    np.concatenate(swept_errors),
+                    np.concatenate(swept_generations),
+                    np.concatenate(swept_versions),
+                )
+        self.sweeps += 1
+
+    def _td_errors(self, batch):
+        """|Double DQN n-step TD error| for a gathered batch, as in train()."""
+        states, actions, rewards, next_states, dones, horizons = batch
+        with torch.no_grad():
+            states = torch.from_numpy(states).to(self.device)
+            next_states = torch.from_numpy(next_states).to(self.device)
+            actions = torch.from_numpy(actions).to(self.device).long()
+            rewards = torch.clamp(torch.from_numpy(rewards).to(self.device), -10.0, 10.0)
+            dones = torch.from_numpy(dones).to(self.device).float()
+            horizons = torch.from_numpy(horizons).to(self.device).long()
+
+            current_q = self.policy_net(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+            next_actions = self.policy_net(next_states).argmax(1)
+            next_q = self.target_net(next_states).gather(1, next_actions.unsqueeze(1))
+            next_q = torch.clamp(next_q.squeeze(1), -10.0, 10.0)
+            target_q = rewards + self.discounts[horizons] * next_q * (1 - dones)
+            target_q = torch.clamp(target_q, -10.0, 10.0)
+            td_errors = torch.clamp(target_q - current_q, -10.0, 10.0)
+        return td_errors.abs().cpu().numpy()
+
+    def wait(self, timeout=None):
+        """Block until the running sweep (if any) has been applied."""
+        return self._idle.wait(timeout)
+
+    def close(self):
+        """Stop the worker thread; an unfinished sweep is discarded."""
+        self._stop.set()
+        self._thread.join()
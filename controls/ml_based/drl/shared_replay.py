@@ -0,0 +1,281 @@
+"""
+Shared-Memory Experience Ingest for Multi-Process Rollouts
+
+PrioritizedReplayBuffer lives in the learner process, so only one SUMO
+simulation could feed it. Here every rollout (actor) process gets its own
+fixed-size transition queue in multiprocessing.shared_memory; the learner
+drains all queues into its replay buffer between training steps (Ape-X
+style: actors append, one learner samples and owns the priorities).
+
+===================================================================================
+QUEUE LAYOUT (one SharedMemory block per actor)
+===================================================================================
+
+    cursor       int64   [2]                     head (written), tail (drained)
+    states       float32 [capacity, state_dim]
+    next_states  float32 [capacity, state_dim]
+    actions      int8    [capacity]
+    rewards      float32 [capacity]
+    dones        bool    [capacity]
+    event_codes  int8    [capacity]              index into EVENT_TYPES
+    td_errors    float32 [capacity]              NaN = learner computes it
+
+head and tail are monotonic counters (slot = counter % capacity). Each queue
+has exactly one producer (its actor) and one consumer (the learner), so the
+producer only ever advances head and the consumer only advances tail. The
+cursor is published under a per-queue multiprocessing.Lock, which also acts
+as the memory barrier between writing a slot and making it visible; actors
+never contend with each other, and the learner holds a queue's lock only to
+read or advance its cursor, never while copying rows.
+
+===================================================================================
+PRIORITIES
+===================================================================================
+
+Actors may send the TD error they computed with their own network copy; it
+is inserted directly. Otherwise (NaN) the transition gets the learner's
+batched TD-error initialisation like a locally collected one. A queue is
+drained as columns and added with one DQNAgent.store_experiences() call
+(one forward pass, one PrioritizedReplayBuffer.add_batch()).
+
+Transitions of one actor are drained as one contiguous run, so the replay
+buffer's frame deduplication still applies within each run (one extra slot
+per actor and drain).
+
+===================================================================================
+USAGE
+===================================================================================
+
+    hub = SharedReplayHub(n_actors=8, queue_capacity=4096, state_dim=32)
+    workers = [
+        multiprocessing.Process(target=rollout, args=(queue,))
+        for queue in hub.queues
+    ]
+    ...
+    # actor:   queue.put(state, action, reward, next_state, done, event_type)
+    # learner: hub.drain_into(agent); agent.train()
+    ...
+    hub.close()
+
+Queues are passed to actor processes as Process arguments (they pickle as
+their shared memory name plus lock), so actors must be started by the
+process that owns the hub.
+"""
+
+import time
+from multiprocessing import Lock, shared_memory
+
+import numpy as np
+
+from controls.ml_based.drl.replay_buffer import PrioritizedReplayBuffer
+
+
+class SharedTransitionQueue:
+    """
+    Single-producer / single-consumer transition queue in shared memory.
+
+    Attributes:
+        capacity (int): Transitions the queue can hold before put() waits
+        state_dim (int): Observation size
+        name (str): Shared memory block name (for attaching)
+    """
+
+    def __init__(self, capacity, state_dim, lock=None, name=None):
+        self.capacity = capacity
+        self.state_dim = state_dim
+        self.lock = Lock() if lock is None else lock
+
+        layout = self._layout(capacity, state_dim)
+        _, dtype, shape, offset = layout[-1]
+        size = offset + np.dtype(dtype).itemsize * int(np.prod(shape))
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+
+        for column, dtype, shape, offset in layout:
+            setattr(
+                self,
+                column,
+                np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset),
+            )
+        if name is None:
+            self.cursor[:] = 0
+
+    @staticmethod
+    def _layout(capacity, state_dim):
+        columns = [
+            ("cursor", np.int64, (2,)),
+            ("states", np.float32, (capacity, state_dim)),
+            ("next_states", np.float32, (capacity, state_dim)),
+            ("actions", np.int8, (capacity,)),
+            ("rewards", np.float32, (capacity,)),
+            ("dones", np.bool_, (capacity,)),
+            ("event_codes", np.int8, (capacity,)),
+            ("td_errors", np.float32, (capacity,)),
+        ]
+        layout, offset = [], 0
+        for column, dtype, shape in columns:
+            layout.append((column, dtype, shape, offset))
+            offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+            offset = -(-offset // 8) * 8  # Keep every column 8-byte aligned
+        return layout
+
+    def __getstate__(self):
+        return (self.capacity, self.state_dim, self.lock, self.name)
+
+    def __setstate__(self, state):
+        capacity, state_dim, lock, name = state
+        self.__init__(capacity, state_dim, lock, name)
+
+    def __len__(self):
+        with self.lock:
+            head, tail = self.cursor
+        return int(head - tail)
+
+    def put(
+        self,
+        state,
+        action,
+        reward,
+        next_state,
+        done,
+        event_type="normal",
+        td_error=None,
+        timeout=None,
+    ):
+        """
+        Append one transition (actor side).
+
+        Waits while the queue is full, i.e. until the learner drains it.
+
+        Args:
+            state, action, reward, next_state, done: Transition fields
+            event_type (str, optional): Event classification
+            td_error (float, optional): Actor-side TD error; None lets the
+                learner compute it
+            timeout (float, optional): Seconds to wait for space
+
+        Raises:
+            TimeoutError: If the queue stayed full for timeout seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                head, tail = self.cursor
+            if head - tail < self.capacity:
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Transition queue {self.name} is full")
+            time.sleep(0.0005)
+
+        slot = head % self.capacity
+        self.states[slot] = state
+        self.next_states[slot] = next_state
+        self.actions[slot] = action
+        self.rewards[slot] = reward
+        self.dones[slot] = done
+        self.event_codes[slot] = self._event_code(event_type)
+        self.td_errors[slot] = np.nan if td_error is None else td_error
+
+        with self.lock:
+            self.cursor[0] = head + 1
+
+    @staticmethod
+    def _event_code(event_type):
+        event_types = PrioritizedReplayBuffer.EVENT_TYPES
+        if event_type in event_types:
+            return event_types.index(event_type)
+        return event_types.index("normal")
+
+    def drain(self):
+        """
+        Take every queued transition (learner side).
+
+        Returns:
+            dict: Column name → array copy, in insertion order
+        """
+        with self.lock:
+            head, tail = self.cursor
+        slots = np.arange(tail, head) % self.capacity
+        batch = {
+            column: getattr(self, column)[slots]
+            for column in (
+                "states",
+                "next_states",
+                "actions",
+                "rewards",
+                "dones",
+                "event_codes",
+                "td_errors",
+            )
+        }
+        with self.lock:
+            self.cursor[1] = head
+        return batch
+
+    def close(self):
+        """Detach from the shared memory block (every process)."""
+        for column, *_ in self._layout(self.capacity, self.state_dim):
+            delattr(self, column)
+        self._shm.close()
+
+    def unlink(self):
+        """Free the shared memory block (owner only, after close())."""
+        self._shm.unlink()
+
+
+class SharedReplayHub:
+    """
+    One SharedTransitionQueue per actor, drained into a DQNAgent.
+
+    Attributes:
+        queues (list): SharedTransitionQueue per actor (pass to processes)
+        drained (int): Transitions moved into the replay buffer so far
+    """
+
+    def __init__(self, n_actors, queue_capacity, state_dim):
+        self.queues = [
+            SharedTransitionQueue(queue_capacity, state_dim) for _ in range(n_actors)
+        ]
+        self.drained = 0
+
+    def drain_into(self, agent):
+        """
+        Move every queued transition into agent's replay buffer.
+
+        Each queue's drained columns go in as one batch
+        (DQNAgent.store_experiences()): transitions with an actor TD error
+        are added at that priority, the rest are scored in one batched
+        forward pass, and the run is written under one memory_lock
+        acquisition.
+
+        Returns:
+            int: Number of transitions moved
+        """
+        # Keep buffer order: locally staged transitions go first
+        agent.flush_staged_experiences()
+        moved = 0
+        for queue in self.queues:
+            batch = queue.drain()
+            if len(batch["actions"]) == 0:
+                continue
+            agent.store_experiences(
+                batch["states"],
+                batch["actions"],
+                batch["rewards"],
+                batch["next_states"],
+                batch["dones"],
+                batch["event_codes"],
+                batch["td_errors"],
+            )
+            moved += len(batch["actions"])
+        self.drained += moved
+        return moved
+
+    def close(self):
+        """Detach and free every queue (call after actors have exited)."""
+        for queue in self.queues:
+            queue.close()
+            queue.unlink()
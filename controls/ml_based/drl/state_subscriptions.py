@@ -0,0 +1,191 @@
+"""
+Subscription-Based Observations for TrafficManagement
+
+TrafficManagement._get_state() used to query every value it needs with a
+blocking TraCI round trip, every simulated second:
+
+    per traffic light   call                                      count
+    phase detectors     inductionloop.getTimeSinceDetection       8
+    bus presence        lane.getLastStepVehicleIDs                2
+                        vehicle.getTypeID per vehicle on them     n
+    bus waiting time    the same lane/type queries again          2 + n
+                        vehicle.getAccumulatedWaitingTime / bus   b
+    time                simulation.getTime                        1
+
+StateSubscriptions registers the same variables as TraCI subscriptions once
+per episode (reset()); SUMO then pushes their values with every
+simulationStep() response, and the state is assembled from the locally
+stored results into a preallocated float32 array:
+
+    inductionloop   LAST_STEP_TIME_SINCE_DETECTION   all 32 phase detectors
+    lane            LAST_STEP_VEHICLE_ID_LIST        bus priority lanes
+    simulation      VAR_TIME
+    vehicle         VAR_ACCUMULATED_WAITING_TIME     buses, from first sight
+
+Vehicle types never change during a run, so each vehicle entering a bus
+priority lane costs one getTypeID() call, and each bus one subscribe(); in
+steady state an observation needs no TraCI round trip at all.
+
+===================================================================================
+EQUIVALENCE
+===================================================================================
+
+Subscription results are the values the getters would return at the same
+simulation time (same variable ids, same doubles), and they are combined in
+the same order (lane order, vehicle order within a lane) with the same
+float arithmetic as the query-based path, so state() is bit-identical to
+TrafficManagement._query_state(). Detectors without a result count as "no
+detection" and buses without a waiting time make the node's average
+unavailable (feature 0.0), like a failing getter did.
+
+===================================================================================
+"""
+
+import numpy as np
+import traci.constants as tc
+
+from constants.developed.common.drl_tls_constants import (
+    p1_main_green,
+    p2_main_green,
+    p3_main_green,
+    p4_main_green,
+)
+
+MAIN_GREEN_PHASES = (p1_main_green, p2_main_green, p3_main_green, p4_main_green)
+
+
+class StateSubscriptions:
+    """
+    Builds TrafficManagement observations from TraCI subscription results.
+
+    Usage:
+        subscriptions = StateSubscriptions(tls_ids, detectors, bus_lanes, 3600)
+        subscriptions.start(connection)            # after connecting, per episode
+        state = subscriptions.state(current_phase, phase_duration)
+
+    Attributes:
+        calls (int): TraCI commands issued since start() (subscribe and
+            getTypeID calls; reading subscription results is local)
+    """
+
+    def __init__(self, tls_ids, detector_info, bus_lanes, simulation_limit):
+        self.tls_ids = tls_ids
+        self.detector_info = detector_info
+        self.bus_lanes = bus_lanes
+        self.simulation_limit = simulation_limit
+
+        self.detector_ids = sorted(
+            {
+                det_id
+                for phase_detectors in detector_info.values()
+                for det_ids in phase_detectors.values()
+                for det_id in det_ids
+            }
+        )
+        self.lane_ids = sorted({lane for lanes in bus_lanes.values() for lane in lanes})
+
+        # 16 features per traffic light (see observation_codec.py)
+        self._state = np.zeros(16 * len(tls_ids), dtype=np.float32)
+        self.traci = None
+        self.calls = 0
+
+    def start(self, traci):
+        """
+        Register the subscriptions on a freshly started simulation.
+
+        Args:
+            traci: traci connection (or the libsumo module) running SUMO
+        """
+        self.traci = traci
+        self.calls = 0
+        self._is_bus = {}  # vehicle id → type is "bus"
+
+        for det_id in self.detector_ids:
+            traci.inductionloop.subscribe(det_id, [tc.LAST_STEP_TIME_SINCE_DETECTION])
+        for lane_id in self.lane_ids:
+            traci.lane.subscribe(lane_id, [tc.LAST_STEP_VEHICLE_ID_LIST])
+        traci.simulation.subscribe([tc.VAR_TIME])
+        self.calls += len(self.detector_ids) + len(self.lane_ids) + 1
+
+    def _buses(self, node_idx, lanes):
+        """Buses on the node's priority lanes, in lane / vehicle order."""
+        buses = []
+        for lane_id in self.bus_lanes[node_idx]:
+            for veh_id in lanes.get(lane_id, {}).get(tc.LAST_STEP_VEHICLE_ID_LIST, ()):
+                is_bus = self._is_bus.get(veh_id)
+                if is_bus is None:
+                    is_bus = self.traci.vehicle.getTypeID(veh_id) == "bus"
+                    self.calls += 1
+                    if is_bus:
+                        self.traci.vehicle.subscribe(
+                            veh_id, [tc.VAR_ACCUMULATED_WAITING_TIME]
+                        )
+                        self.calls += 1
+                    self._is_bus[veh_id] = is_bus
+                if is_bus:
+                    buses.append(veh_id)
+        return buses
+
+    def bus_avg_wait(self, node_idx):
+        """Mean accumulated waiting time of buses on the node's lanes, or None."""
+        buses = self._buses(node_idx, self.traci.lane.getAllSubscriptionResults())
+        return self._avg_wait(buses) if buses else None
+
+    def _avg_wait(self, buses):
+        """
+        Mean waiting time of the buses, or None if any of them has no result
+        (e.g. it left the network), like a failing getter in _get_bus_avg_wait().
+        """
+        vehicles = self.traci.vehicle.getAllSubscriptionResults()
+        waiting_times = []
+        for veh_id in buses:
+            result = vehicles.get(veh_id)
+            if result is None or tc.VAR_ACCUMULATED_WAITING_TIME not in result:
+                return None
+            waiting_times.append(result[tc.VAR_ACCUMULATED_WAITING_TIME])
+        return sum(waiting_times) / len(waiting_times)
+
+    def state(self, current_phase, phase_duration):
+        """
+        Assemble the observation (same layout and values as _query_state()).
+
+        Args:
+            current_phase (dict): TLS id → current phase
+            phase_duration (dict): TLS id → seconds in the current phase
+
+        Returns:
+            np.ndarray: float32 [16 * len(tls_ids)]
+        """
+        loops = self.traci.inductionloop.getAllSubscriptionResults()
+        lanes = self.traci.lane.getAllSubscriptionResults()
+        sim_time = self.traci.simulation.getSubscriptionResults()[tc.VAR_TIME]
+        time_normalized = min(sim_time / self.simulation_limit, 1.0)
+
+        state = self._state
+        state[:] = 0.0
+        for node_idx, tls_id in enumerate(self.tls_ids):
+            base = 16 * node_idx
+            phase = current_phase[tls_id]
+
+            if phase in MAIN_GREEN_PHASES:
+                state[base + MAIN_GREEN_PHASES.index(phase)] = 1.0
+            state[base + 4] = min(phase_duration[tls_id] / 60.0, 1.0)
+
+            if phase in MAIN_GREEN_PHASES:
+                for offset, vehicle_type in ((5, "vehicle"), (9, "bicycle")):
+                    det_ids = self.detector_info[phase].get(vehicle_type, [])[:4]
+                    for i, det_id in enumerate(det_ids):
+                        result = loops.get(det_id)
+                        if result is not None:
+                            since = result[tc.LAST_STEP_TIME_SINCE_DETECTION]
+                            state[base + offset + i] = 1.0 if since < 3.0 else 0.0
+
+            buses = self._buses(node_idx, lanes)
+            state[base + 13] = float(len(buses) > 0)
+            avg_wait = self._avg_wait(buses) if buses else None
+            if avg_wait is not None:
+                state[base + 14] = min(avg_wait / 60.0, 1.0)
+            state[base + 15] = time_normalized
+
+        # Callers keep observations (replay staging), so hand out a copy
+        return state.copy()
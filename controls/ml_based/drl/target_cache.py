@@ -0,0 +1,125 @@
+"""
+Target-Network Q-Value Cache for DQN Training
+
+The target network only changes when DQNAgent.soft_update_target_network()
+runs (every TARGET_UPDATE_FREQUENCY = 500 learner steps). Between updates,
+target_net(s') for a stored transition is a constant, yet it used to be
+recomputed every time the transition was sampled.
+
+This cache keeps the full target Q-vector Q_target(s', ·) per replay slot:
+
+    q           float32 [capacity, action_dim]   target Q-values of the slot's s'
+    generation  uint32  [capacity]               slot write generation when cached
+    version     int32   [capacity]               target network version when cached
+    horizon     uint8   [capacity]               n-step horizon of the cached s'
+
+With a directory (the memmap replay backend), the arrays are sparse .npy
+files there instead of RAM, so the cache does not undo the buffer's bounded
+resident memory. Every array starts zeroed (version 0 never matches), which
+keeps the files sparse until slots are cached.
+
+An entry is a hit only if the slot generation (same transition, see
+PrioritizedReplayBuffer.slot_generations()), the target version and the
+n-step horizon match. The horizon picks which frame is the bootstrap state
+s' (see PrioritizedReplayBuffer._n_step()); it can still grow for the
+newest transitions, whose later steps have not been stored yet.
+invalidate() bumps the current version, which expires every entry in O(1).
+With per-step soft updates (TARGET_UPDATE_FREQUENCY = 1) every lookup
+misses, so disable DRLConfig.TARGET_Q_CACHE there.
+
+The full vector is cached (not the max) because Double DQN gathers it at
+the action chosen by the policy network, which changes every step.
+
+Filling:
+    - store_experience(): the TD-error initialisation already evaluates
+      target_net(s') for the new transition and stores it for its slot
+    - train(): misses in a sampled batch are evaluated in one forward pass
+      and stored; hits skip the target network entirely
+"""
+
+import os
+
+import numpy as np
+
+
+class TargetQCache:
+    """
+    Per-slot cache of target-network Q-vectors, expired by version.
+
+    Attributes:
+        version (int): Current target network version
+        hits (int): Rows served from the cache
+        misses (int): Rows that needed a target forward pass
+    """
+
+    def __init__(self, capacity, action_dim, directory=None):
+        """
+        Args:
+            capacity (int): Replay rows to cache (buffer n_rows)
+            action_dim (int): Q-vector length
+            directory (str, optional): Keep the arrays in memory-mapped files
+                target_cache_*.npy there (overwritten) instead of RAM
+        """
+        self.directory = directory
+        self.q = self._allocate("q", (capacity, action_dim), np.float32)
+        self.generation = self._allocate("generation", (capacity,), np.uint32)
+        self.version = 1
+        self.entry_version = self._allocate("version", (capacity,), np.int32)
+        self.horizon = self._allocate("horizon", (capacity,), np.uint8)
+
+        self.hits = 0
+        self.misses = 0
+
+    def _allocate(self, name, shape, dtype):
+        if self.directory is None:
+            return np.zeros(shape, dtype=dtype)
+        path = os.path.join(self.directory, f"target_cache_{name}.npy")
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    def invalidate(self):
+        """Expire every entry (target network weights changed)."""
+        self.version += 1
+
+    def lookup(self, rows, generations, horizons=1):
+        """
+        Find cached Q-vectors for the given slots.
+
+        Args:
+            rows (np.ndarray): Replay slots (data indices)
+            generations (np.ndarray): Slot generations of the transitions
+            horizons (np.ndarray or int, optional): n-step horizons of the
+                batch (1 for one-step targets)
+
+        Returns:
+            tuple: (q_values, miss)
+                q_values: [len(rows), action_dim], valid where ~miss
+                miss: bool mask of rows that must be recomputed
+        """
+        miss = (
+            (self.entry_version[rows] != self.version)
+            | (self.generation[rows] != generations)
+            | (self.horizon[rows] != horizons)
+        )
+        n_miss = int(miss.sum())
+        self.misses += n_miss
+        self.hits += len(rows) - n_miss
+        return self.q[rows], miss
+
+    def store(self, rows, generations, q_values, horizons=1):
+        """Cache target Q-vectors for slots under the current version."""
+        self.q[rows] = q_values
+        self.generation[rows] = generations
+        self.entry_version[rows] = self.version
+        self.horizon[rows] = horizons
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses and hit_rate over all lookups so far
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -1,7 +1,7 @@
+import atexit
+import itertools
 import numpy as np
-import subprocess
 import sys
-import time
 import os
 
 from constants.developed.common.drl_tls_constants import (
@@ -24,8 +24,10 @@ import traci
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from common.sumo_utils import start_sumo
 from controls.ml_based.drl.config import DRLConfig
 from controls.ml_based.drl.reward import RewardCalculator
+from controls.ml_based.drl.state_subscriptions import StateSubscriptions
 from constants.constants import MIN_GREEN_TIME, YELLOW_TIME, ALL_RED_TIME
 from constants.developed.common.drl_tls_constants import (
     p1_main_green,
@@ -48,6 +50,30 @@ from detectors.developed.drl.detectors import detectors
 from constants.developed.common.drl_tls_constants import bus_priority_lanes
 
 
+# Unique traci connection labels for the SUMO launches in this process
+_connection_labels = itertools.count()
+
+# Persistent mode: SUMO sessions left running by close(), by (backend, gui).
+# The next reset() of any instance loads its episode into one of them
+# instead of launching SUMO again.
+_idle_simulations = {}
+
+
+def close_idle_simulations():
+    """Shut down the SUMO sessions kept alive by persistent instances."""
+    for sessions in _idle_simulations.values():
+        while sessions:
+            handle, process = sessions.pop()
+            try:
+                handle.close()
+            except:  # noqa: E722
+                if process is not None:
+                    process.kill()
+
+
+atexit.register(close_idle_simulations)
+
+
 class TrafficManagement:
     def __init__(
         self,
@@ -56,14 +82,46 @@ class TrafficManagement:
         gui=False,
         simulation_limit=3600,
         is_training=True,
+        subscriptions=True,
+        backend=None,
+        persistent=None,
+        route_files=None,
     ):
         self.sumo_config_file = sumo_config_file
+        # Route files to use instead of the config's (e.g. a per-worker
+        # directory, see vec_env.py); None: the config's route-files
+        self.route_files = route_files
         self.tls_ids = tls_ids
         self.gui = gui
         self.simulation_limit = simulation_limit
         self.is_training = is_training
         self.reward_calculator = RewardCalculator()
 
+        # Simulation API handle: a traci connection of its own (SUMO
+        # subprocess on a free port, set by reset()) or the libsumo module
+        # (SUMO in this process, same API, no sockets; one per process)
+        self.backend = backend or DRLConfig.SUMO_BACKEND
+        if self.backend not in ("traci", "libsumo"):
+            raise ValueError(
+                f"Unknown SUMO backend '{self.backend}', expected 'traci' or 'libsumo'"
+            )
+        if self.backend == "libsumo" and gui:
+            print("libsumo cannot drive sumo-gui, using the traci backend")
+            self.backend = "traci"
+        if self.backend == "libsumo":
+            import libsumo
+
+            self.traci = libsumo
+        else:
+            self.traci = None
+        self.sumo_process = None
+
+        # Keep SUMO running between episodes and restart it with load()
+        self.persistent = (
+            DRLConfig.PERSISTENT_SUMO if persistent is None else persistent
+        )
+        self.simulation_running = False
+
         self.current_phase = {tls_id: p1_leading_green for tls_id in tls_ids}
         self.phase_duration = {tls_id: 0 for tls_id in tls_ids}
 
@@ -80,37 +138,69 @@ class TrafficManagement:
 
         self.detector_info = detectors
 
+        # Observations from TraCI subscriptions (False: one query per value)
+        self.subscriptions = (
+            StateSubscriptions(tls_ids, detectors, bus_priority_lanes, simulation_limit)
+            if subscriptions
+            else None
+        )
+
     def reset(self):
+        self._start_simulation()
+
+        for tls_id in self.tls_ids:
+            self.traci.trafficlight.setPhase(tls_id, p1_leading_green)
+            self.current_phase[tls_id] = p1_leading_green
+            self.phase_duration[tls_id] = 0
+            self.stuck_duration[tls_id] = 0
+            self.skip_to_p1_mode[tls_id] = False
+
+        if self.subscriptions is not None:
+            self.subscriptions.start(self.traci)
+
+        return self._get_state()
+
+    def _start_simulation(self):
+        """Launch (or, persistent, reload) SUMO and set self.traci to its handle."""
         sumo_binary = "sumo-gui" if self.gui else "sumo"
 
         if "SUMO_BINDIR" in os.environ:
             sumo_binary = os.path.join(os.environ["SUMO_BINDIR"], sumo_binary)
 
         sumo_cmd = [sumo_binary, "-c", self.sumo_config_file]
-        self.sumo_process = subprocess.Popen(
-            sumo_cmd, stdout=sys.stdout, stderr=sys.stderr
-        )
+        if self.route_files is not None:
+            sumo_cmd += ["--route-files", ",".join(self.route_files)]
+        if self.persistent and not self.simulation_running:
+            idle = _idle_simulations.get((self.backend, self.gui))
+            if idle:
+                self.traci, self.sumo_process = idle.pop()
+                self.simulation_running = True
+        if self.persistent and self.simulation_running:
+            # Same process and network, new episode: load() re-reads the
+            # config and with it this episode's freshly generated routes
+            self.traci.load(sumo_cmd[1:])
+            return
 
-        time.sleep(2)
+        if self.backend == "libsumo":
+            self.traci.start(sumo_cmd)
+            self.simulation_running = True
+            return
 
         try:
-            traci.init(8816)
+            self.traci, self.sumo_process = start_sumo(
+                sumo_cmd, label=f"traffic_management_{next(_connection_labels)}"
+            )
         except Exception as e:
             print(f"Failed to connect to SUMO: {e}")
-            if hasattr(self, "sumo_process"):
-                self.sumo_process.terminate()
             raise
-
-        for tls_id in self.tls_ids:
-            traci.trafficlight.setPhase(tls_id, p1_leading_green)
-            self.current_phase[tls_id] = p1_leading_green
-            self.phase_duration[tls_id] = 0
-            self.stuck_duration[tls_id] = 0
-            self.skip_to_p1_mode[tls_id] = False
-
-        return self._get_state()
+        self.simulation_running = True
 
     def _get_state(self):
+        if self.subscriptions is not None:
+            return self.subscriptions.state(self.current_phase, self.phase_duration)
+        return self._query_state()
+
+    def _query_state(self):
         state_features = []
 
         for node_idx, tls_id in enumerate(self.tls_ids):
@@ -134,7 +224,7 @@ class TrafficManagement:
             bus_normalized_wait = self._get_bus_normalized_wait(node_idx)
             state_features.append(bus_normalized_wait)
 
-            sim_time = traci.simulation.getTime()
+            sim_time = self.traci.simulation.getTime()
             time_normalized = min(sim_time / self.simulation_limit, 1.0)
             state_features.append(time_normalized)
 
@@ -189,7 +279,7 @@ class TrafficManagement:
 
             for det_id in detector_list:
                 try:
-                    last_detection = traci.inductionloop.getTimeSinceDetection(det_id)
+                    last_detection = self.traci.inductionloop.getTimeSinceDetection(det_id)
                     if last_detection < 3.0:
                         queues.append(1.0)
                     else:
@@ -209,8 +299,8 @@ class TrafficManagement:
             buses = []
 
             for lane_id in bus_lanes:
-                for veh_id in traci.lane.getLastStepVehicleIDs(lane_id):
-                    if traci.vehicle.getTypeID(veh_id) == "bus":
+                for veh_id in self.traci.lane.getLastStepVehicleIDs(lane_id):
+                    if self.traci.vehicle.getTypeID(veh_id) == "bus":
                         buses.append(veh_id)
 
             return buses
@@ -221,6 +311,9 @@ class TrafficManagement:
         return len(self._get_buses_in_priority_lanes(node_idx)) > 0
 
     def _get_bus_avg_wait(self, node_idx):
+        if self.subscriptions is not None:
+            return self.subscriptions.bus_avg_wait(node_idx)
+
         buses = self._get_buses_in_priority_lanes(node_idx)
 
         if not buses:
@@ -228,7 +321,7 @@ class TrafficManagement:
 
         try:
             waiting_times = [
-                traci.vehicle.getAccumulatedWaitingTime(veh_id) for veh_id in buses
+                self.traci.vehicle.getAccumulatedWaitingTime(veh_id) for veh_id in buses
             ]
             return sum(waiting_times) / len(waiting_times)
         except:  # noqa: E722
@@ -241,7 +334,7 @@ class TrafficManagement:
         return min(avg_wait / 60.0, 1.0)
 
     def step(self, action, epsilon=0.0, was_exploration=False):
-        step_time = traci.simulation.getTime()
+        step_time = self.traci.simulation.getTime()
 
         self.action_history.append(action)
         if len(self.action_history) > self.max_history_length:
@@ -291,7 +384,7 @@ class TrafficManagement:
 
         self._log_consolidated_action(action_results, epsilon, was_exploration)
 
-        traci.simulationStep()
+        self.traci.simulationStep()
 
         for tls_id in self.tls_ids:
             self.phase_duration[tls_id] += 1
@@ -316,7 +409,7 @@ class TrafficManagement:
         }
 
         reward, info = self.reward_calculator.calculate_reward(
-            traci,
+            self.traci,
             self.tls_ids,
             action,
             self.current_phase,
@@ -330,7 +423,7 @@ class TrafficManagement:
             was_exploration=was_exploration,
         )
 
-        done = traci.simulation.getMinExpectedNumber() == 0
+        done = self.traci.simulation.getMinExpectedNumber() == 0
 
         return next_state, reward, done, info
 
@@ -520,7 +613,7 @@ class TrafficManagement:
 
                 if duration >= phase_min_green:
                     yellow_phase = self._get_next_phase(current_phase)
-                    traci.trafficlight.setPhase(tls_id, yellow_phase)
+                    self.traci.trafficlight.setPhase(tls_id, yellow_phase)
 
                     self.current_phase[tls_id] = yellow_phase
                     self.phase_duration[tls_id] = 0
@@ -585,7 +678,7 @@ class TrafficManagement:
             if duration >= phase_min_green:
                 next_main_phase = get_next_phase_in_sequence(current_phase)
                 yellow_phase = self._get_yellow_phase(current_phase)
-                traci.trafficlight.setPhase(tls_id, yellow_phase)
+                self.traci.trafficlight.setPhase(tls_id, yellow_phase)
 
                 self.current_phase[tls_id] = yellow_phase
                 self.phase_duration[tls_id] = 0
@@ -632,7 +725,7 @@ class TrafficManagement:
             and duration >= ALL_RED_TIME
         ):
             next_phase = main_to_leading[self.next_main_phase[tls_id]]
-            traci.trafficlight.setPhase(tls_id, next_phase)
+            self.traci.trafficlight.setPhase(tls_id, next_phase)
 
             self.current_phase[tls_id] = next_phase
             self.phase_duration[tls_id] = 0
@@ -647,7 +740,7 @@ class TrafficManagement:
 
         if duration >= max_green:
             next_phase = self._get_next_phase(current_phase)
-            traci.trafficlight.setPhase(tls_id, next_phase)
+            self.traci.trafficlight.setPhase(tls_id, next_phase)
 
             self.current_phase[tls_id] = next_phase
             self.phase_duration[tls_id] = 0
@@ -669,7 +762,7 @@ class TrafficManagement:
             and current_phase in [p2_yellow, p3_yellow, p4_yellow]
             and duration >= YELLOW_TIME
         ):
-            traci.trafficlight.setPhase(tls_id, p4_red)
+            self.traci.trafficlight.setPhase(tls_id, p4_red)
 
             self.current_phase[tls_id] = p4_red
             self.phase_duration[tls_id] = 0
@@ -682,7 +775,7 @@ class TrafficManagement:
             and duration >= auto_durations[current_phase]
         ):
             next_phase = self._get_next_phase(current_phase)
-            traci.trafficlight.setPhase(tls_id, next_phase)
+            self.traci.trafficlight.setPhase(tls_id, next_phase)
 
             self.current_phase[tls_id] = next_phase
             self.phase_duration[tls_id] = 0
@@ -736,17 +829,28 @@ class TrafficManagement:
         self.blocked_action_count = 0
         self.total_action_count = 0
 
-        try:
-            traci.close()
-        except:  # noqa: E722
-            pass
-
-        if hasattr(self, "sumo_process"):
+        if self.persistent and self.simulation_running:
+            # Leave SUMO running for the next reset()
+            _idle_simulations.setdefault((self.backend, self.gui), []).append(
+                (self.traci, self.sumo_process)
+            )
+        else:
             try:
-                self.sumo_process.terminate()
-                self.sumo_process.wait(timeout=5)
+                self.traci.close()
             except:  # noqa: E722
+                pass
+
+            if self.sumo_process is not None:
                 try:
-                    self.sumo_process.kill()
+                    self.sumo_process.terminate()
+                    self.sumo_process.wait(timeout=5)
                 except:  # noqa: E722
-                    pass
+                    try:
+                        self.sumo_process.kill()
+                    except:  # noqa: E722
+                        pass
+
+        self.simulation_running = False
+        if self.backend == "traci":
+            self.traci = None
+        self.sumo_process = None
@@ -0,0 +1,289 @@
+"""
+Vectorized TrafficManagement: N SUMO Environments in Worker Processes
+
+train_drl_agent() and test_drl_agent() step one TrafficManagement at a time,
+so a single core runs SUMO and the reward's TraCI queries while the others
+idle. VecTrafficManagement runs N environments, each in its own worker
+process with its own SUMO instance (own TraCI port, see
+common.sumo_utils.start_sumo) and its own route directory, and steps them in
+parallel:
+
+    actions [N] ──▶ worker 0: TrafficManagement ── SUMO (port a, routes/env_0)
+                ──▶ worker 1: TrafficManagement ── SUMO (port b, routes/env_1)
+                ──▶ ...
+    ◀── states [N, 32], rewards [N], dones [N], infos [N]
+
+Each step costs one pipe round trip per worker; the learner's own work
+(action selection, train()) can overlap the simulation with
+step_async() / step_wait().
+
+===================================================================================
+EPISODES
+===================================================================================
+
+Before every episode a worker generates its routes into its own directory
+(generate_all_routes_developed(..., routes_dir)) and its TrafficManagement
+passes them to SUMO with --route-files, so the workers' traffic is
+independent. traffic_config picks the volumes: None draws random training
+traffic per episode (get_traffic_config()), a dict fixes them, and
+reset(traffic_configs) sets one per environment for the next episode (e.g.
+test scenarios in parallel).
+
+An episode ends when all traffic has left (TrafficManagement's done) or
+after simulation_limit steps (info["truncated"]). The worker then closes it
+and starts the next one right away (auto-reset): step() returns the first
+observation of the new episode, and the last one of the finished episode is
+in info["terminal_observation"].
+
+===================================================================================
+USAGE
+===================================================================================
+
+    envs = VecTrafficManagement(8, sumo_config, ["3", "6"], simulation_limit=3600)
+    states = envs.reset()                                   # [8, 32]
+    for step in range(steps):
+        actions = [
+            agent.select_action(state, valid_actions=valid)[0]
+            for state, valid in zip(states, envs.valid_actions)
+        ]
+        next_states, rewards, dones, infos = envs.step(actions)
+        ...
+        states = next_states
+    envs.close()
+
+Worker output (TrafficManagement's per-step logs, SUMO's warnings) goes to
+log_dir/env_<i>.log, or is discarded without log_dir. Keyword arguments
+such as backend, persistent or is_training are passed on to each worker's
+TrafficManagement; gui is not supported.
+"""
+
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sys
+import tempfile
+import traceback
+
+import numpy as np
+
+
+def _worker(
+    remote,
+    parent_remote,
+    env_args,
+    env_kwargs,
+    routes_dir,
+    traffic_config,
+    seed,
+    log_path,
+):
+    """Worker process: owns one TrafficManagement and its SUMO instance."""
+    parent_remote.close()
+    log = open(log_path or os.devnull, "w", buffering=1)
+    # At descriptor level too: SUMO (subprocess or libsumo) writes there
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    sys.stdout = sys.stderr = log
+
+    # Imported here so the parent does not need SUMO's tools on its path
+    from controls.ml_based.drl.traffic_management import (
+        TrafficManagement,
+        close_idle_simulations,
+    )
+    from route_generator import generate_all_routes_developed, route_file_paths
+    from route_generator.traffic_config import get_traffic_config
+
+    if seed is not None:
+        random.seed(seed)
+
+    env = None
+    episode_steps = 0
+
+    def new_episode(config):
+        if env.simulation_running:
+            env.close()
+        config = config or traffic_config or get_traffic_config()
+        generate_all_routes_developed(config, env.simulation_limit, routes_dir)
+        state = env.reset()
+        env.reward_calculator.reset()
+        return state
+
+    try:
+        env = TrafficManagement(
+            *env_args, route_files=route_file_paths(routes_dir), **env_kwargs
+        )
+        while True:
+            command, data = remote.recv()
+            if command == "step":
+                state, reward, done, info = env.step(data)
+                episode_steps += 1
+                truncated = not done and episode_steps >= env.simulation_limit
+                info = dict(info, truncated=truncated)
+                if done or truncated:
+                    info["terminal_observation"] = state
+                    state = new_episode(None)
+                    episode_steps = 0
+                remote.send(
+                    (state, reward, done or truncated, info, env.get_valid_actions())
+                )
+            elif command == "reset":
+                state = new_episode(data)
+                episode_steps = 0
+                remote.send((state, env.get_valid_actions()))
+            elif command == "close":
+                break
+    except Exception:
+        remote.send(("error", traceback.format_exc()))
+    finally:
+        if env is not None:
+            env.close()
+        close_idle_simulations()
+        remote.close()
+
+
+class VecTrafficManagement:
+    """
+    N TrafficManagement environments stepped in parallel worker processes.
+
+    Attributes:
+        num_envs (int): Number of environments (worker processes)
+        routes_dir (str): Parent of the per-environment route directories
+        valid_actions (list): Valid actions per environment for the current
+            observations (TrafficManagement.get_valid_actions())
+    """
+
+    def __init__(
+        self,
+        num_envs,
+        sumo_config_file,
+        tls_ids,
+        simulation_limit=3600,
+        traffic_config=None,
+        routes_dir=None,
+        seed=None,
+        log_dir=None,
+        start_method="spawn",
+        **env_kwargs,
+    ):
+        if env_kwargs.get("gui"):
+            raise ValueError("VecTrafficManagement does not support gui=True")
+        self.num_envs = num_envs
+        self._owns_routes_dir = routes_dir is None
+        self.routes_dir = (
+            tempfile.mkdtemp(prefix="vec_routes_") if routes_dir is None else routes_dir
+        )
+        if log_dir is not None:
+            os.makedirs(log_dir, exist_ok=True)
+
+        env_args = (sumo_config_file, tls_ids)
+        env_kwargs = dict(env_kwargs, simulation_limit=simulation_limit)
+        context = mp.get_context(start_method)
+        self.remotes, self.processes = [], []
+        for index in range(num_envs):
+            log_path = None
+            if log_dir is not None:
+                log_path = os.path.join(log_dir, f"env_{index}.log")
+            remote, worker_remote = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(
+                    worker_remote,
+                    remote,
+                    env_args,
+                    env_kwargs,
+                    os.path.join(self.routes_dir, f"env_{index}"),
+                    traffic_config,
+                    None if seed is None else seed + index,
+                    log_path,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        self.valid_actions = [None] * num_envs
+        self._waiting = False
+        self._closed = False
+
+    def _receive(self, index):
+        result = self.remotes[index].recv()
+        if isinstance(result[0], str) and result[0] == "error":
+            raise RuntimeError(f"Environment {index} failed:\n{result[1]}")
+        return result
+
+    def reset(self, traffic_configs=None):
+        """
+        Start a new episode in every environment.
+
+        Args:
+            traffic_configs (list): Traffic config per environment for this
+                episode, None to use the constructor's traffic_config
+
+        Returns:
+            np.ndarray: float32 [num_envs, state_dim] initial observations
+        """
+        configs = traffic_configs or [None] * self.num_envs
+        for remote, config in zip(self.remotes, configs):
+            remote.send(("reset", config))
+        states = []
+        for index in range(self.num_envs):
+            state, self.valid_actions[index] = self._receive(index)
+            states.append(state)
+        return np.stack(states).astype(np.float32, copy=False)
+
+    def step_async(self, actions):
+        """Send one action per environment without waiting for the results."""
+        for remote, action in zip(self.remotes, actions):
+            remote.send(("step", int(action)))
+        self._waiting = True
+
+    def step_wait(self):
+        """
+        Collect the results of step_async().
+
+        Returns:
+            tuple: (states float32 [num_envs, state_dim], rewards float32
+                [num_envs], dones bool [num_envs], infos list of dicts)
+        """
+        states, rewards, dones, infos = [], [], [], []
+        for index in range(self.num_envs):
+            state, reward, done, info, self.valid_actions[index] = self._receive(index)
+            states.append(state)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+        self._waiting = False
+        return (
+            np.stack(states).astype(np.float32, copy=False),
+            np.array(rewards, dtype=np.float32),
+            np.array(dones, dtype=bool),
+            infos,
+        )
+
+    def step(self, actions):
+        """Step every environment (finished episodes restart automatically)."""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        """Stop the workers (and their SUMO instances) and remove owned routes."""
+        if self._closed:
+            return
+        if self._waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            try:
+                remote.send(("close", None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+        if self._owns_routes_dir:
+            shutil.rmtree(self.routes_dir, ignore_errors=True)
+        self._closed = True
@@ -11,7 +11,6 @@ All rights reserved
 
 import os
 import sys
-import subprocess
 
 # Add project root to path
 project_root = os.path.dirname(
@@ -50,8 +49,7 @@ from detectors.developed.common.detectors import (  # noqa: E402
     PEDESTRIAN_DETECTORS,
 )
 from controls.rule_based.developed.pedestrian_phase import pedestrainValue  # noqa: E402
-
-PORT = 8816
+from common.sumo_utils import start_sumo  # noqa: E402
 
 
 class loopDelay:
@@ -265,12 +263,12 @@ class loopDelay:
 
 
 def run(sumoExe, max_steps):
-    subprocess.Popen(
+    # Free port per run; module-level traci calls go to this connection
+    start_sumo(
         [sumoExe, "-c", "configurations/developed/common/signal_sync.sumocfg"],
-        stdout=sys.stdout,
-        stderr=sys.stderr,
+        label="rule_based",
+        switch=True,
     )
-    traci.init(PORT)
 
     TLS_ID = traci.trafficlight.getIDList()
 
@@ -6,6 +6,7 @@ from route_generator.developed.common.generate_routes import (
     generate_bicycle_routes_developed,
     generate_pedestrian_routes_developed,
     generate_bus_routes,
+    route_file_paths,
 )
 
 __all__ = [
@@ -14,4 +15,5 @@ __all__ = [
     "generate_bicycle_routes_developed",
     "generate_pedestrian_routes_developed",
     "generate_bus_routes",
+    "route_file_paths",
 ]
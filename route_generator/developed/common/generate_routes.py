@@ -16,8 +16,32 @@ from constants.constants import (
 from common.utils import calculate_traffic_load
 import random
 
+# Route files read by the single-agent DRL config (signal_sync.sumocfg)
+ROUTES_DIR = "infrastructure/developed/drl/single_agent/routes"
+ROUTE_FILES = (
+    "privateCar.rou.xml",
+    "bicycle.rou.xml",
+    "pedestrian.rou.xml",
+    "bus.rou.xml",
+)
+
+
+def route_file_paths(routes_dir=ROUTES_DIR):
+    """
+    Route files in a routes directory, in the order signal_sync.sumocfg lists them.
 
-def generate_car_routes_developed(cars_per_hour, simulation_limit):
+    Args:
+        routes_dir (str): Directory the route files were generated into
+
+    Returns:
+        list: Absolute paths, e.g. for SUMO's --route-files option
+    """
+    return [os.path.abspath(os.path.join(routes_dir, name)) for name in ROUTE_FILES]
+
+
+def generate_car_routes_developed(
+    cars_per_hour, simulation_limit, routes_dir=ROUTES_DIR
+):
     """Generate private car routes for DEVELOPED control with specified volume."""
 
     # Calculate traffic loads for horizontal (main) and vertical (minor) roads
@@ -67,9 +91,7 @@ def generate_car_routes_developed(cars_per_hour, simulation_limit):
     ea_load = STRAIGHT_TRAFFIC_RATIO * TURN_RATIO * minor_hourly_traffic_load
 
     # Generate route file
-    routes = open(
-        "infrastructure/developed/drl/single_agent/routes/privateCar.rou.xml", "w"
-    )
+    routes = open(os.path.join(routes_dir, "privateCar.rou.xml"), "w")
     print(
         """<routes>
         
@@ -162,7 +184,9 @@ def generate_car_routes_developed(cars_per_hour, simulation_limit):
     routes.close()
 
 
-def generate_bicycle_routes_developed(bikes_per_hour, simulation_limit):
+def generate_bicycle_routes_developed(
+    bikes_per_hour, simulation_limit, routes_dir=ROUTES_DIR
+):
     """Generate bicycle routes for DEVELOPED control with specified volume."""
 
     # Calculate traffic loads for horizontal (main) and vertical (minor) roads
@@ -210,9 +234,7 @@ def generate_bicycle_routes_developed(bikes_per_hour, simulation_limit):
     ec_load = TURN_RATIO * TURN_RATIO * minor_hourly_traffic_load
     ea_load = STRAIGHT_TRAFFIC_RATIO * TURN_RATIO * minor_hourly_traffic_load
 
-    routes = open(
-        "infrastructure/developed/drl/single_agent/routes/bicycle.rou.xml", "w"
-    )
+    routes = open(os.path.join(routes_dir, "bicycle.rou.xml"), "w")
     print(
         """<routes>
         
@@ -340,7 +362,9 @@ def generate_bicycle_routes_developed(bikes_per_hour, simulation_limit):
     routes.close()
 
 
-def generate_pedestrian_routes_developed(peds_per_hour, simulation_limit):
+def generate_pedestrian_routes_developed(
+    peds_per_hour, simulation_limit, routes_dir=ROUTES_DIR
+):
     """Generate pedestrian routes for DEVELOPED control with specified volume."""
 
     # Calculate pedestrian loads for horizontal (main) and vertical (minor) crossings
@@ -348,9 +372,7 @@ def generate_pedestrian_routes_developed(peds_per_hour, simulation_limit):
     ped_ew = ped_we  # East-West same as West-East
     ped_ns = ped_sn  # North-South same as South-North
 
-    routes = open(
-        "infrastructure/developed/drl/single_agent/routes/pedestrian.rou.xml", "w"
-    )
+    routes = open(os.path.join(routes_dir, "pedestrian.rou.xml"), "w")
     print(
         """<routes>
 
@@ -388,7 +410,7 @@ def generate_pedestrian_routes_developed(peds_per_hour, simulation_limit):
     routes.close()
 
 
-def generate_bus_routes(buses_per_hour, simulation_limit):
+def generate_bus_routes(buses_per_hour, simulation_limit, routes_dir=ROUTES_DIR):
     """
     Generate bus routes with specified volume.
 
@@ -398,8 +420,9 @@ def generate_bus_routes(buses_per_hour, simulation_limit):
 
     Args:
         buses_per_hour: Number of buses per hour, or 'every_15min' for fixed schedule
+        routes_dir: Directory to write bus.rou.xml to
     """
-    routes = open("infrastructure/developed/drl/single_agent/routes/bus.rou.xml", "w")
+    routes = open(os.path.join(routes_dir, "bus.rou.xml"), "w")
     print(
         """<routes>
 
@@ -449,7 +472,9 @@ def generate_bus_routes(buses_per_hour, simulation_limit):
     routes.close()
 
 
-def generate_all_routes_developed(traffic_config, simulation_limit):
+def generate_all_routes_developed(
+    traffic_config, simulation_limit, routes_dir=ROUTES_DIR
+):
     """
     Generate all route files for DEVELOPED control based on traffic configuration.
 
@@ -457,6 +482,8 @@ def generate_all_routes_developed(traffic_config, simulation_limit):
         traffic_config (dict): Traffic configuration from traffic_config.py
             Keys: 'cars', 'bicycles', 'pedestrians', 'buses', 'scenario_name'
         simulation_limit (int): Simulation duration in seconds
+        routes_dir (str): Output directory (default: the one signal_sync.sumocfg
+            reads; others are passed to SUMO with --route-files)
 
     Example:
         config = get_traffic_config()
@@ -471,14 +498,15 @@ def generate_all_routes_developed(traffic_config, simulation_limit):
     print(f"  Buses: {traffic_config.get('buses', 4)}/hr")
 
     # Create routes directory if it doesn't exist
-    routes_dir = "infrastructure/developed/drl/single_agent/routes"
     os.makedirs(routes_dir, exist_ok=True)
 
-    generate_car_routes_developed(traffic_config["cars"], simulation_limit)
-    generate_bicycle_routes_developed(traffic_config["bicycles"], simulation_limit)
+    generate_car_routes_developed(traffic_config["cars"], simulation_limit, routes_dir)
+    generate_bicycle_routes_developed(
+        traffic_config["bicycles"], simulation_limit, routes_dir
+    )
     generate_pedestrian_routes_developed(
-        traffic_config["pedestrians"], simulation_limit
+        traffic_config["pedestrians"], simulation_limit, routes_dir
     )
-    generate_bus_routes(traffic_config.get("buses", 4), simulation_limit)
+    generate_bus_routes(traffic_config.get("buses", 4), simulation_limit, routes_dir)
 
     print("✓ DEVELOPED control route generation complete\n")
@@ -0,0 +1,97 @@
+"""
+Benchmark background batch prefetching in DQNAgent.train (no SUMO required)
+
+Replays the training loop's inner cycle with synthetic transitions:
+UPDATE_FREQUENCY x store_experience() followed by one train() call, and
+reports wall-clock time per cycle with DRLConfig.PREFETCH_BATCHES off and on.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_prefetch
+    python -m run.benchmarking.benchmark_prefetch --cycles 2000 --batch-size 256
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+import torch
+
+from constants.constants import UPDATE_FREQUENCY
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+
+
+def _run_cycles(prefetch, cycles, warmup, seed):
+    """
+    Time store/train cycles on a freshly filled agent.
+
+    Returns:
+        float: Milliseconds per UPDATE_FREQUENCY cycle (after warmup)
+    """
+    DRLConfig.PREFETCH_BATCHES = prefetch
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+
+    def env_step():
+        nonlocal state
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        agent.store_experience(state, action, float(rng.normal()), next_state, False, {})
+        state = next_state
+
+    for _ in range(DRLConfig.MIN_BUFFER_SIZE):
+        env_step()
+
+    def cycle():
+        for _ in range(UPDATE_FREQUENCY):
+            env_step()
+        agent.train()
+
+    for _ in range(warmup):
+        cycle()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        cycle()
+    elapsed = time.perf_counter() - start
+
+    agent.stop_prefetching()
+    return elapsed / cycles * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch prefetching")
+    parser.add_argument("--cycles", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=DRLConfig.BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    DRLConfig.BATCH_SIZE = args.batch_size
+    prefetch_setting = DRLConfig.PREFETCH_BATCHES
+
+    print("\n" + "=" * 70)
+    print("BATCH PREFETCH BENCHMARK")
+    print("=" * 70)
+    print(
+        f"batch={args.batch_size}, UPDATE_FREQUENCY={UPDATE_FREQUENCY}, "
+        f"cycles={args.cycles}, torch threads={torch.get_num_threads()}\n"
+    )
+
+    sequential = _run_cycles(False, args.cycles, args.warmup, args.seed)
+    prefetched = _run_cycles(True, args.cycles, args.warmup, args.seed)
+    DRLConfig.PREFETCH_BATCHES = prefetch_setting
+
+    print(f"  sequential: {sequential:8.3f} ms/cycle")
+    print(f"  prefetched: {prefetched:8.3f} ms/cycle")
+    print(f"  reduction:  {(1 - prefetched / sequential) * 100:7.1f} %")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
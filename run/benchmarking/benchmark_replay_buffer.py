@@ -0,0 +1,142 @@
+"""
+Benchmark for the prioritized replay buffer (no SUMO required)
+
+Measures how SumTree-backed add / sample / update_priorities scale with
+buffer capacity, against the per-element reference implementations. Sampler
+equivalence and the float32 SumTree drift bound are checked in tests/
+(test_replay_buffer.py, test_sum_tree.py).
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_replay_buffer
+    python -m run.benchmarking.benchmark_replay_buffer --capacities 50000 500000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.replay_buffer import PrioritizedReplayBuffer
+
+DEFAULT_CAPACITIES = [50_000, 500_000, 5_000_000]
+
+
+def _random_transition(rng):
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    action = int(rng.integers(DRLConfig.ACTION_DIM))
+    reward = float(rng.normal())
+    return state, action, reward, next_state, False
+
+
+def _prefill(buffer, rng):
+    """Fill the ring as one long episode with a single vectorized tree rebuild."""
+    capacity = buffer.capacity
+    leaves = buffer.leaf_index(np.arange(capacity))
+    errors = rng.exponential(1.0, size=capacity)
+    priorities = (errors + buffer.epsilon) ** buffer.alpha
+    priorities[0] = 0.0  # slot 0 holds the pending next_state
+    buffer.tree.update_batch(leaves, priorities)
+    buffer.observations[:] = rng.random(buffer.observations.shape, dtype=np.float32)
+    buffer.actions[:capacity] = rng.integers(DRLConfig.ACTION_DIM, size=capacity)
+    buffer.rewards[:capacity] = rng.normal(size=capacity)
+    buffer.valid[1:capacity] = True
+    buffer.n_entries = capacity - 1
+    buffer.write_index = 0
+    buffer.has_pending_frame = True
+
+
+def _reference_sample(buffer, batch_size):
+    """
+    Per-element sampler used before vectorization (kept as timing reference).
+
+    IS weights are normalized by the minimum priority found with an O(n)
+    scan of the leaves instead of the min tree.
+    """
+    indices = []
+    priorities = []
+    segment = buffer.tree.total() / batch_size
+    for i in range(batch_size):
+        s = random.uniform(segment * i, segment * (i + 1))
+        idx, priority, _ = buffer.tree.get(s)
+        indices.append(idx)
+        priorities.append(priority)
+    leaves = buffer.tree.tree[buffer.leaf_index(0) :]
+    min_priority = leaves[leaves > 0].min()
+    weights = np.power(np.array(priorities) / min_priority, -buffer.beta)
+    return np.array(indices), weights
+
+
+def _time_per_call(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def benchmark_capacity(capacity, batch_size, repeats, seed=0):
+    """
+    Time add / sample / update_priorities on a full buffer of given capacity.
+
+    Returns:
+        dict: Microseconds per call for vectorized and reference paths
+    """
+    rng = np.random.default_rng(seed)
+    buffer = PrioritizedReplayBuffer(capacity)
+    _prefill(buffer, rng)
+
+    transition = _random_transition(rng)
+    errors = rng.exponential(1.0, size=batch_size)
+    _, indices, _ = buffer.sample(batch_size)
+
+    def reference_update():
+        for idx, error in zip(indices, errors):
+            buffer.tree.update(idx, buffer._get_priority(error))
+
+    return {
+        "capacity": capacity,
+        "add_us": _time_per_call(lambda: buffer.add(*transition, 1.0), repeats),
+        "sample_us": _time_per_call(lambda: buffer.sample(batch_size), repeats),
+        "sample_reference_us": _time_per_call(
+            lambda: _reference_sample(buffer, batch_size), repeats
+        ),
+        "update_us": _time_per_call(
+            lambda: buffer.update_priorities(indices, errors), repeats
+        ),
+        "update_reference_us": _time_per_call(reference_update, repeats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PER replay buffer")
+    parser.add_argument(
+        "--capacities", type=int, nargs="+", default=DEFAULT_CAPACITIES
+    )
+    parser.add_argument("--batch-size", type=int, default=DRLConfig.BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("REPLAY BUFFER BENCHMARK")
+    print("=" * 70)
+
+    print(
+        f"{'capacity':>10} | {'add':>8} | {'sample':>8} {'(ref)':>9} | "
+        f"{'update':>8} {'(ref)':>9}   [µs/call, batch={args.batch_size}]"
+    )
+    print("-" * 70)
+    for capacity in args.capacities:
+        r = benchmark_capacity(capacity, args.batch_size, args.repeats, args.seed)
+        print(
+            f"{r['capacity']:>10,} | {r['add_us']:>8.1f} | "
+            f"{r['sample_us']:>8.1f} {r['sample_reference_us']:>9.1f} | "
+            f"{r['update_us']:>8.1f} {r['update_reference_us']:>9.1f}"
+        )
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark gradient steps per DQNAgent.train() call (no SUMO required)
+
+Fills an agent with synthetic transitions and reports learner throughput
+(updates/s, samples/s) for k gradient steps per train() call, where one
+sample of k · BATCH_SIZE is split into k mini-batches, against the same k
+updates done as k separate one-step train() calls.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_replay_ratio
+    python -m run.benchmarking.benchmark_replay_ratio --steps 1 4 16 --calls 200
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+import torch
+
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+
+
+def _filled_agent(seed, transitions):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    for _ in range(transitions):
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        agent.store_experience(state, action, float(rng.normal()), next_state, False, {})
+        state = next_state
+    return agent
+
+
+def _run(gradient_steps, fused, calls, seed, transitions):
+    """
+    Returns:
+        tuple: (updates per second, samples per second) inside train()
+    """
+    DRLConfig.GRADIENT_STEPS = gradient_steps if fused else 1
+    agent = _filled_agent(seed, transitions)
+    repeats = 1 if fused else gradient_steps
+
+    agent.train()  # Warm up
+    agent.replay_ratio.reset_stats()
+    start = time.perf_counter()
+    for _ in range(calls):
+        for _ in range(repeats):
+            agent.train()
+    elapsed = time.perf_counter() - start
+
+    updates = agent.replay_ratio.updates
+    return updates / elapsed, updates * DRLConfig.BATCH_SIZE / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gradient steps per call")
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--transitions", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=DRLConfig.BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    DRLConfig.BATCH_SIZE = args.batch_size
+    steps_setting = DRLConfig.GRADIENT_STEPS
+
+    print("\n" + "=" * 70)
+    print("REPLAY RATIO BENCHMARK")
+    print("=" * 70)
+    print(
+        f"batch={args.batch_size}, calls={args.calls}, "
+        f"torch threads={torch.get_num_threads()}\n"
+    )
+    print(f"{'k':>4} | {'k x train()':>22} | {'train() with k steps':>22} | {'speedup':>7}")
+    print(f"{'':>4} | {'updates/s':>10} {'samples/s':>11} | {'updates/s':>10} {'samples/s':>11} |")
+    print("-" * 70)
+    for k in args.steps:
+        separate = _run(k, False, args.calls, args.seed, args.transitions)
+        fused = _run(k, True, args.calls, args.seed, args.transitions)
+        print(
+            f"{k:>4} | {separate[0]:>10,.0f} {separate[1]:>11,.0f} | "
+            f"{fused[0]:>10,.0f} {fused[1]:>11,.0f} | {fused[0] / separate[0]:>6.2f}x"
+        )
+    DRLConfig.GRADIENT_STEPS = steps_setting
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
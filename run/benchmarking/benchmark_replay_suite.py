@@ -0,0 +1,299 @@
+"""
+Replay-path micro-benchmark suite (no SUMO required)
+
+Times every operation on the replay path with synthetic 32-dim traffic
+states (binary flags where TrafficManagement._get_state() has them):
+
+    SumTree:        add, update, get, get_batch, update_batch
+    Buffer:         add, sample, update_priorities
+    DQNAgent.train: batch_to_tensors (sampled arrays → training tensors)
+
+over a sweep of capacities × batch sizes × storage backends:
+
+    memory      PrioritizedReplayBuffer (float64 SumTree)
+    float32     SUM_TREE_DTYPE = "float32"
+    packed      PACK_OBSERVATIONS = True
+    memmap      MemmapPrioritizedReplayBuffer in a temporary directory
+
+Results are written as JSON (with environment metadata) and CSV, one row
+per (backend, capacity, batch_size, op). Per-call operations that do not
+depend on the batch size (add, update, get) are reported once per
+(backend, capacity) with batch_size 1. Pass --baseline with an earlier JSON
+to print per-row speed ratios for regression checks.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_replay_suite
+    python -m run.benchmarking.benchmark_replay_suite --capacities 50000 \\
+        --batch-sizes 32 4096 --backends memory memmap
+    python -m run.benchmarking.benchmark_replay_suite --baseline old.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.observation_codec import ObservationCodec
+from controls.ml_based.drl.prefetcher import batch_to_tensors
+from controls.ml_based.drl.replay_buffer import (
+    MemmapPrioritizedReplayBuffer,
+    PrioritizedReplayBuffer,
+    SumTree,
+)
+
+DEFAULT_CAPACITIES = [10_000, 100_000, 1_000_000]
+DEFAULT_BATCH_SIZES = [32, 64, 256, 1024, 4096]
+
+# Backend name → DRLConfig overrides (memmap also switches the buffer class)
+BACKENDS = {
+    "memory": {},
+    "float32": {"SUM_TREE_DTYPE": "float32"},
+    "packed": {"PACK_OBSERVATIONS": True},
+    "memmap": {},
+}
+
+FIELDS = ["backend", "capacity", "batch_size", "op", "us_per_call", "items_per_sec"]
+
+
+def _states(rng, n):
+    """Synthetic observations: random continuous features, 0/1 flags."""
+    states = rng.random((n, DRLConfig.STATE_DIM), dtype=np.float32)
+    binary = ObservationCodec.for_traffic_state(DRLConfig.STATE_DIM).binary_index
+    states[:, binary] = np.round(states[:, binary])
+    return states
+
+
+def _time(fn, repeats, rounds=3):
+    """Best-of-rounds mean microseconds per call."""
+    fn()  # Warm up caches and lazy allocations
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best * 1e6
+
+
+def _make_buffer(backend, capacity, directory):
+    overrides = BACKENDS[backend]
+    saved = {name: getattr(DRLConfig, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(DRLConfig, name, value)
+    try:
+        if backend == "memmap":
+            return MemmapPrioritizedReplayBuffer(
+                capacity, DRLConfig.STATE_DIM, directory=directory, reservoir_size=0
+            )
+        return PrioritizedReplayBuffer(capacity, DRLConfig.STATE_DIM, reservoir_size=0)
+    finally:
+        for name, value in saved.items():
+            setattr(DRLConfig, name, value)
+
+
+def _prefill(buffer, rng, chunk=65_536):
+    """Fill the ring as one long episode, then rebuild the tree once."""
+    capacity = buffer.capacity
+    for start in range(0, capacity, chunk):
+        stop = min(start + chunk, capacity)
+        buffer.observations[start:stop] = buffer._encode(_states(rng, stop - start))
+    buffer.actions[:capacity] = rng.integers(DRLConfig.ACTION_DIM, size=capacity)
+    buffer.rewards[:capacity] = rng.normal(size=capacity)
+    buffer.valid[1:capacity] = True
+    priorities = (rng.exponential(1.0, size=capacity) + buffer.epsilon) ** buffer.alpha
+    priorities[0] = 0.0  # Slot 0 holds the pending next_state
+    buffer.tree.tree[buffer.tree.capacity - 1 :] = priorities
+    buffer.tree.rebuild()
+    buffer.n_entries = capacity - 1
+    buffer.write_index = 0
+    buffer.has_pending_frame = True
+
+
+def bench_sum_tree(backend, capacity, batch_sizes, repeats, rng):
+    """SumTree operations on a full tree of the backend's dtype."""
+    dtype = np.float32 if backend == "float32" else np.float64
+    tree = SumTree(
+        capacity,
+        np.zeros(2 * capacity - 1, dtype=dtype),
+        np.zeros(2 * capacity - 1, dtype=dtype),
+    )
+    tree.tree[capacity - 1 :] = rng.exponential(1.0, size=capacity)
+    tree.rebuild()
+    total = float(tree.total())
+    leaves = capacity - 1 + rng.integers(capacity, size=repeats + 1)
+    values = rng.random(repeats + 1) * total
+    step = iter(range(10**12))
+
+    rows = [
+        ("tree_add", 1, _time(lambda: tree.add(1.0), repeats)),
+        (
+            "tree_update",
+            1,
+            _time(lambda: tree.update(leaves[next(step) % repeats], 1.0), repeats),
+        ),
+        ("tree_get", 1, _time(lambda: tree.get(values[next(step) % repeats]), repeats)),
+    ]
+    for batch_size in batch_sizes:
+        batch_values = rng.random(batch_size) * total
+        batch_leaves = capacity - 1 + rng.integers(capacity, size=batch_size)
+        batch_priorities = rng.exponential(1.0, size=batch_size)
+        rows.append(
+            ("tree_get_batch", batch_size, _time(lambda: tree.get_batch(batch_values), repeats))
+        )
+        rows.append(
+            (
+                "tree_update_batch",
+                batch_size,
+                _time(lambda: tree.update_batch(batch_leaves, batch_priorities), repeats),
+            )
+        )
+    return rows
+
+
+def bench_buffer(backend, capacity, batch_sizes, repeats, rng, directory):
+    """Buffer add / sample / update_priorities and tensor conversion."""
+    buffer = _make_buffer(backend, capacity, directory)
+    _prefill(buffer, rng)
+    states = _states(rng, repeats + 2)
+    step = iter(range(10**12))
+
+    def add():
+        i = next(step) % repeats
+        buffer.add(states[i], 1, 0.5, states[i + 1], False, 1.0)
+
+    rows = [("buffer_add", 1, _time(add, repeats))]
+    for batch_size in batch_sizes:
+        batch, indices, weights = buffer.sample(batch_size)
+        errors = rng.exponential(1.0, size=batch_size)
+        rows.append(
+            ("buffer_sample", batch_size, _time(lambda: buffer.sample(batch_size), repeats))
+        )
+        rows.append(
+            (
+                "buffer_update_priorities",
+                batch_size,
+                _time(lambda: buffer.update_priorities(indices, errors), repeats),
+            )
+        )
+        rows.append(
+            (
+                "batch_to_tensors",
+                batch_size,
+                _time(lambda: batch_to_tensors(batch, weights, "cpu"), repeats),
+            )
+        )
+    del buffer
+    return rows
+
+
+def run_suite(capacities, batch_sizes, backends, repeats, seed):
+    """
+    Returns:
+        list: One dict per measurement (keys: FIELDS)
+    """
+    results = []
+    for backend in backends:
+        for capacity in capacities:
+            random.seed(seed)
+            rng = np.random.default_rng(seed)
+            with tempfile.TemporaryDirectory() as directory:
+                measured = bench_sum_tree(backend, capacity, batch_sizes, repeats, rng)
+                measured += bench_buffer(
+                    backend, capacity, batch_sizes, repeats, rng, directory
+                )
+            for op, batch_size, us in measured:
+                results.append(
+                    {
+                        "backend": backend,
+                        "capacity": capacity,
+                        "batch_size": batch_size,
+                        "op": op,
+                        "us_per_call": round(us, 3),
+                        "items_per_sec": round(batch_size / us * 1e6, 1),
+                    }
+                )
+                print(
+                    f"{backend:>8} {capacity:>10,} {batch_size:>6} "
+                    f"{op:<26} {us:>10.2f} µs"
+                )
+    return results
+
+
+def _metadata(args):
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "state_dim": DRLConfig.STATE_DIM,
+        "repeats": args.repeats,
+        "seed": args.seed,
+    }
+
+
+def _compare(results, baseline_path):
+    """Print current / baseline time per matching row (> 1 = slower now)."""
+    with open(baseline_path) as f:
+        baseline = {
+            (r["backend"], r["capacity"], r["batch_size"], r["op"]): r["us_per_call"]
+            for r in json.load(f)["results"]
+        }
+    print(f"\nRatio to baseline {baseline_path} (current / baseline time):")
+    for r in results:
+        key = (r["backend"], r["capacity"], r["batch_size"], r["op"])
+        if key in baseline:
+            ratio = r["us_per_call"] / baseline[key]
+            flag = "  ← slower" if ratio > 1.2 else ""
+            print(f"  {key[0]:>8} {key[1]:>10,} {key[2]:>6} {key[3]:<26} {ratio:6.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay-path micro-benchmarks")
+    parser.add_argument("--capacities", type=int, nargs="+", default=DEFAULT_CAPACITIES)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument(
+        "--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS)
+    )
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=os.path.join("results", "benchmarks"))
+    parser.add_argument("--baseline", help="Earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("REPLAY-PATH MICRO-BENCHMARK SUITE")
+    print("=" * 70)
+    results = run_suite(
+        args.capacities, args.batch_sizes, args.backends, args.repeats, args.seed
+    )
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.join(
+        args.output_dir, f"replay_suite_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    with open(stem + ".json", "w") as f:
+        json.dump({"metadata": _metadata(args), "results": results}, f, indent=2)
+    with open(stem + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"\nResults: {stem}.json, {stem}.csv")
+
+    if args.baseline:
+        _compare(results, args.baseline)
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark multi-process experience collection into the replay buffer (no SUMO required)
+
+Actor processes generate synthetic transitions (each env step costs
+--step-ms of busy CPU time, standing in for one SUMO step) and append them
+to SharedTransitionQueues; the learner drains the queues into a DQNAgent
+and trains once per UPDATE_FREQUENCY ingested transitions. Reports ingested
+transitions/s and train calls/s for 1 actor and for --actors actors.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_shared_replay
+    python -m run.benchmarking.benchmark_shared_replay --actors 8 --seconds 20
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from constants.constants import UPDATE_FREQUENCY
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.shared_replay import SharedReplayHub
+
+
+def _actor(queue, seed, step_ms, stop):
+    """Synthetic rollout: busy-wait step_ms per step, then queue.put()."""
+    rng = np.random.default_rng(seed)
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    while not stop.is_set():
+        deadline = time.perf_counter() + step_ms / 1e3
+        while time.perf_counter() < deadline:
+            pass
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        try:
+            queue.put(state, action, float(rng.normal()), next_state, False, timeout=0.5)
+        except TimeoutError:
+            continue
+        state = next_state
+    queue.close()
+
+
+def _run(n_actors, seconds, step_ms, seed):
+    """
+    Returns:
+        tuple: (transitions per second, train calls per second)
+    """
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    hub = SharedReplayHub(n_actors, queue_capacity=4096, state_dim=DRLConfig.STATE_DIM)
+    stop = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(target=_actor, args=(queue, seed + i, step_ms, stop))
+        for i, queue in enumerate(hub.queues)
+    ]
+    for worker in workers:
+        worker.start()
+
+    train_calls = 0
+    pending = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        moved = hub.drain_into(agent)
+        pending += moved
+        while pending >= UPDATE_FREQUENCY:
+            pending -= UPDATE_FREQUENCY
+            if agent.train() is not None:
+                train_calls += 1
+        if moved == 0:
+            time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for worker in workers:
+        worker.join()
+    hub.close()
+    return hub.drained / elapsed, train_calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared-memory ingest")
+    parser.add_argument("--actors", type=int, default=max(2, os.cpu_count() - 1))
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--step-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("SHARED-MEMORY REPLAY INGEST BENCHMARK")
+    print("=" * 70)
+    print(
+        f"cpus={os.cpu_count()}, env step={args.step_ms} ms, "
+        f"UPDATE_FREQUENCY={UPDATE_FREQUENCY}, {args.seconds:.0f} s per run\n"
+    )
+    print(f"{'actors':>8} | {'transitions/s':>14} | {'train calls/s':>14}")
+    print("-" * 44)
+    for n_actors in sorted({1, args.actors}):
+        transitions, trains = _run(n_actors, args.seconds, args.step_ms, args.seed)
+        print(f"{n_actors:>8} | {transitions:>14,.0f} | {trains:>14,.1f}")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
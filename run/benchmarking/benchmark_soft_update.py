@@ -0,0 +1,102 @@
+"""
+Benchmark the fused soft target update (no SUMO required)
+
+Compares one Polyak update done as the former per-parameter Python loop
+(TAU * p + (1 - TAU) * t, with temporaries) against the fused lerp_ over
+flat parameter buffers, and measures train() time with
+TARGET_UPDATE_FREQUENCY = 500 vs 1.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_soft_update
+    python -m run.benchmarking.benchmark_soft_update --updates 20000 --calls 1000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+import torch
+
+import controls.ml_based.drl.agent as agent_module
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+
+
+def _loop_update(agent):
+    """The per-parameter update soft_update_target_network() used before."""
+    for target_param, policy_param in zip(
+        agent.target_net.parameters(), agent.policy_net.parameters()
+    ):
+        target_param.data.copy_(
+            DRLConfig.TAU * policy_param.data + (1 - DRLConfig.TAU) * target_param.data
+        )
+
+
+def _time_updates(update, agent, n):
+    """Microseconds per soft update."""
+    update(agent)
+    start = time.perf_counter()
+    for _ in range(n):
+        update(agent)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def _time_train(frequency, calls, seed):
+    """Milliseconds per train() call with the given update frequency."""
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    for _ in range(DRLConfig.MIN_BUFFER_SIZE * 2):
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        agent.store_experience(state, action, float(rng.normal()), next_state, False, {})
+        state = next_state
+
+    saved = agent_module.TARGET_UPDATE_FREQUENCY
+    agent_module.TARGET_UPDATE_FREQUENCY = frequency
+    try:
+        agent.train()
+        start = time.perf_counter()
+        for _ in range(calls):
+            agent.train()
+        elapsed = time.perf_counter() - start
+    finally:
+        agent_module.TARGET_UPDATE_FREQUENCY = saved
+    return elapsed / calls * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark soft target updates")
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    n_parameters = agent.policy_flat.numel()
+
+    print("\n" + "=" * 70)
+    print("SOFT TARGET UPDATE BENCHMARK")
+    print("=" * 70)
+    print(f"parameters={n_parameters:,}, torch threads={torch.get_num_threads()}\n")
+
+    loop = _time_updates(_loop_update, agent, args.updates)
+    fused = _time_updates(DQNAgent.soft_update_target_network, agent, args.updates)
+    print(f"  per-parameter loop: {loop:8.2f} µs/update")
+    print(f"  fused lerp_:        {fused:8.2f} µs/update ({loop / fused:.1f}x)")
+
+    every_500 = _time_train(500, args.calls, args.seed)
+    every_step = _time_train(1, args.calls, args.seed)
+    print(f"\n  train(), TARGET_UPDATE_FREQUENCY=500: {every_500:7.3f} ms/call")
+    print(f"  train(), TARGET_UPDATE_FREQUENCY=1:   {every_step:7.3f} ms/call")
+    print(f"  overhead of per-step updates:         {(every_step / every_500 - 1) * 100:6.1f} %")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark subscription-based observations in TrafficManagement (needs SUMO)
+
+Runs the same scenario twice with a fixed action sequence, once with
+per-value TraCI queries and once with StateSubscriptions, and reports TraCI
+round trips per step (inside _get_state() and in total), observation time and
+steps/s. The two runs' observations are compared bit for bit.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_state_subscriptions
+    python -m run.benchmarking.benchmark_state_subscriptions --scenario Pe_3 --steps 3600
+    python -m run.benchmarking.benchmark_state_subscriptions --backend libsumo
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+import types
+
+import numpy as np
+
+from common.sumo_utils import setup_environment
+
+project_root, _ = setup_environment()
+
+from common.utils import clean_route_directory  # noqa: E402
+from controls.ml_based.drl.traffic_management import TrafficManagement  # noqa: E402
+from route_generator import generate_all_routes_developed  # noqa: E402
+from route_generator.traffic_config import get_traffic_config  # noqa: E402
+
+SUMO_CONFIG = "configurations/developed/drl/single_agent/signal_sync.sumocfg"
+TLS_IDS = ["3", "6"]
+
+# Served from the client-side subscription store, no round trip
+LOCAL_CALLS = ("getSubscriptionResults", "getAllSubscriptionResults")
+
+
+class CountingTraci:
+    """Proxy for the traci (or libsumo) module that counts calls into SUMO."""
+
+    def __init__(self, traci):
+        self._traci = traci
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self._traci, name)
+        if isinstance(attribute, types.ModuleType):
+            return attribute
+        # traci domains are objects, libsumo domains are classes
+        if callable(attribute) and not isinstance(attribute, type):
+            return self._counted(attribute, name)
+        return _CountingDomain(attribute, self)
+
+    def _counted(self, function, name):
+        def call(*args, **kwargs):
+            if name not in LOCAL_CALLS:
+                self.calls += 1
+            return function(*args, **kwargs)
+
+        return call
+
+
+class _CountingDomain:
+    def __init__(self, domain, counter):
+        self._domain = domain
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attribute = getattr(self._domain, name)
+        if callable(attribute):
+            return self._counter._counted(attribute, name)
+        return attribute
+
+
+def _action(step):
+    """Fixed action sequence, identical for both runs."""
+    return (0, 2, 0, 0, 1, 0, 2)[step % 7] if step % 5 == 0 else 0
+
+
+def _run(subscriptions, steps, backend):
+    """
+    Returns:
+        dict: states, state_calls, total_calls, state_ms, steps_per_sec
+    """
+    env = TrafficManagement(
+        SUMO_CONFIG,
+        TLS_IDS,
+        simulation_limit=steps,
+        is_training=False,
+        subscriptions=subscriptions,
+        backend=backend,
+    )
+    counter = CountingTraci(None)
+    start_simulation = env._start_simulation
+
+    def counted_start_simulation():
+        start_simulation()
+        if env.traci is not counter:
+            counter._traci = env.traci
+            env.traci = counter
+
+    env._start_simulation = counted_start_simulation
+    get_state = env._get_state
+    state_calls = 0
+    state_seconds = 0.0
+
+    def timed_get_state():
+        nonlocal state_calls, state_seconds
+        before = counter.calls
+        start = time.perf_counter()
+        state = get_state()
+        state_seconds += time.perf_counter() - start
+        state_calls += counter.calls - before
+        return state
+
+    env._get_state = timed_get_state
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        states = [env.reset()]
+        state_calls = 0
+        state_seconds = 0.0
+        counter.calls = 0
+        start = time.perf_counter()
+        for step in range(steps):
+            state, _, done, _ = env.step(_action(step))
+            states.append(state)
+            if done:
+                break
+        elapsed = time.perf_counter() - start
+        env.close()
+
+    n = len(states) - 1
+    return {
+        "states": np.array(states),
+        "state_calls": state_calls / n,
+        "total_calls": counter.calls / n,
+        "state_ms": state_seconds / n * 1e3,
+        "steps_per_sec": n / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TraCI subscriptions")
+    parser.add_argument("--scenario", default="Pr_9")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--backend", choices=("traci", "libsumo"), default="traci")
+    args = parser.parse_args()
+
+    os.chdir(project_root)
+    clean_route_directory(verbose=False)
+    generate_all_routes_developed(get_traffic_config(scenario=args.scenario), args.steps)
+
+    queried = _run(False, args.steps, args.backend)
+    subscribed = _run(True, args.steps, args.backend)
+    identical = queried["states"].shape == subscribed["states"].shape and np.array_equal(
+        queried["states"].view(np.uint32), subscribed["states"].view(np.uint32)
+    )
+
+    print("\n" + "=" * 70)
+    print(f"TRACI SUBSCRIPTION BENCHMARK ({args.scenario}, {args.steps} steps, {args.backend})")
+    print("=" * 70)
+    print(f"{'':>14} | {'state calls':>11} | {'total calls':>11} | {'state ms':>8} | {'steps/s':>8}")
+    print("-" * 66)
+    for name, result in (("queries", queried), ("subscriptions", subscribed)):
+        print(
+            f"{name:>14} | {result['state_calls']:>11.1f} | {result['total_calls']:>11.1f} | "
+            f"{result['state_ms']:>8.3f} | {result['steps_per_sec']:>8.1f}"
+        )
+    print(f"\nObservations bit-identical: {'yes' if identical else 'NO'}")
+    print("(calls are TraCI round trips per step; total includes RewardCalculator)")
+    print("=" * 70 + "\n")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
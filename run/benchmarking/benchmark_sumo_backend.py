@@ -0,0 +1,107 @@
+"""
+Benchmark the TraCI and libsumo backends of TrafficManagement (needs SUMO)
+
+Runs the same scenario with a fixed action sequence once per backend and
+reports reset() time (SUMO startup + connection) and env steps/s. The two
+runs' observations and rewards are compared bit for bit.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_sumo_backend
+    python -m run.benchmarking.benchmark_sumo_backend --scenario Pe_3 --steps 3600
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import numpy as np
+
+from common.sumo_utils import setup_environment
+
+project_root, _ = setup_environment()
+
+from common.utils import clean_route_directory  # noqa: E402
+from controls.ml_based.drl.traffic_management import TrafficManagement  # noqa: E402
+from route_generator import generate_all_routes_developed  # noqa: E402
+from route_generator.traffic_config import get_traffic_config  # noqa: E402
+
+SUMO_CONFIG = "configurations/developed/drl/single_agent/signal_sync.sumocfg"
+TLS_IDS = ["3", "6"]
+BACKENDS = ("traci", "libsumo")
+
+
+def _action(step):
+    """Fixed action sequence, identical for both runs."""
+    return (0, 2, 0, 0, 1, 0, 2)[step % 7] if step % 5 == 0 else 0
+
+
+def _run(backend, steps):
+    """
+    Returns:
+        dict: states, rewards, reset_sec, steps_per_sec
+    """
+    env = TrafficManagement(
+        SUMO_CONFIG, TLS_IDS, simulation_limit=steps, is_training=False, backend=backend
+    )
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        start = time.perf_counter()
+        states = [env.reset()]
+        reset_sec = time.perf_counter() - start
+
+        rewards = []
+        start = time.perf_counter()
+        for step in range(steps):
+            state, reward, done, _ = env.step(_action(step))
+            states.append(state)
+            rewards.append(reward)
+            if done:
+                break
+        elapsed = time.perf_counter() - start
+        env.close()
+
+    return {
+        "states": np.array(states),
+        "rewards": np.array(rewards),
+        "reset_sec": reset_sec,
+        "steps_per_sec": len(rewards) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SUMO backends")
+    parser.add_argument("--scenario", default="Pr_9")
+    parser.add_argument("--steps", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.chdir(project_root)
+    clean_route_directory(verbose=False)
+    generate_all_routes_developed(get_traffic_config(scenario=args.scenario), args.steps)
+
+    results = {backend: _run(backend, args.steps) for backend in BACKENDS}
+    traci_run, libsumo_run = results["traci"], results["libsumo"]
+    identical = (
+        traci_run["states"].shape == libsumo_run["states"].shape
+        and np.array_equal(traci_run["states"], libsumo_run["states"])
+        and np.array_equal(traci_run["rewards"], libsumo_run["rewards"])
+    )
+
+    print("\n" + "=" * 70)
+    print(f"SUMO BACKEND BENCHMARK ({args.scenario}, {args.steps} steps)")
+    print("=" * 70)
+    print(f"{'backend':>10} | {'reset s':>8} | {'steps/s':>8} | {'speedup':>7}")
+    print("-" * 44)
+    for backend, result in results.items():
+        speedup = result["steps_per_sec"] / traci_run["steps_per_sec"]
+        print(
+            f"{backend:>10} | {result['reset_sec']:>8.3f} | "
+            f"{result['steps_per_sec']:>8.1f} | {speedup:>6.2f}x"
+        )
+    print(f"\nObservations and rewards bit-identical: {'yes' if identical else 'NO'}")
+    print("=" * 70 + "\n")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark per-episode SUMO restart: relaunch vs persistent load() (needs SUMO)
+
+Runs several short episodes, each on freshly generated routes (seeded, so
+both modes see the same traffic), once relaunching SUMO per episode and once
+with persistent=True, where close() keeps SUMO running and the next reset()
+starts the episode with load(). Reports the per-episode overhead (reset() +
+close()) and compares the episodes' observations bit for bit.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_sumo_restart
+    python -m run.benchmarking.benchmark_sumo_restart --backend libsumo --episodes 10
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from common.sumo_utils import setup_environment
+
+project_root, _ = setup_environment()
+
+from common.utils import clean_route_directory  # noqa: E402
+from controls.ml_based.drl.traffic_management import (  # noqa: E402
+    TrafficManagement,
+    close_idle_simulations,
+)
+from route_generator import generate_all_routes_developed  # noqa: E402
+from route_generator.traffic_config import get_traffic_config  # noqa: E402
+
+SUMO_CONFIG = "configurations/developed/drl/single_agent/signal_sync.sumocfg"
+TLS_IDS = ["3", "6"]
+SCENARIOS = ("Pr_0", "Pr_5", "Pr_9", "Bi_5", "Pe_5")
+
+
+def _action(step):
+    """Fixed action sequence, identical for every episode."""
+    return (0, 2, 0, 0, 1, 0, 2)[step % 7] if step % 5 == 0 else 0
+
+
+def _run(persistent, backend, episodes, steps):
+    """
+    Returns:
+        dict: states (one array per episode), reset_sec, close_sec
+    """
+    env = TrafficManagement(
+        SUMO_CONFIG,
+        TLS_IDS,
+        simulation_limit=steps,
+        is_training=False,
+        backend=backend,
+        persistent=persistent,
+    )
+    states, reset_sec, close_sec = [], [], []
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for episode in range(episodes):
+            random.seed(episode)
+            clean_route_directory(verbose=False)
+            scenario = SCENARIOS[episode % len(SCENARIOS)]
+            generate_all_routes_developed(get_traffic_config(scenario=scenario), steps)
+
+            start = time.perf_counter()
+            episode_states = [env.reset()]
+            reset_sec.append(time.perf_counter() - start)
+            for step in range(steps):
+                episode_states.append(env.step(_action(step))[0])
+            start = time.perf_counter()
+            env.close()
+            close_sec.append(time.perf_counter() - start)
+            states.append(np.array(episode_states))
+        close_idle_simulations()
+
+    return {
+        "states": states,
+        "reset_sec": np.array(reset_sec),
+        "close_sec": np.array(close_sec),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SUMO episode restarts")
+    parser.add_argument("--backend", choices=("traci", "libsumo"), default="traci")
+    parser.add_argument("--episodes", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args()
+
+    os.chdir(project_root)
+    relaunch = _run(False, args.backend, args.episodes, args.steps)
+    persistent = _run(True, args.backend, args.episodes, args.steps)
+    identical = all(
+        np.array_equal(a, b) for a, b in zip(relaunch["states"], persistent["states"])
+    )
+
+    print("\n" + "=" * 70)
+    print(f"SUMO RESTART BENCHMARK ({args.backend}, {args.episodes} episodes)")
+    print("=" * 70)
+    print(f"{'mode':>11} | {'reset s':>8} | {'close s':>8} | {'overhead s':>10}")
+    print("-" * 47)
+    for name, result in (("relaunch", relaunch), ("persistent", persistent)):
+        # First reset launches SUMO in both modes; report the warm episodes
+        reset = result["reset_sec"][1:].mean()
+        close = result["close_sec"][1:].mean()
+        print(f"{name:>11} | {reset:>8.3f} | {close:>8.3f} | {reset + close:>10.3f}")
+    print("(mean per episode, excluding the first)")
+    print(f"\nObservations bit-identical: {'yes' if identical else 'NO'}")
+    print("=" * 70 + "\n")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark SUMO startup latency and concurrent simulations (needs SUMO)
+
+Startup: time from launching SUMO to a usable TraCI connection, for
+    fixed sleep   Popen + time.sleep(2) + traci.init(port)  (former reset())
+    traci.start   traci's own launcher (retries once per second)
+    start_sumo    free port + connection polled every 50 ms (common.sumo_utils)
+
+Concurrency: runs the same scenario with a fixed action sequence in several
+TrafficManagement instances at once, interleaved in one process and in
+separate processes, and checks every trajectory against a solo run.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_sumo_startup
+    python -m run.benchmarking.benchmark_sumo_startup --repeats 10 --instances 4
+"""
+
+import argparse
+import contextlib
+import multiprocessing as mp
+import os
+import subprocess
+import time
+
+import numpy as np
+
+from common.sumo_utils import setup_environment
+
+project_root, _ = setup_environment()
+
+import traci  # noqa: E402
+
+from common.sumo_utils import start_sumo  # noqa: E402
+from common.utils import clean_route_directory  # noqa: E402
+from controls.ml_based.drl.traffic_management import TrafficManagement  # noqa: E402
+from route_generator import generate_all_routes_developed  # noqa: E402
+from route_generator.traffic_config import get_traffic_config  # noqa: E402
+
+SUMO_CONFIG = "configurations/developed/drl/single_agent/signal_sync.sumocfg"
+SUMO_CMD = ["sumo", "-c", SUMO_CONFIG]
+TLS_IDS = ["3", "6"]
+
+
+def _fixed_sleep():
+    port = traci.getFreeSocketPort()
+    process = subprocess.Popen(SUMO_CMD + ["--remote-port", str(port)])
+    time.sleep(2)
+    traci.init(port, label="fixed_sleep")
+    return traci.getConnection("fixed_sleep"), process
+
+
+def _traci_start():
+    traci.start(SUMO_CMD, label="traci_start")
+    return traci.getConnection("traci_start"), None
+
+
+def _start_sumo():
+    return start_sumo(SUMO_CMD)
+
+
+def _startup_seconds(launch, repeats):
+    """Seconds from launch to first simulation step, one value per repeat."""
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        connection, _ = launch()
+        connection.simulationStep()
+        seconds.append(time.perf_counter() - start)
+        connection.close()
+    return np.array(seconds)
+
+
+def _action(step):
+    """Fixed action sequence, identical for every instance."""
+    return (0, 2, 0, 0, 1, 0, 2)[step % 7] if step % 5 == 0 else 0
+
+
+def _trajectories(instances, steps):
+    """Step instances TrafficManagement envs in lockstep in this process."""
+    envs = [
+        TrafficManagement(SUMO_CONFIG, TLS_IDS, simulation_limit=steps, is_training=False)
+        for _ in range(instances)
+    ]
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        states = [[env.reset()] for env in envs]
+        for step in range(steps):
+            for env, env_states in zip(envs, states):
+                env_states.append(env.step(_action(step))[0])
+        for env in envs:
+            env.close()
+    return [np.array(env_states) for env_states in states]
+
+
+def _solo_trajectory(steps):
+    return _trajectories(1, steps)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SUMO startup")
+    parser.add_argument("--scenario", default="Pr_9")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--instances", type=int, default=3)
+    args = parser.parse_args()
+
+    os.chdir(project_root)
+    clean_route_directory(verbose=False)
+    generate_all_routes_developed(get_traffic_config(scenario=args.scenario), args.steps)
+
+    print("\n" + "=" * 70)
+    print(f"SUMO STARTUP BENCHMARK ({args.scenario})")
+    print("=" * 70)
+    print(f"{'launcher':>12} | {'mean s':>7} | {'min s':>7} | {'max s':>7}")
+    print("-" * 44)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        results = {
+            name: _startup_seconds(launch, args.repeats)
+            for name, launch in (
+                ("fixed sleep", _fixed_sleep),
+                ("traci.start", _traci_start),
+                ("start_sumo", _start_sumo),
+            )
+        }
+    for name, seconds in results.items():
+        print(f"{name:>12} | {seconds.mean():>7.3f} | {seconds.min():>7.3f} | {seconds.max():>7.3f}")
+
+    reference = _solo_trajectory(args.steps)
+    start = time.perf_counter()
+    in_process = _trajectories(args.instances, args.steps)
+    in_process_sec = time.perf_counter() - start
+    start = time.perf_counter()
+    with mp.get_context("spawn").Pool(args.instances) as pool:
+        across_processes = pool.map(_solo_trajectory, [args.steps] * args.instances)
+    across_sec = time.perf_counter() - start
+
+    print(f"\n{args.instances} concurrent simulations x {args.steps} steps:")
+    for name, runs, seconds in (
+        ("one process", in_process, in_process_sec),
+        ("processes", across_processes, across_sec),
+    ):
+        identical = all(np.array_equal(run, reference) for run in runs)
+        print(
+            f"  {name:>12}: {seconds:6.2f} s, "
+            f"trajectories match a solo run: {'yes' if identical else 'NO'}"
+        )
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark the target-network Q-value cache (no SUMO required)
+
+Runs the same synthetic training loop (store_experience every step, train()
+every UPDATE_FREQUENCY steps) with DRLConfig.TARGET_Q_CACHE off and on from
+the same seed, and reports:
+
+    - rows evaluated by target_net (TD-error init + Double-DQN targets)
+    - cache hit rate and wall-clock time
+    - loss curves of both runs, compared in windows
+    - largest difference between cached and freshly computed target Q-values
+
+Cached values come from forward passes over different row subsets, so they
+can differ from a full-batch recomputation in the last float32 bit; PER
+sampling then drifts apart, which is why loss curves are compared in windows
+rather than step by step.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_target_cache
+    python -m run.benchmarking.benchmark_target_cache --steps 20000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+import torch
+
+from constants.constants import UPDATE_FREQUENCY
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+
+EPISODE_LENGTH = 3600
+
+
+def _run(use_cache, steps, seed):
+    """
+    Train on synthetic transitions from a fixed seed.
+
+    Returns:
+        tuple: (agent, losses, seconds)
+    """
+    DRLConfig.TARGET_Q_CACHE = use_cache
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    losses = []
+
+    start = time.perf_counter()
+    for step in range(steps):
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        done = (step + 1) % EPISODE_LENGTH == 0
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        agent.store_experience(state, action, float(rng.normal()), next_state, done, {})
+        state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32) if done else next_state
+
+        if step % UPDATE_FREQUENCY == 0:
+            loss = agent.train()
+            if loss is not None:
+                losses.append(loss)
+    return agent, np.array(losses), time.perf_counter() - start
+
+
+def _max_cache_error(agent, batch_size=1024):
+    """Largest |cached - recomputed| target Q-value over one sampled batch."""
+    batch, indices, _ = agent.memory.sample(batch_size)
+    generations = agent.memory.slot_generations(indices)
+    next_states = torch.from_numpy(batch[3])
+    horizons = torch.from_numpy(batch[5]).long()
+    with torch.no_grad():
+        cached = agent._target_q_values(indices, generations, next_states, horizons)
+        fresh = agent.target_net(next_states)
+    return (cached - fresh).abs().max().item()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the target Q cache")
+    parser.add_argument("--steps", type=int, default=12000)
+    parser.add_argument("--window", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cache_setting = DRLConfig.TARGET_Q_CACHE
+    base, base_losses, base_time = _run(False, args.steps, args.seed)
+    cached, cached_losses, cached_time = _run(True, args.steps, args.seed)
+    max_error = _max_cache_error(cached)
+    DRLConfig.TARGET_Q_CACHE = cache_setting
+
+    print("\n" + "=" * 70)
+    print("TARGET Q-VALUE CACHE BENCHMARK")
+    print("=" * 70)
+    print(
+        f"env steps={args.steps}, train calls={len(base_losses)}, "
+        f"batch={DRLConfig.BATCH_SIZE}\n"
+    )
+    print(f"{'':>14} | {'target rows':>12} | {'time (s)':>9}")
+    print("-" * 42)
+    print(f"{'no cache':>14} | {base.target_forward_rows:>12,} | {base_time:>9.2f}")
+    print(f"{'cache':>14} | {cached.target_forward_rows:>12,} | {cached_time:>9.2f}")
+    reduction = 1 - cached.target_forward_rows / base.target_forward_rows
+    print(f"\nTarget forward rows reduced by {reduction * 100:.1f}%")
+    print(f"Cache: {cached.target_cache.stats()}")
+    print(f"Max |cached - recomputed| target Q: {max_error:.2e}\n")
+
+    print(f"Loss per {args.window}-call window (no cache / cache):")
+    for start in range(0, len(base_losses), args.window):
+        window = slice(start, start + args.window)
+        print(
+            f"  calls {start:>5}-{start + args.window - 1:<5} "
+            f"{base_losses[window].mean():.5f} / {cached_losses[window].mean():.5f}"
+        )
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
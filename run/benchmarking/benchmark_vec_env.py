@@ -0,0 +1,89 @@
+"""
+Benchmark VecTrafficManagement scaling with the number of workers (needs SUMO)
+
+Steps N environments (one worker process and SUMO instance each) with a
+fixed action sequence and reports env steps/s (N x batched steps / wall
+time), speedup over N = 1 and parallel efficiency. Scaling is bounded by
+the number of cores: each worker keeps one busy.
+
+Usage (from the repository root):
+    python -m run.benchmarking.benchmark_vec_env
+    python -m run.benchmarking.benchmark_vec_env --envs 1 2 4 8 16 32 --backend libsumo
+"""
+
+import argparse
+import os
+import time
+
+from common.sumo_utils import setup_environment
+
+project_root, _ = setup_environment()
+
+from controls.ml_based.drl.config import DRLConfig  # noqa: E402
+from controls.ml_based.drl.vec_env import VecTrafficManagement  # noqa: E402
+from route_generator.traffic_config import get_traffic_config  # noqa: E402
+
+SUMO_CONFIG = "configurations/developed/drl/single_agent/signal_sync.sumocfg"
+TLS_IDS = ["3", "6"]
+
+
+def _action(step):
+    """Fixed action sequence, identical for every environment."""
+    return (0, 2, 0, 0, 1, 0, 2)[step % 7] if step % 5 == 0 else 0
+
+
+def _steps_per_sec(num_envs, steps, scenario, backend):
+    envs = VecTrafficManagement(
+        num_envs,
+        SUMO_CONFIG,
+        TLS_IDS,
+        simulation_limit=steps,
+        traffic_config=get_traffic_config(scenario=scenario),
+        seed=0,
+        is_training=False,
+        backend=backend,
+    )
+    try:
+        envs.reset()
+        start = time.perf_counter()
+        for step in range(steps):
+            envs.step([_action(step)] * num_envs)
+        elapsed = time.perf_counter() - start
+    finally:
+        envs.close()
+    return num_envs * steps / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VecTrafficManagement")
+    parser.add_argument("--envs", type=int, nargs="+", default=None)
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--scenario", default="Pr_9")
+    parser.add_argument(
+        "--backend", choices=("traci", "libsumo"), default=DRLConfig.SUMO_BACKEND
+    )
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    env_counts = args.envs or sorted({1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1)))
+
+    os.chdir(project_root)
+    print("\n" + "=" * 70)
+    print(f"VECTORIZED ENV BENCHMARK ({args.scenario}, {args.backend}, {cores} cores)")
+    print("=" * 70)
+    print(f"{'envs':>5} | {'env steps/s':>11} | {'speedup':>7} | {'efficiency':>10}")
+    print("-" * 44)
+    baseline = None
+    for num_envs in env_counts:
+        rate = _steps_per_sec(num_envs, args.steps, args.scenario, args.backend)
+        baseline = baseline or rate / num_envs
+        speedup = rate / baseline
+        print(
+            f"{num_envs:>5} | {rate:>11.1f} | {speedup:>6.2f}x | "
+            f"{speedup / num_envs * 100:>9.1f}%"
+        )
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ from tqdm import tqdm  # noqa: E402
 from controls.ml_based.drl.agent import DQNAgent  # noqa: E402
 from controls.ml_based.drl.traffic_management import TrafficManagement  # noqa: E402
 from controls.ml_based.drl.config import DRLConfig  # noqa: E402
+from controls.ml_based.drl.observation_codec import save_states  # noqa: E402
 from route_generator.traffic_config import get_traffic_config  # noqa: E402
 from route_generator import generate_all_routes_developed  # noqa: E402
 from common.utils import clean_route_directory  # noqa: E402
@@ -101,9 +102,9 @@ class TestLogger:
             actions_array = np.array(self.all_actions)
             scenarios_array = np.array(self.all_scenarios)
 
-            np.savez_compressed(
+            save_states(
                 self.states_path,
-                states=states_array,
+                states_array,
                 actions=actions_array,
                 scenarios=scenarios_array,
             )
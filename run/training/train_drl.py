@@ -200,14 +200,16 @@ def train_drl_agent(checkpoint_path=None):
     print(f"State dimension: {state_dim}")
     print(f"Action dimension: {action_dim}")
 
-    agent = DQNAgent(state_dim, action_dim)
+    agent = DQNAgent(
+        state_dim, action_dim, replay_dir=os.path.join(model_dir, "replay_memmap")
+    )
 
     # Load checkpoint if provided
     start_episode = 1
     if checkpoint_path and os.path.exists(checkpoint_path):
         print(f"\n{'=' * 70}")
         print(f"Loading checkpoint: {checkpoint_path}")
-        agent.load(checkpoint_path)
+        agent.load(checkpoint_path, load_memory=True)
         start_episode = agent.episode_count + 1
         print(f"✓ Resuming from Episode {start_episode}")
         print(f"  Epsilon: {agent.epsilon:.4f}")
@@ -315,6 +317,7 @@ def train_drl_agent(checkpoint_path=None):
             "safety_violations_total": 0,
         }
 
+        agent.replay_ratio.reset_stats()
         for step in range(SIMULATION_LIMIT_TRAIN):
             valid_actions = traffic_management.get_valid_actions()
             action, was_exploration = agent.select_action(
@@ -430,6 +433,14 @@ def train_drl_agent(checkpoint_path=None):
             episode, avg_reward, avg_loss, step_count, agent.epsilon, final_metrics
         )
 
+        throughput = agent.replay_ratio.throughput()
+        print(
+            f"  Learner: {throughput['updates_per_sec']:.1f} updates/s | "
+            f"{throughput['samples_per_sec']:,.0f} samples/s | "
+            f"{throughput['gradient_steps']} steps/call | "
+            f"{throughput['train_time_share']:.0%} of episode time"
+        )
+
         if len(agent.memory) > 0:
             print(f"\n{'=' * 70}")
             print(f"[Q-VALUE CHECK] Episode {episode} - Pedestrian Q-value Analysis")
@@ -446,39 +457,37 @@ def train_drl_agent(checkpoint_path=None):
             print(f"{'=' * 70}")
 
             sample_size = min(1000, len(agent.memory))
-            batch, indices, weights = agent.memory.sample(sample_size)
+            with agent.memory_lock:
+                batch, indices, weights = agent.memory.sample(sample_size)
 
             continue_q_values = []
             skip2p1_q_values = []
             next_q_values = []
             action_counts = {"Continue": 0, "Skip2P1": 0, "Next": 0}
 
-            for i, (state, action, reward, next_state, done) in enumerate(batch):
-                with torch.no_grad():
-                    state_tensor = (
-                        torch.FloatTensor(state).unsqueeze(0).to(agent.device)
-                    )
-
-                    q_vals = agent.policy_net(state_tensor).squeeze()
-                    q_list = q_vals.tolist()
+            sampled_states = batch[0]
+            with torch.no_grad():
+                states_tensor = torch.from_numpy(sampled_states).to(agent.device)
+                sampled_q_values = agent.policy_net(states_tensor).cpu().numpy()
 
-                    continue_q = q_list[0]
-                    skip2p1_q = q_list[1]
-                    next_q = q_list[2]
+            for i, q_list in enumerate(sampled_q_values.tolist()):
+                continue_q = q_list[0]
+                skip2p1_q = q_list[1]
+                next_q = q_list[2]
 
-                    continue_q_values.append(continue_q)
-                    skip2p1_q_values.append(skip2p1_q)
-                    next_q_values.append(next_q)
+                continue_q_values.append(continue_q)
+                skip2p1_q_values.append(skip2p1_q)
+                next_q_values.append(next_q)
 
-                    best_action = ["Continue", "Skip2P1", "Next"][
-                        q_vals.argmax().item()
-                    ]
-                    action_counts[best_action] += 1
+                best_action = ["Continue", "Skip2P1", "Next"][
+                    int(np.argmax(q_list))
+                ]
+                action_counts[best_action] += 1
 
-                    if i < 100:
-                        print(
-                            f"  State {i + 1}: Continue={continue_q:+.3f} | Skip2P1={skip2p1_q:+.3f} | Next={next_q:+.3f} → Best: {best_action}"
-                        )
+                if i < 100:
+                    print(
+                        f"  State {i + 1}: Continue={continue_q:+.3f} | Skip2P1={skip2p1_q:+.3f} | Next={next_q:+.3f} → Best: {best_action}"
+                    )
 
             avg_continue_q = sum(continue_q_values) / len(continue_q_values)
             avg_skip2p1_q = sum(skip2p1_q_values) / len(skip2p1_q_values)
@@ -524,6 +533,8 @@ def train_drl_agent(checkpoint_path=None):
             agent.save(checkpoint_path)
             logger.plot_training_progress()
 
+    agent.stop_prefetching()
+    agent.stop_reprioritizing()
     final_model_path = os.path.join(model_dir, "final_model.pth")
     agent.save(final_model_path)
     logger.save_logs()
@@ -0,0 +1,130 @@
+"""Replay snapshots saved with DQNAgent checkpoints (DQNAgent.save / load)."""
+
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.replay_buffer import PrioritizedReplayBuffer
+
+
+@pytest.fixture(params=["memory", "memmap"])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(DRLConfig, "REPLAY_BACKEND", request.param)
+    monkeypatch.setattr(DRLConfig, "MEMMAP_BUFFER_SIZE", DRLConfig.BUFFER_SIZE)
+    return request.param
+
+
+def _agent(run_dir):
+    return DQNAgent(
+        DRLConfig.STATE_DIM,
+        DRLConfig.ACTION_DIM,
+        device="cpu",
+        replay_dir=os.path.join(run_dir, "replay_memmap"),
+    )
+
+
+def _play_episode(agent, steps, seed):
+    rng = np.random.default_rng(seed)
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    for _ in range(steps):
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        agent.store_experience(state, action, float(rng.normal()), next_state, False, {})
+        state = next_state
+    agent.episode_count += 1
+    agent.steps += steps
+
+
+def _checkpoint(agent, run_dir):
+    path = os.path.join(run_dir, f"checkpoint_ep{agent.episode_count}.pth")
+    agent.save(path)
+    return path
+
+
+def _digest(directory):
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(directory)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), "rb") as f:
+                digest.update(name.encode() + f.read())
+    return digest.hexdigest()
+
+
+def test_older_checkpoint_restores_its_own_snapshot(backend, tmp_path):
+    run_dir = str(tmp_path / "run")
+    agent = _agent(run_dir)
+    _play_episode(agent, 300, seed=1)
+    first = _checkpoint(agent, run_dir)
+    _play_episode(agent, 500, seed=2)
+    second = _checkpoint(agent, run_dir)
+
+    for path, expected in ((first, 300), (second, 800)):
+        resumed = _agent(str(tmp_path / f"resumed_{expected}"))
+        resumed.load(path, load_memory=True)
+        assert len(resumed.memory) == expected
+
+    # A third save replaces the oldest snapshot: refuse instead of loading
+    # a buffer from a later episode
+    _play_episode(agent, 100, seed=3)
+    _checkpoint(agent, run_dir)
+    resumed = _agent(str(tmp_path / "resumed_first"))
+    with pytest.raises(ValueError, match="No replay snapshot for checkpoint"):
+        resumed.load(first, load_memory=True)
+
+
+def test_interrupted_save_keeps_previous_snapshot(backend, tmp_path, monkeypatch):
+    run_dir = str(tmp_path / "run")
+    agent = _agent(run_dir)
+    _play_episode(agent, 300, seed=1)
+    saved = _checkpoint(agent, run_dir)
+    _play_episode(agent, 300, seed=2)
+
+    # Crash after the first column file of the next snapshot was written
+    open_memmap = np.lib.format.open_memmap
+    calls = []
+
+    def crashing_open_memmap(*args, **kwargs):
+        calls.append(args[0])
+        if len(calls) > 1:
+            raise OSError("disk full")
+        return open_memmap(*args, **kwargs)
+
+    monkeypatch.setattr(np.lib.format, "open_memmap", crashing_open_memmap)
+    with pytest.raises(OSError):
+        agent.save(os.path.join(run_dir, "checkpoint_ep2.pth"))
+    monkeypatch.setattr(np.lib.format, "open_memmap", open_memmap)
+
+    resumed = _agent(str(tmp_path / "resumed"))
+    resumed.load(saved, load_memory=True)
+    assert len(resumed.memory) == 300
+    buffer = PrioritizedReplayBuffer(DRLConfig.BUFFER_SIZE, DRLConfig.STATE_DIM)
+    buffer.load(os.path.join(run_dir, "replay"))
+    assert len(buffer) == 300
+
+
+def test_resumed_run_copies_snapshot_and_leaves_old_run_untouched(backend, tmp_path):
+    old_run = str(tmp_path / "old_run")
+    agent = _agent(old_run)
+    _play_episode(agent, 300, seed=1)
+    checkpoint = _checkpoint(agent, old_run)
+    del agent
+    old_replay = os.path.join(old_run, "replay")
+    before = _digest(old_replay)
+
+    new_run = str(tmp_path / "new_run")
+    resumed = _agent(new_run)
+    resumed.load(checkpoint, load_memory=True)
+    _play_episode(resumed, 400, seed=2)
+    resumed.train()
+    saved = _checkpoint(resumed, new_run)
+
+    assert _digest(old_replay) == before
+    if backend == "memmap":
+        assert os.path.dirname(resumed.memory.directory) == new_run
+    again = _agent(str(tmp_path / "third_run"))
+    again.load(saved, load_memory=True)
+    assert len(again.memory) == 700
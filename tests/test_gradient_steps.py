@@ -0,0 +1,51 @@
+"""DQNAgent.train() with several gradient steps per call (replay_ratio.py)."""
+
+import random
+
+import numpy as np
+import torch
+
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+
+
+def _filled_agent(transitions, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    for _ in range(transitions):
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        agent.store_experience(state, action, float(rng.normal()), next_state, False, {})
+        state = next_state
+    agent.flush_staged_experiences()
+    return agent
+
+
+def test_each_mini_batch_spans_the_whole_buffer(monkeypatch):
+    gradient_steps, transitions = 4, 5000
+    monkeypatch.setattr(DRLConfig, "GRADIENT_STEPS", gradient_steps)
+    monkeypatch.setattr(DRLConfig, "BATCH_SIZE", 64)
+    monkeypatch.setattr(DRLConfig, "PREFETCH_BATCHES", False)
+    agent = _filled_agent(transitions)
+
+    mini_batches = []
+    gradient_step = agent._gradient_step
+
+    def recording_gradient_step(tensors, indices, generations):
+        mini_batches.append(agent.memory.row_index(np.asarray(indices)))
+        return gradient_step(tensors, indices, generations)
+
+    agent._gradient_step = recording_gradient_step
+    agent.train()
+
+    assert len(mini_batches) == gradient_steps
+    assert all(len(rows) == 64 for rows in mini_batches)
+    for rows in mini_batches:
+        # Every quarter of the filled ring is represented, not one band
+        quarters = np.unique(rows * 4 // transitions)
+        assert quarters.tolist() == [0, 1, 2, 3]
@@ -0,0 +1,183 @@
+"""MemmapPrioritizedReplayBuffer against the in-memory PrioritizedReplayBuffer."""
+
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+from controls.ml_based.drl.replay_buffer import (
+    MemmapPrioritizedReplayBuffer,
+    PrioritizedReplayBuffer,
+)
+
+CAPACITY, STATE_DIM = 3000, 32
+
+
+def _fill(buffer, transitions, seed=0):
+    """Episodes of 100 steps with random TD errors, some inserted at max priority."""
+    rng = np.random.default_rng(seed)
+    state = rng.random(STATE_DIM, dtype=np.float32)
+    for step in range(transitions):
+        next_state = rng.random(STATE_DIM, dtype=np.float32)
+        done = step % 100 == 99
+        td_error = None if step % 7 == 0 else float(rng.exponential())
+        event_type = "safety_violation" if step % 50 == 0 else "normal"
+        buffer.add(
+            state, step % 3, float(rng.normal()), next_state, done, td_error, event_type
+        )
+        state = rng.random(STATE_DIM, dtype=np.float32) if done else next_state
+
+
+def _sample(buffer, seed):
+    random.seed(seed)
+    return buffer.sample(64)
+
+
+def _assert_same_samples(expected, actual, seed=0):
+    (batch_e, indices_e, weights_e), (batch_a, indices_a, weights_a) = (
+        _sample(expected, seed),
+        _sample(actual, seed),
+    )
+    assert np.array_equal(indices_e, indices_a)
+    assert np.allclose(weights_e, weights_a)
+    for column_e, column_a in zip(batch_e, batch_a):
+        assert np.array_equal(column_e, column_a)
+
+
+def _assert_same_buffer(expected, actual):
+    for name in expected.columns:
+        column_e, column_a = expected._column(name), actual._column(name)
+        if name in ("tree", "min_tree"):
+            # load() rebuilds internal nodes; only leaves are bit-identical
+            leaves = slice(expected.tree.capacity - 1, None)
+            assert np.array_equal(column_e[leaves], column_a[leaves]), name
+            assert np.allclose(column_e, column_a), name
+        else:
+            assert np.array_equal(column_e, column_a), name
+    assert len(actual) == len(expected)
+    assert actual.write_index == expected.write_index
+    assert actual.max_priority == expected.max_priority
+    assert np.isclose(actual.tree.total(), expected.tree.total())
+
+
+@pytest.fixture
+def buffers(tmp_path):
+    memory = PrioritizedReplayBuffer(CAPACITY, STATE_DIM)
+    memmap = MemmapPrioritizedReplayBuffer(
+        CAPACITY, STATE_DIM, directory=str(tmp_path / "live")
+    )
+    # Wraps the ring once, so eviction and the reservoir are exercised
+    for buffer in (memory, memmap):
+        _fill(buffer, 4000)
+    return memory, memmap
+
+
+def test_add_sample_update_match_in_memory_buffer(buffers):
+    memory, memmap = buffers
+    _assert_same_buffer(memory, memmap)
+    _assert_same_samples(memory, memmap)
+
+    _, indices, _ = _sample(memory, 1)
+    assert np.array_equal(_sample(memmap, 1)[1], indices)
+    errors = np.random.default_rng(1).exponential(size=len(indices))
+    for buffer in (memory, memmap):
+        buffer.update_priorities(indices, errors)
+    _assert_same_buffer(memory, memmap)
+    _assert_same_samples(memory, memmap, seed=2)
+
+
+def test_save_and_load_into_new_instance_on_same_directory(buffers):
+    memory, memmap = buffers
+    memmap.save()
+    directory = memmap.directory
+    del memmap
+
+    reopened = MemmapPrioritizedReplayBuffer(CAPACITY, STATE_DIM, directory=directory)
+    _assert_same_buffer(memory, reopened)
+    reopened.load(directory)
+    _assert_same_buffer(memory, reopened)
+    _assert_same_samples(memory, reopened)
+
+
+def test_save_and_load_into_new_instance_on_other_directory(buffers, tmp_path):
+    memory, memmap = buffers
+    snapshot = str(tmp_path / "snapshot")
+    memmap.save(snapshot)
+
+    restored = MemmapPrioritizedReplayBuffer(
+        CAPACITY, STATE_DIM, directory=str(tmp_path / "restored")
+    )
+    restored.load(snapshot)
+    _assert_same_buffer(memory, restored)
+    _assert_same_samples(memory, restored)
+
+    # An in-memory snapshot loads into the memmap buffer and vice versa
+    memory.save(str(tmp_path / "memory_snapshot"))
+    from_memory = MemmapPrioritizedReplayBuffer(
+        CAPACITY, STATE_DIM, directory=str(tmp_path / "from_memory")
+    )
+    from_memory.load(str(tmp_path / "memory_snapshot"))
+    _assert_same_buffer(memory, from_memory)
+    into_memory = PrioritizedReplayBuffer(CAPACITY, STATE_DIM)
+    into_memory.load(snapshot)
+    _assert_same_buffer(memory, into_memory)
+
+
+def test_load_rejects_columns_that_do_not_match_state(buffers):
+    _, memmap = buffers
+    memmap.save()
+    path = os.path.join(memmap.directory, "state.json")
+    with open(path) as f:
+        state = json.load(f)
+    state["n_entries"] += 1
+    with open(path, "w") as f:
+        json.dump(state, f)
+
+    with pytest.raises(ValueError, match="does not match its state.json"):
+        memmap.load(memmap.directory)
+
+
+def _resident_arrays(obj, path="agent", seen=None):
+    """(path, shape) of every in-RAM ndarray reachable from the repo's objects."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return []
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return [] if isinstance(obj, np.memmap) else [(path, obj.shape)]
+    if isinstance(obj, (list, tuple)):
+        items = enumerate(obj)
+    elif isinstance(obj, dict):
+        items = obj.items()
+    elif type(obj).__module__.startswith("controls."):
+        items = vars(obj).items()
+    else:
+        return []
+    found = []
+    for key, value in items:
+        found += _resident_arrays(value, f"{path}.{key}", seen)
+    return found
+
+
+def test_memmap_agent_keeps_no_per_row_array_in_ram(tmp_path, monkeypatch):
+    from controls.ml_based.drl.agent import DQNAgent
+    from controls.ml_based.drl.config import DRLConfig
+
+    monkeypatch.setattr(DRLConfig, "REPLAY_BACKEND", "memmap")
+    monkeypatch.setattr(DRLConfig, "MEMMAP_BUFFER_SIZE", 200_000)
+    monkeypatch.setattr(DRLConfig, "TARGET_Q_CACHE", True)
+    monkeypatch.setattr(DRLConfig, "EVENT_QUOTAS", {"safety_violation": 0.1})
+    agent = DQNAgent(
+        STATE_DIM, DRLConfig.ACTION_DIM, device="cpu", replay_dir=str(tmp_path)
+    )
+    assert agent.target_cache is not None and agent.memory.stratum_trees
+
+    n_rows = agent.memory.n_rows
+    per_row = [
+        (path, shape)
+        for path, shape in _resident_arrays(agent)
+        if any(dim >= n_rows for dim in shape)
+    ]
+    assert per_row == []
@@ -0,0 +1,184 @@
+"""PrioritizedReplayBuffer sampling, frame storage, n-step targets and snapshots."""
+
+import json
+import os
+import random
+
+import numpy as np
+
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.replay_buffer import PrioritizedReplayBuffer
+
+STATE_DIM = 4
+
+
+def _episode(rng, steps, rewards=None):
+    """(state, reward, next_state, done) of one episode ending in a terminal step."""
+    frames = rng.random((steps + 1, STATE_DIM), dtype=np.float32)
+    rewards = rng.normal(size=steps) if rewards is None else rewards
+    return [
+        (frames[t], float(rewards[t]), frames[t + 1], t == steps - 1)
+        for t in range(steps)
+    ]
+
+
+def _add_episode(buffer, episode, td_error=1.0):
+    return [
+        buffer.add(state, 0, reward, next_state, done, td_error)
+        for state, reward, next_state, done in episode
+    ]
+
+
+def _reference_sample(buffer, batch_size):
+    """Per-element sampler (one tree.get() per segment, O(n) leaf-scan minimum)."""
+    indices, priorities = [], []
+    segment = buffer.tree.total() / batch_size
+    for i in range(batch_size):
+        s = random.uniform(segment * i, segment * (i + 1))
+        idx, priority, _ = buffer.tree.get(s)
+        indices.append(idx)
+        priorities.append(priority)
+    leaves = buffer.tree.tree[buffer.leaf_index(0) :]
+    min_priority = leaves[leaves > 0].min()
+    weights = np.power(np.array(priorities) / min_priority, -buffer.beta)
+    return np.array(indices), weights
+
+
+def test_sample_matches_per_element_reference():
+    rng = np.random.default_rng(0)
+    buffer = PrioritizedReplayBuffer(5000, STATE_DIM)
+    for _ in range(25):
+        _add_episode(buffer, _episode(rng, 100), td_error=rng.exponential())
+
+    for round_idx in range(20):
+        # sample() anneals beta before computing the weights
+        beta = buffer.beta
+        buffer.beta = min(1.0, beta + buffer.beta_increment)
+        random.seed(round_idx)
+        ref_indices, ref_weights = _reference_sample(buffer, 64)
+        buffer.beta = beta
+
+        random.seed(round_idx)
+        _, indices, weights = buffer.sample(64)
+        assert np.array_equal(indices, ref_indices)
+        assert np.array_equal(weights, ref_weights)
+
+        # Batched priority writes between rounds
+        buffer.update_priorities(indices, rng.exponential(size=64))
+
+
+def test_continuing_episode_stores_each_observation_once():
+    rng = np.random.default_rng(0)
+    buffer = PrioritizedReplayBuffer(64, STATE_DIM, reservoir_size=0)
+    first, second = _episode(rng, 10), _episode(rng, 5)
+
+    assert _add_episode(buffer, first) == list(range(10))
+    # A new episode leaves the terminal frame in place and skips its slot
+    assert _add_episode(buffer, second) == list(range(11, 16))
+    assert buffer.write_index == 16 and len(buffer) == 15
+    assert not buffer.valid[10] and buffer.tree.tree[buffer.leaf_index(10)] == 0.0
+
+    frames = [state for state, *_ in first] + [first[-1][2]]
+    frames += [state for state, *_ in second] + [second[-1][2]]
+    assert np.array_equal(buffer.observations[:17], np.array(frames))
+
+    rows = np.flatnonzero(buffer.valid)
+    states, _, rewards, next_states, dones, horizons = buffer._gather(rows)
+    expected = first + second
+    assert np.array_equal(states, np.array([t[0] for t in expected]))
+    assert np.array_equal(next_states, np.array([t[2] for t in expected]))
+    assert np.array_equal(rewards, np.float32([t[1] for t in expected]))
+    assert np.array_equal(dones, np.array([t[3] for t in expected]))
+    assert (horizons == 1).all()
+
+
+def test_n_step_returns_stop_at_terminal_and_pending_frame(monkeypatch):
+    monkeypatch.setattr(DRLConfig, "N_STEP", 3)
+    gamma = DRLConfig.GAMMA
+    rng = np.random.default_rng(0)
+    buffer = PrioritizedReplayBuffer(64, STATE_DIM, reservoir_size=0)
+    episode = _episode(rng, 5, rewards=[1.0, 2.0, 3.0, 4.0, 5.0])
+    # Unfinished episode: its newest transitions only see the pending frame
+    unfinished = _episode(rng, 3, rewards=[10.0, 20.0, 30.0])[:2]
+    rows = np.array(_add_episode(buffer, episode) + _add_episode(buffer, unfinished))
+
+    _, _, returns, next_states, dones, horizons = buffer._gather(rows)
+    expected = np.array(
+        [
+            1 + gamma * 2 + gamma**2 * 3,
+            2 + gamma * 3 + gamma**2 * 4,
+            3 + gamma * 4 + gamma**2 * 5,
+            4 + gamma * 5,
+            5,
+            10 + gamma * 20,
+            20,
+        ],
+        dtype=np.float32,
+    )
+    assert np.allclose(returns, expected)
+    assert horizons.tolist() == [3, 3, 3, 2, 1, 2, 1]
+    assert dones.tolist() == [False, False, True, True, True, False, False]
+    frames = [state for state, *_ in episode] + [episode[-1][2]]
+    expected_next = [frames[3], frames[4], frames[5], frames[5], frames[5]]
+    expected_next += [unfinished[1][2]] * 2
+    assert np.array_equal(next_states, np.array(expected_next))
+
+
+def _assert_same_buffer(expected, actual):
+    for name in expected.columns:
+        column_e, column_a = expected._column(name), actual._column(name)
+        if name in ("tree", "min_tree"):
+            leaves = slice(expected.tree.capacity - 1, None)
+            assert np.array_equal(column_e[leaves], column_a[leaves]), name
+        else:
+            assert np.array_equal(column_e, column_a), name
+    assert len(actual) == len(expected)
+    assert actual.write_index == expected.write_index
+
+
+def test_incremental_save_copies_dirty_segments_into_alternating_slots(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(PrioritizedReplayBuffer, "SNAPSHOT_SEGMENT", 64)
+    rng = np.random.default_rng(0)
+    buffer = PrioritizedReplayBuffer(512, STATE_DIM, reservoir_size=0)
+    _add_episode(buffer, _episode(rng, 400))
+    directory = str(tmp_path / "replay")
+
+    buffer.save(directory)
+    _add_episode(buffer, _episode(rng, 50))
+    buffer.save(directory)
+
+    def sequences():
+        states = {}
+        for slot in range(PrioritizedReplayBuffer.SNAPSHOT_SLOTS):
+            with open(os.path.join(directory, f"slot_{slot}", "state.json")) as f:
+                states[slot] = json.load(f)["sequence"]
+        return states
+
+    assert sequences() == {0: 0, 1: 1}
+
+    # Mark a segment untouched since slot_0 was written; an incremental
+    # save must not rewrite it
+    observations = os.path.join(directory, "slot_0", "observations.npy")
+    on_disk = np.load(observations, mmap_mode="r+")
+    on_disk[:64] = -1.0
+    on_disk.flush()
+    del on_disk
+
+    # Since slot_0 was saved only rows 401..462 (segments 6 and 7) changed
+    _add_episode(buffer, _episode(rng, 10))
+    assert buffer.write_index == 462
+    buffer.save(directory)
+    assert sequences() == {0: 2, 1: 1}
+    on_disk = np.load(observations)
+    assert (on_disk[:64] == -1.0).all()
+    assert np.array_equal(on_disk[64:], buffer.observations[64:])
+
+    # The other slot catches up with everything written since its last save
+    buffer.save(directory)
+    assert sequences() == {0: 2, 1: 3}
+    restored = PrioritizedReplayBuffer(512, STATE_DIM, reservoir_size=0)
+    restored.load(directory)
+    _assert_same_buffer(buffer, restored)
+
@@ -0,0 +1,89 @@
+"""Background re-prioritisation sweeps (reprioritizer.py) and their buffer side."""
+
+import random
+
+import numpy as np
+import torch
+
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.reprioritizer import BackgroundReprioritizer
+
+
+def _filled_agent(transitions, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+    for _ in range(transitions):
+        next_state = rng.random(DRLConfig.STATE_DIM, dtype=np.float32)
+        action = int(rng.integers(DRLConfig.ACTION_DIM))
+        agent.store_experience(state, action, float(rng.normal()), next_state, False, {})
+        state = next_state
+    agent.flush_staged_experiences()
+    return agent
+
+
+def _reprioritizer(agent, shard_size=None):
+    return BackgroundReprioritizer(
+        agent.memory,
+        agent.memory_lock,
+        agent.policy_net,
+        agent.target_net,
+        agent.discounts,
+        agent.device,
+        shard_size=shard_size,
+        cpu_fraction=1.0,
+    )
+
+
+def _leaves(memory, rows):
+    return memory.tree.tree[memory.leaf_index(rows)].copy()
+
+
+def test_sweep_keeps_priorities_refreshed_by_train_meanwhile():
+    agent = _filled_agent(2000)
+    memory = agent.memory
+    reprioritizer = _reprioritizer(agent)
+    refreshed = np.flatnonzero(memory.valid)[:50]
+
+    # train() updates priorities after the sweep read the rows and before it
+    # applies its (older) TD errors
+    td_errors = reprioritizer._td_errors
+
+    def td_errors_then_train_update(batch):
+        errors = td_errors(batch)
+        with agent.memory_lock:
+            memory.update_priorities(
+                memory.leaf_index(refreshed), np.full(len(refreshed), 7.0)
+            )
+        return errors
+
+    reprioritizer._td_errors = td_errors_then_train_update
+    try:
+        reprioritizer._sweep()
+    finally:
+        reprioritizer.close()
+
+    expected = (7.0 + memory.epsilon) ** memory.alpha
+    assert np.allclose(_leaves(memory, refreshed), expected)
+    assert reprioritizer.rows_rescored == memory.valid.sum() - len(refreshed)
+
+
+def test_shard_sweep_updates_leaves_without_full_rebuild():
+    agent = _filled_agent(2000)
+    memory = agent.memory
+    reprioritizer = _reprioritizer(agent, shard_size=256)
+    rebuilds = memory.tree.rebuilds
+    try:
+        reprioritizer._sweep()
+    finally:
+        reprioritizer.close()
+
+    assert memory.tree.rebuilds == rebuilds
+    assert reprioritizer.rows_rescored == 256
+    leaves = memory.tree.tree[memory.tree.capacity - 1 :]
+    assert np.isclose(memory.tree.total(), leaves.sum(dtype=np.float64))
@@ -0,0 +1,92 @@
+"""Protected reservoir of rare / high-priority transitions (replay_buffer._retain)."""
+
+import numpy as np
+
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.replay_buffer import PrioritizedReplayBuffer
+
+STATE_DIM = 4
+_rng = np.random.default_rng(0)
+
+
+def _add(buffer, reward, td_error, event_type="normal"):
+    """One single-step episode, identified by its reward."""
+    state, next_state = _rng.random((2, STATE_DIM), dtype=np.float32)
+    return buffer.add(state, 0, reward, next_state, True, td_error, event_type)
+
+
+def _reservoir_rewards(buffer):
+    rows = np.arange(buffer.capacity, buffer.capacity + buffer.reservoir_count)
+    return set(buffer.rewards[rows].tolist())
+
+
+def test_priority_fraction_ignores_event_multiplier(monkeypatch):
+    monkeypatch.setattr(DRLConfig, "RESERVOIR_EVENTS", ())
+    monkeypatch.setattr(DRLConfig, "RESERVOIR_PRIORITY_FRACTION", 0.5)
+    buffer = PrioritizedReplayBuffer(capacity=64, state_dim=STATE_DIM, reservoir_size=8)
+
+    _add(buffer, reward=1.0, td_error=10.0)
+    # (|e| + ε)^α at 40% of max_priority: 1.2x max once sync_success's 3x
+    # multiplier is applied, but not within the fraction before it
+    base = 0.4 * buffer.max_priority
+    td_error = base ** (1 / buffer.alpha) - buffer.epsilon
+    _add(buffer, reward=2.0, td_error=td_error, event_type="sync_success")
+    # Full max_priority, but its multiplier is only 1x
+    _add(buffer, reward=3.0, td_error=10.0, event_type="normal")
+    for _ in range(100):  # Evict everything above
+        _add(buffer, reward=0.0, td_error=0.0)
+
+    assert _reservoir_rewards(buffer) == {1.0, 3.0}
+
+
+def test_evicted_protected_transition_keeps_frames_and_priority(monkeypatch):
+    monkeypatch.setattr(DRLConfig, "RESERVOIR_EVENTS", ("safety_violation",))
+    buffer = PrioritizedReplayBuffer(capacity=64, state_dim=STATE_DIM, reservoir_size=8)
+
+    kept = {}
+    for reward in (1.0, 2.0, 3.0):
+        slot = _add(buffer, reward, td_error=reward, event_type="safety_violation")
+        kept[reward] = (
+            buffer.observations[slot].copy(),
+            buffer.observations[slot + 1].copy(),
+            buffer.tree.tree[buffer.leaf_index(slot)],
+        )
+    for _ in range(100):  # Wraps the ring
+        _add(buffer, reward=0.0, td_error=0.0)
+    assert _reservoir_rewards(buffer) == set(kept)
+
+    rows = np.arange(buffer.capacity, buffer.capacity + buffer.reservoir_count)
+    states, _, rewards, next_states, dones, horizons = buffer._gather(rows)
+    for row, state, reward, next_state in zip(rows, states, rewards, next_states):
+        expected_state, expected_next_state, priority = kept[float(reward)]
+        assert np.array_equal(state, expected_state)
+        assert np.array_equal(next_state, expected_next_state)
+        assert buffer.tree.tree[buffer.leaf_index(row)] == priority
+    assert dones.all() and (horizons == 1).all()
+
+
+def test_reservoir_stays_within_budget(monkeypatch):
+    monkeypatch.setattr(DRLConfig, "RESERVOIR_EVENTS", ("safety_violation",))
+    buffer = PrioritizedReplayBuffer(capacity=64, state_dim=STATE_DIM, reservoir_size=8)
+
+    protected = set()
+    for i in range(400):
+        if i % 3 == 0:
+            protected.add(float(i))
+            _add(buffer, float(i), td_error=1.0, event_type="safety_violation")
+        else:
+            _add(buffer, -1.0, td_error=1.0)
+
+        assert buffer.reservoir_count <= buffer.reservoir_size
+        assert buffer.n_entries == buffer.valid.sum()
+
+    code = buffer.event_code("safety_violation")
+    in_ring = buffer.valid[: buffer.capacity] & (
+        buffer.event_codes[: buffer.capacity] == code
+    )
+    assert buffer.reservoir_count == buffer.reservoir_size
+    assert buffer.reservoir_seen == len(protected) - in_ring.sum()
+    assert _reservoir_rewards(buffer) <= protected
+    # Sampleable exactly when valid
+    leaves = buffer.tree.tree[buffer.leaf_index(np.arange(buffer.n_rows))]
+    assert np.array_equal(leaves > 0, buffer.valid)
@@ -0,0 +1,130 @@
+"""Draining actor queues into the learner's replay buffer (shared_replay.py)."""
+
+import random
+
+import numpy as np
+import torch
+
+from controls.ml_based.drl.agent import DQNAgent
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.replay_buffer import PrioritizedReplayBuffer
+from controls.ml_based.drl.shared_replay import SharedReplayHub
+
+
+def _episodes(n, seed=0):
+    """n transitions as columns, with an episode boundary every 50 steps."""
+    rng = np.random.default_rng(seed)
+    states = rng.random((n, DRLConfig.STATE_DIM), dtype=np.float32)
+    next_states = rng.random((n, DRLConfig.STATE_DIM), dtype=np.float32)
+    dones = np.arange(n) % 50 == 49
+    # Continuing steps start from the previous next_state
+    continues = np.flatnonzero(~dones[:-1]) + 1
+    states[continues] = next_states[continues - 1]
+    return {
+        "states": states,
+        "actions": rng.integers(DRLConfig.ACTION_DIM, size=n).astype(np.int8),
+        "rewards": rng.normal(size=n).astype(np.float32),
+        "next_states": next_states,
+        "dones": dones,
+        "event_codes": rng.integers(
+            len(PrioritizedReplayBuffer.EVENT_TYPES), size=n
+        ).astype(np.int8),
+        "td_errors": np.where(rng.random(n) < 0.5, np.nan, rng.random(n) * 3),
+    }
+
+
+def test_add_batch_matches_sequential_add():
+    columns = _episodes(700)
+    sequential = PrioritizedReplayBuffer(capacity=512, state_dim=DRLConfig.STATE_DIM)
+    batched = PrioritizedReplayBuffer(capacity=512, state_dim=DRLConfig.STATE_DIM)
+
+    event_types = PrioritizedReplayBuffer.EVENT_TYPES
+    for i in range(700):
+        td_error = columns["td_errors"][i]
+        sequential.add(
+            columns["states"][i],
+            columns["actions"][i],
+            columns["rewards"][i],
+            columns["next_states"][i],
+            columns["dones"][i],
+            None if np.isnan(td_error) else td_error,
+            event_types[columns["event_codes"][i]],
+        )
+    # Longer than capacity // 2: written in chunks
+    names = ("states", "actions", "rewards", "next_states", "dones")
+    batched.add_batch(*(columns[name] for name in names + ("td_errors", "event_codes")))
+
+    assert np.array_equal(batched.valid, sequential.valid)
+    assert np.array_equal(batched.observations, sequential.observations)
+    assert np.array_equal(batched.event_codes, sequential.event_codes)
+    leaves = slice(batched.tree.capacity - 1, None)
+    assert np.allclose(batched.tree.tree[leaves], sequential.tree.tree[leaves])
+    assert np.isclose(batched.tree.total(), sequential.tree.total(), rtol=1e-5)
+
+
+class _CountingLock:
+    def __init__(self, lock):
+        self.lock = lock
+        self.acquisitions = 0
+
+    def __enter__(self):
+        self.acquisitions += 1
+        return self.lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self.lock.__exit__(*exc)
+
+
+def test_drain_into_adds_each_queue_as_one_batch():
+    random.seed(0)
+    np.random.seed(0)
+    torch.manual_seed(0)
+    agent = DQNAgent(DRLConfig.STATE_DIM, DRLConfig.ACTION_DIM, device="cpu")
+    agent.memory_lock = _CountingLock(agent.memory_lock)
+    hub = SharedReplayHub(n_actors=2, queue_capacity=256, state_dim=DRLConfig.STATE_DIM)
+    event_types = PrioritizedReplayBuffer.EVENT_TYPES
+    try:
+        actor_columns = [_episodes(200, seed) for seed in (1, 2)]
+        for queue, columns in zip(hub.queues, actor_columns):
+            for i in range(200):
+                td_error = columns["td_errors"][i]
+                queue.put(
+                    columns["states"][i],
+                    columns["actions"][i],
+                    columns["rewards"][i],
+                    columns["next_states"][i],
+                    columns["dones"][i],
+                    event_types[columns["event_codes"][i]],
+                    None if np.isnan(td_error) else td_error,
+                )
+        forward_rows = agent.target_forward_rows
+
+        assert hub.drain_into(agent) == 400
+    finally:
+        hub.close()
+
+    memory = agent.memory
+    assert agent.memory_lock.acquisitions == 2
+    assert len(memory) == 400
+    unscored = sum(np.isnan(columns["td_errors"]).sum() for columns in actor_columns)
+    assert agent.target_forward_rows - forward_rows == unscored
+
+    # Actor TD errors are used as sent, the rest are scored by the learner
+    rows = np.flatnonzero(memory.valid)
+    assert len(rows) == 400
+    columns = {
+        name: np.concatenate([c[name] for c in actor_columns])
+        for name in actor_columns[0]
+    }
+    learner_errors, _ = agent._calculate_td_errors(
+        columns["states"],
+        columns["actions"].astype(np.int64),
+        columns["rewards"],
+        columns["next_states"],
+        columns["dones"],
+    )
+    actor_errors = columns["td_errors"]
+    errors = np.where(np.isnan(actor_errors), learner_errors, actor_errors)
+    expected = (np.abs(errors) + memory.epsilon) ** memory.alpha
+    expected *= memory.event_multipliers[columns["event_codes"]]
+    assert np.allclose(memory.tree.tree[memory.leaf_index(rows)], expected, rtol=1e-5)
@@ -0,0 +1,61 @@
+"""StateSubscriptions with missing vehicle subscription results."""
+
+from types import SimpleNamespace
+
+import traci.constants as tc
+
+from controls.ml_based.drl.state_subscriptions import StateSubscriptions
+
+BUS_LANE = "lane_0"
+
+
+class _Domain:
+    def __init__(self, results=None):
+        self.results = {} if results is None else results
+
+    def subscribe(self, *args):
+        pass
+
+    def getAllSubscriptionResults(self):
+        return self.results
+
+
+class _Vehicles(_Domain):
+    def getTypeID(self, veh_id):
+        return "bus" if veh_id.startswith("bus") else "passenger"
+
+
+def _subscriptions(vehicles_on_lane, waiting_times):
+    traci = SimpleNamespace(
+        inductionloop=_Domain(),
+        lane=_Domain({BUS_LANE: {tc.LAST_STEP_VEHICLE_ID_LIST: vehicles_on_lane}}),
+        vehicle=_Vehicles(
+            {
+                veh_id: {tc.VAR_ACCUMULATED_WAITING_TIME: wait}
+                for veh_id, wait in waiting_times.items()
+            }
+        ),
+        simulation=SimpleNamespace(
+            subscribe=lambda *args: None,
+            getSubscriptionResults=lambda: {tc.VAR_TIME: 100.0},
+        ),
+    )
+    subscriptions = StateSubscriptions(["3"], {}, {0: [BUS_LANE]}, 3600)
+    subscriptions.start(traci)
+    return subscriptions
+
+
+def test_bus_avg_wait_over_subscribed_buses():
+    subscriptions = _subscriptions(
+        ("bus_0", "car_0", "bus_1"), {"bus_0": 10.0, "bus_1": 20.0}
+    )
+    assert subscriptions.bus_avg_wait(0) == 15.0
+    state = subscriptions.state({"3": -1}, {"3": 0.0})
+    assert state[13] == 1.0 and state[14] == 0.25
+
+
+def test_bus_without_result_leaves_wait_unavailable():
+    subscriptions = _subscriptions(("bus_0", "bus_1"), {"bus_0": 10.0})
+    assert subscriptions.bus_avg_wait(0) is None
+    state = subscriptions.state({"3": -1}, {"3": 0.0})
+    assert state[13] == 1.0 and state[14] == 0.0
@@ -0,0 +1,46 @@
+"""float32 SumTree drift and rebuild bookkeeping (SumTree.drift / rebuild_interval)."""
+
+import numpy as np
+
+from controls.ml_based.drl.config import DRLConfig
+from controls.ml_based.drl.replay_buffer import SumTree
+
+
+def _float32_tree(capacity, interval):
+    return SumTree(
+        capacity,
+        np.zeros(2 * capacity - 1, dtype=np.float32),
+        np.zeros(2 * capacity - 1, dtype=np.float32),
+        rebuild_interval=interval,
+    )
+
+
+def test_float32_drift_stays_within_documented_bound():
+    capacity, interval = 50_000, 10_000
+    rng = np.random.default_rng(0)
+    tree = _float32_tree(capacity, interval)
+    leaves = np.arange(capacity) + capacity - 1
+
+    # Single-leaf updates (the add() path) mixed with batched updates
+    # (the update_priorities() path)
+    for step in range(60_000):
+        tree.update(int(rng.choice(leaves)), rng.exponential(1.0) ** DRLConfig.ALPHA)
+        if step % 1000 == 999:
+            tree.update_batch(rng.choice(leaves, 64), rng.exponential(1.0, 64))
+            drift = tree.drift()
+            assert drift["root_abs_error"] <= drift["error_bound"], drift
+            assert drift["updates_since_rebuild"] < interval
+    assert tree.rebuilds >= 5
+
+
+def test_update_batch_counts_toward_rebuild_interval():
+    capacity = 1024
+    rng = np.random.default_rng(0)
+    tree = _float32_tree(capacity, interval=10)
+    leaves = np.arange(capacity) + capacity - 1
+
+    for _ in range(25):
+        tree.update_batch(rng.choice(leaves, 64), rng.exponential(1.0, 64))
+    assert tree.rebuilds == 2
+    assert tree.updates_since_rebuild == 5
+    assert tree.peak_total >= float(tree.tree[0]) > 0